@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+
+def require_numpy():
+    """The numpy module, or a ModuleNotFoundError naming the install command (numpy is optional)."""
+    try:
+        import numpy as np
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("Missing dependency: numpy (install: pip install numpy)") from e
+    return np
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, List, Mapping, Sequence, Tuple
+
+try:
+    from backtest._compat import require_numpy
+except ModuleNotFoundError:
+    from _compat import require_numpy  # type: ignore
+
+# A daily series as two NumPy arrays: ascending unique int64 day ordinals and float64 values.
+Series = Tuple[Any, Any]
+
+EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal(), day 0 of datetime64[D]
+
+
+def ordinal_dates(ordinals) -> List[date]:
+    """``datetime.date`` list of int64 day ordinals, converted in C via datetime64[D]."""
+    np = require_numpy()
+    return (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype("datetime64[D]").tolist()
+
+
+@dataclass(frozen=True)
+class AlignedSeries:
+    """Several series joined onto one calendar.
+
+    ``values`` is a C-contiguous float64 ``(len(symbols), len(ordinals))`` matrix; ``valid`` marks the
+    cells that hold an observation (exact or forward-filled within the limit), the others are NaN.
+    """
+
+    symbols: Tuple[str, ...]
+    ordinals: Any  # int64 day ordinals
+    values: Any
+    valid: Any
+
+    def row(self, symbol: str) -> int:
+        return self.symbols.index(symbol)
+
+    def dates(self) -> List[date]:
+        return ordinal_dates(self.ordinals)
+
+    def select(self, keep) -> "AlignedSeries":
+        """Calendar subset by a boolean mask or index array (e.g. ``valid.all(axis=0)``)."""
+        np = require_numpy()
+        return AlignedSeries(
+            self.symbols,
+            np.ascontiguousarray(self.ordinals[keep]),
+            np.ascontiguousarray(self.values[:, keep]),
+            np.ascontiguousarray(self.valid[:, keep]),
+        )
+
+
+def union_calendar(ordinals: Sequence[Any]):
+    np = require_numpy()
+    merged = np.concatenate([np.asarray(o, dtype=np.int64) for o in ordinals]) if ordinals else []
+    if len(merged) == 0:
+        return np.empty(0, dtype=np.int64)
+    lo = merged.min()
+    seen = np.zeros(merged.max() - lo + 1, dtype=bool)  # one flag per calendar day in the span
+    seen[merged - lo] = True
+    return np.flatnonzero(seen) + lo
+
+
+def intersect_calendar(ordinals: Sequence[Any]):
+    np = require_numpy()
+    if not ordinals:
+        return np.empty(0, dtype=np.int64)
+    out = np.asarray(ordinals[0], dtype=np.int64)
+    for o in ordinals[1:]:
+        out = np.intersect1d(out, o, assume_unique=True)
+    return out
+
+
+def align(
+    series: Mapping[str, Series],
+    calendar,
+    ffill_limit: int | None | Mapping[str, int | None] = 0,
+) -> AlignedSeries:
+    """As-of join of every series onto ``calendar`` (ascending int64 ordinals).
+
+    Each calendar day takes the latest observation on or before it; the value counts as valid
+    while it is at most ``ffill_limit`` calendar bars old (0 = exact days only, None = no limit).
+    ``ffill_limit`` may be a per-symbol mapping (missing symbols use 0).
+    """
+    np = require_numpy()
+    calendar = np.asarray(calendar, dtype=np.int64)
+    symbols = tuple(series)
+    k, n = len(symbols), len(calendar)
+    if k == 0 or n == 0:
+        return AlignedSeries(symbols, calendar, np.empty((k, n)), np.zeros((k, n), dtype=bool))
+
+    ordinals = [np.asarray(series[sym][0], dtype=np.int64) for sym in symbols]
+    lo = min([int(calendar[0])] + [int(o[0]) for o in ordinals if len(o)])
+    hi = int(calendar[-1])
+    span = hi - lo + 1
+
+    # latest[r, day] = index (into the concatenated observations) of symbol r's last observation on
+    # or before ``lo + day``: scatter each observation onto its day, then a running max per row
+    latest = np.full((k, span), -1, dtype=np.int64)
+    start = 0
+    for r, o in enumerate(ordinals):
+        m = int(np.searchsorted(o, hi, side="right"))
+        latest[r, o[:m] - lo] = np.arange(start, start + m)
+        start += len(o)
+    np.maximum.accumulate(latest, axis=1, out=latest)
+    idx = latest[:, calendar - lo]
+    seen = idx >= 0
+    idx[~seen] = 0
+
+    closes = np.concatenate([np.asarray(series[sym][1], dtype=np.float64) for sym in symbols])
+    values = closes[idx]
+    valid = seen & ~np.isnan(values)
+
+    if isinstance(ffill_limit, Mapping):
+        limits = [ffill_limit.get(sym, 0) for sym in symbols]
+    else:
+        limits = [ffill_limit] * k
+    if any(limit is not None for limit in limits):
+        observed = np.concatenate(ordinals)[idx]
+        if all(limit == 0 for limit in limits):
+            valid &= observed == calendar  # exact days only
+        else:
+            # age in bars since the observation; one made between two calendar days counts from
+            # the earlier one, so it is never valid at limit 0
+            bar_of_day = np.full(span, -1, dtype=np.int64)
+            bar_of_day[calendar - lo] = np.arange(n)
+            np.maximum.accumulate(bar_of_day, out=bar_of_day)
+            age = np.arange(n, dtype=np.int64) - bar_of_day[observed - lo]
+            bound = np.array([np.inf if limit is None else limit for limit in limits])[:, None]
+            valid &= age <= bound
+    values[~valid] = np.nan
+    return AlignedSeries(symbols, calendar, values, valid)
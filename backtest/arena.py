@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+import os
+import tempfile
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+try:
+    from backtest._compat import require_numpy
+except ModuleNotFoundError:
+    from _compat import require_numpy  # type: ignore
+
+# Directory for arena files; defaults to /dev/shm (RAM-backed on Linux) and falls back to the temp dir.
+ARENA_DIR_ENV = "ARENA_DIR"
+
+
+def _default_dir() -> str:
+    configured = os.getenv(ARENA_DIR_ENV, "").strip()
+    if configured:
+        return configured
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+@dataclass(frozen=True)
+class ArenaSpec:
+    """Picklable handle of an arena; this (not the data) is what gets sent to worker processes."""
+
+    path: str
+    length: int
+    columns: Tuple[str, ...]
+
+
+class MarketArena:
+    """Aligned market data (dates + float64 columns) in one memory-mapped file.
+
+    File layout: ``length`` int64 day ordinals, then one contiguous float64 row of ``length``
+    values per column (missing values are NaN). The creating process owns the file and removes
+    it on `close()`; workers `attach()` by spec and get read-only zero-copy NumPy views backed by
+    the shared page cache, so per-worker memory stays flat however many processes fan out.
+
+    Typical use::
+
+        with MarketArena.from_market(dates, closes, vix, signals) as arena:
+            with multiprocessing.Pool(initializer=init_worker, initargs=(arena.spec,)) as pool:
+                pool.map(task, work)  # task() calls attach(spec) / current_arena()
+    """
+
+    def __init__(self, spec: ArenaSpec, *, owner: bool = False) -> None:
+        np = require_numpy()
+        self.spec = spec
+        self.owner = owner
+        n = spec.length
+        self._ordinals = np.memmap(spec.path, dtype=np.int64, mode="r", offset=0, shape=(n,))
+        self._matrix = np.memmap(spec.path, dtype=np.float64, mode="r", offset=8 * n, shape=(len(spec.columns), n))
+        self._index = {name: k for k, name in enumerate(spec.columns)}
+
+    @classmethod
+    def create(
+        cls,
+        dates: Sequence[date],
+        columns: Mapping[str, Sequence[float | None]],
+        *,
+        directory: str | None = None,
+    ) -> "MarketArena":
+        np = require_numpy()
+        n = len(dates)
+        names = tuple(columns)
+        if n == 0 or not names:
+            raise ValueError("arena needs at least one bar and one column")
+        for name in names:
+            if len(columns[name]) != n:
+                raise ValueError(f"column {name!r} has {len(columns[name])} values, expected {n}")
+
+        fd, path = tempfile.mkstemp(prefix="arena-", suffix=".bin", dir=directory or _default_dir())
+        try:
+            with os.fdopen(fd, "r+b") as f:
+                f.truncate(8 * n * (1 + len(names)))
+            ordinals = np.memmap(path, dtype=np.int64, mode="r+", offset=0, shape=(n,))
+            ordinals[:] = [d.toordinal() for d in dates]
+            matrix = np.memmap(path, dtype=np.float64, mode="r+", offset=8 * n, shape=(len(names), n))
+            for k, name in enumerate(names):
+                values = columns[name]
+                if isinstance(values, np.ndarray):
+                    matrix[k] = values
+                else:
+                    matrix[k] = [np.nan if x is None else float(x) for x in values]
+            ordinals.flush()
+            matrix.flush()
+            del ordinals, matrix
+        except BaseException:
+            os.remove(path)
+            raise
+        return cls(ArenaSpec(path=path, length=n, columns=names), owner=True)
+
+    @classmethod
+    def from_market(
+        cls,
+        dates: Sequence[date],
+        closes: Sequence[Sequence[float]],
+        vix: Sequence[float | None] | None = None,
+        signals: Mapping[str, Sequence[float | None]] | None = None,
+        *,
+        directory: str | None = None,
+    ) -> "MarketArena":
+        """Arena with ``close_0..close_{k-1}``, ``vix`` (if given) and every signal column."""
+        columns: Dict[str, Sequence[float | None]] = {f"close_{k}": col for k, col in enumerate(closes)}
+        if vix is not None:
+            columns["vix"] = vix
+        for name, values in (signals or {}).items():
+            columns[name] = values
+        return cls.create(dates, columns, directory=directory)
+
+    def __len__(self) -> int:
+        return self.spec.length
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def __enter__(self) -> "MarketArena":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def ordinals(self):
+        return self._ordinals
+
+    @property
+    def dates(self) -> List[date]:
+        return [date.fromordinal(int(o)) for o in self._ordinals]
+
+    def column(self, name: str):
+        """Zero-copy read-only view of one column."""
+        try:
+            return self._matrix[self._index[name]]
+        except KeyError:
+            raise KeyError(f"Unknown arena column: {name}. Available: {', '.join(self.spec.columns)}") from None
+
+    @property
+    def closes(self) -> List:
+        return [self.column(name) for name in self.spec.columns if name.startswith("close_")]
+
+    @property
+    def vix(self):
+        return self.column("vix") if "vix" in self else None
+
+    def close(self) -> None:
+        self._ordinals = self._matrix = None  # type: ignore[assignment]
+        _ATTACHED.pop(self.spec.path, None)
+        if self.owner:
+            try:
+                os.remove(self.spec.path)
+            except FileNotFoundError:
+                pass
+
+
+# Per-process cache so repeated tasks in one worker map the file only once.
+_ATTACHED: Dict[str, MarketArena] = {}
+_CURRENT: ArenaSpec | None = None
+
+
+def attach(spec: ArenaSpec) -> MarketArena:
+    arena = _ATTACHED.get(spec.path)
+    if arena is None:
+        arena = _ATTACHED[spec.path] = MarketArena(spec)
+    return arena
+
+
+def init_worker(spec: ArenaSpec) -> None:
+    """`multiprocessing.Pool` initializer: map the arena once per worker."""
+    global _CURRENT
+    _CURRENT = spec
+    attach(spec)
+
+
+def current_arena() -> MarketArena:
+    if _CURRENT is None:
+        raise RuntimeError("no arena attached in this process (use init_worker as the pool initializer)")
+    return attach(_CURRENT)
@@ -1,12 +1,31 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import date, datetime, timedelta
+import math
 from typing import Callable, Dict, List, Sequence, Tuple
 
+try:
+    from backtest.trading_calendar import Schedule, TradingCalendar
+except ModuleNotFoundError:
+    from trading_calendar import Schedule, TradingCalendar  # type: ignore
+
 
 Cashflow = Tuple[date, float]  # (date, amount); invest is negative, ending value is positive
 
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass(frozen=True)
+class RiskMetrics:
+    max_drawdown: float  # negative, on the time-weighted NAV (contributions excluded)
+    max_underwater_days: int  # calendar days from a NAV peak until it is recovered (or series end)
+    annualized_volatility: float | None
+    sharpe: float | None  # risk-free rate assumed 0
+    sortino: float | None
+    worst_year: int | None
+    worst_year_return: float | None  # time-weighted return of the worst calendar year
+
 
 @dataclass(frozen=True)
 class BacktestResult:
@@ -20,6 +39,7 @@ class BacktestResult:
     yearly_xirr: Dict[int, float | None]
     trailing_3y_xirr: float | None
     full_period_xirr: float | None
+    risk: RiskMetrics | None = None
 
 
 def _as_date(d) -> date:
@@ -104,98 +124,448 @@ def yearly_xirr_from_cashflows(
     return results
 
 
+@dataclass
+class RiskAccumulator:
+    """Online risk statistics over a portfolio value curve (one update per bar, O(1) memory).
+
+    Daily returns are time-weighted: today's value *before* today's contribution divided by
+    yesterday's value *after* its contribution, so new money never shows up as performance.
+    """
+
+    periods_per_year: int = TRADING_DAYS_PER_YEAR
+    last_value: float = 0.0
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    downside_sq: float = 0.0
+    nav: float = 1.0
+    peak_nav: float = 1.0
+    peak_date: date | None = None
+    max_drawdown: float = 0.0
+    max_underwater_days: int = 0
+    year: int | None = None
+    year_start_nav: float = 1.0
+    year_obs: int = 0
+    worst_year: int | None = None
+    worst_year_return: float | None = None
+
+    def update(self, d: date, value_before_flow: float, value_after_flow: float) -> None:
+        if self.year != d.year:
+            self._close_year()
+            self.year = d.year
+            self.year_start_nav = self.nav
+            self.year_obs = 0
+
+        if self.last_value > 0:
+            r = float(value_before_flow) / self.last_value - 1.0
+            self.n += 1
+            delta = r - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (r - self.mean)
+            if r < 0:
+                self.downside_sq += r * r
+            self.year_obs += 1
+
+            self.nav *= 1.0 + r
+            if self.nav >= self.peak_nav:
+                self.peak_nav = self.nav
+                self.peak_date = d
+            else:
+                self.max_drawdown = min(self.max_drawdown, self.nav / self.peak_nav - 1.0)
+                if self.peak_date is not None:
+                    self.max_underwater_days = max(self.max_underwater_days, (d - self.peak_date).days)
+        elif self.peak_date is None and value_after_flow > 0:
+            self.peak_date = d
+
+        self.last_value = float(value_after_flow)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["peak_date"] = self.peak_date.isoformat() if self.peak_date else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RiskAccumulator":
+        data = dict(data)
+        data["peak_date"] = _as_date(data["peak_date"]) if data.get("peak_date") else None
+        return cls(**data)
+
+    def _year_return(self) -> float | None:
+        if self.year is None or self.year_obs == 0:
+            return None
+        return self.nav / self.year_start_nav - 1.0
+
+    def _close_year(self) -> None:
+        ret = self._year_return()
+        if ret is not None and (self.worst_year_return is None or ret < self.worst_year_return):
+            self.worst_year, self.worst_year_return = self.year, ret
+
+    def finalize(self) -> RiskMetrics:
+        worst_year, worst_ret = self.worst_year, self.worst_year_return
+        ret = self._year_return()  # the open (possibly partial) year counts too
+        if ret is not None and (worst_ret is None or ret < worst_ret):
+            worst_year, worst_ret = self.year, ret
+
+        vol = sharpe = sortino = None
+        if self.n > 1:
+            std = math.sqrt(self.m2 / (self.n - 1))
+            vol = std * math.sqrt(self.periods_per_year)
+            if std > 0:
+                sharpe = self.mean / std * math.sqrt(self.periods_per_year)
+        if self.n > 0 and self.downside_sq > 0:
+            downside = math.sqrt(self.downside_sq / self.n)
+            sortino = self.mean / downside * math.sqrt(self.periods_per_year)
+
+        return RiskMetrics(
+            max_drawdown=self.max_drawdown,
+            max_underwater_days=self.max_underwater_days,
+            annualized_volatility=vol,
+            sharpe=sharpe,
+            sortino=sortino,
+            worst_year=worst_year,
+            worst_year_return=worst_ret,
+        )
+
+
+@dataclass
+class YearlyXirrAccumulator:
+    """Streaming equivalent of `yearly_xirr_from_cashflows`.
+
+    Only the current year's first/last value and cashflows are kept; a year's XIRR is computed
+    once when the next year starts, so no per-day series has to be stored.
+    """
+
+    results: Dict[int, float | None] = field(default_factory=dict)
+    year: int | None = None
+    start_d: date | None = None
+    start_v: float = 0.0
+    end_d: date | None = None
+    end_v: float = 0.0
+    cashflows: List[Cashflow] = field(default_factory=list)
+
+    def add_cashflow(self, d: date, amount: float) -> None:
+        self.cashflows.append((d, float(amount)))
+
+    def observe(self, d: date, value_after_flow: float) -> None:
+        if self.year != d.year:
+            if self.year is not None:
+                self.results[self.year] = self._current_xirr()
+                self.cashflows = [(cd, cf) for cd, cf in self.cashflows if cd.year != self.year]
+            self.year = d.year
+            self.start_d, self.start_v = d, float(value_after_flow)
+        self.end_d, self.end_v = d, float(value_after_flow)
+
+    def to_dict(self) -> dict:
+        return {
+            "results": {str(y): v for y, v in self.results.items()},
+            "year": self.year,
+            "start_d": self.start_d.isoformat() if self.start_d else None,
+            "start_v": self.start_v,
+            "end_d": self.end_d.isoformat() if self.end_d else None,
+            "end_v": self.end_v,
+            "cashflows": [(d.isoformat(), cf) for d, cf in self.cashflows],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "YearlyXirrAccumulator":
+        return cls(
+            results={int(y): v for y, v in data["results"].items()},
+            year=data["year"],
+            start_d=_as_date(data["start_d"]) if data["start_d"] else None,
+            start_v=float(data["start_v"]),
+            end_d=_as_date(data["end_d"]) if data["end_d"] else None,
+            end_v=float(data["end_v"]),
+            cashflows=[(_as_date(d), float(cf)) for d, cf in data["cashflows"]],
+        )
+
+    def _current_xirr(self) -> float | None:
+        cfs = [(d, cf) for d, cf in self.cashflows if d.year == self.year and self.start_d <= d <= self.end_d]
+        if self.start_v == 0.0 and self.end_v == 0.0 and not cfs:
+            return None
+        return xirr([(self.start_d, -self.start_v)] + cfs + [(self.end_d, self.end_v)])
+
+    def finalize(self) -> Dict[int, float | None]:
+        results = dict(self.results)
+        if self.year is not None:
+            results[self.year] = self._current_xirr()
+        return results
+
+
 def monthly_invest_dates(trading_dates: Sequence[date], invest_day: int = 10) -> List[date]:
     if not trading_dates:
         return []
-    invest_day = int(invest_day)
-    if invest_day < 1 or invest_day > 28:
-        raise ValueError("invest_day should be 1..28 for predictable monthly scheduling")
+    return TradingCalendar(trading_dates).schedule_dates(Schedule.monthly(invest_day))
+
+
+@dataclass
+class _Book:
+    """Portfolio state of one schedule variant inside the shared daily loop."""
+
+    invest_idx: set
+    shares: List[float]
+    total_invested: float = 0.0
+    cashflows: List[Cashflow] = field(default_factory=list)
+    yearly: YearlyXirrAccumulator = field(default_factory=YearlyXirrAccumulator)
+    risk: RiskAccumulator = field(default_factory=RiskAccumulator)
+    pool_remaining: float = 0.0
+    pool_year: int | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "shares": list(self.shares),
+            "total_invested": self.total_invested,
+            "cashflows": [(d.isoformat(), cf) for d, cf in self.cashflows],
+            "yearly": self.yearly.to_dict(),
+            "risk": self.risk.to_dict(),
+            "pool_remaining": self.pool_remaining,
+            "pool_year": self.pool_year,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "_Book":
+        return cls(
+            invest_idx=set(),
+            shares=[float(x) for x in data["shares"]],
+            total_invested=float(data["total_invested"]),
+            cashflows=[(_as_date(d), float(cf)) for d, cf in data["cashflows"]],
+            yearly=YearlyXirrAccumulator.from_dict(data["yearly"]),
+            risk=RiskAccumulator.from_dict(data["risk"]),
+            pool_remaining=float(data["pool_remaining"]),
+            pool_year=data["pool_year"],
+        )
+
+    def step(self, d: date, prices: Sequence[float], lots_fn: Callable[[], List[Lot]] | None) -> None:
+        """Advance one bar; ``lots_fn`` is called only on invest days."""
+        value_before = sum(sh * px for sh, px in zip(self.shares, prices))
+        if lots_fn is not None:
+            for amounts, total in lots_fn():
+                for k, (amount, px) in enumerate(zip(amounts, prices)):
+                    if px > 0:
+                        self.shares[k] += amount / px
+                self.total_invested += total
+                self.cashflows.append((d, -total))
+                self.yearly.add_cashflow(d, -total)
+        value_after = sum(sh * px for sh, px in zip(self.shares, prices))
+        self.yearly.observe(d, value_after)
+        self.risk.update(d, value_before, value_after)
+
+
+Lot = Tuple[Tuple[float, ...], float]  # (amount per asset, total recorded as one cashflow)
+OrderFn = Callable[[int, date, Sequence[float], _Book], List[Lot]]
+
+
+def _run_books(
+    *,
+    dates: Sequence[date],
+    closes: Sequence[Sequence[float]],
+    schedules: Sequence[Schedule],
+    order: OrderFn,
+    calendar: TradingCalendar | None,
+) -> List[_Book]:
+    """Walk the price series once, updating one book per schedule."""
+    calendar = calendar if calendar is not None else TradingCalendar(dates)
+    if len(calendar) != len(dates):
+        raise ValueError("calendar does not match dates")
+    books = [_Book(invest_idx=set(calendar.schedule_indices(sch)), shares=[0.0] * len(closes)) for sch in schedules]
 
-    by_month = {}
-    for d in trading_dates:
-        by_month.setdefault((d.year, d.month), []).append(d)
+    for i, d in enumerate(dates):
+        prices = [float(c[i]) for c in closes]
+        for book in books:
+            invest = i in book.invest_idx
+            book.step(d, prices, (lambda book=book: order(i, d, prices, book)) if invest else None)
+    return books
 
-    result: List[date] = []
-    for (y, m) in sorted(by_month):
-        days = by_month[(y, m)]
-        picked = next((d for d in days if d.day >= invest_day), days[-1])
-        result.append(picked)
-    return result
+
+def _plan_lots(
+    *,
+    d: date,
+    book: _Book,
+    prices: Sequence[float],
+    base_ratio: float,
+    extra_ratio: float,
+    pool_fraction: float,
+    monthly_amount: float,
+    weights: Sequence[float],
+    annual_reserve_pool: float | None,
+) -> List[Lot]:
+    """Turn one bar's contribution plan (see `strategy.base.PLAN_COLUMNS`) into lots."""
+    if not any(px > 0 for px, w in zip(prices, weights) if w > 0):
+        return []
+    if annual_reserve_pool is not None and book.pool_year != d.year:
+        book.pool_year = d.year
+        book.pool_remaining = float(annual_reserve_pool)
+
+    lots: List[Lot] = []
+    base = [float(monthly_amount) * float(w) * float(base_ratio) for w in weights]
+    if sum(base) > 0:
+        lots.append((tuple(base), sum(base)))
+
+    extra_total = 0.0
+    if pool_fraction > 0 and annual_reserve_pool is not None:
+        extra_total = book.pool_remaining * float(pool_fraction)
+    elif extra_ratio > 0:
+        extra_total = float(monthly_amount) * float(extra_ratio)
+
+    if extra_total > 0:
+        if annual_reserve_pool is not None:
+            extra_total = min(extra_total, book.pool_remaining)
+        if extra_total > 0:
+            lots.append((tuple(extra_total * float(w) for w in weights), extra_total))
+            if annual_reserve_pool is not None:
+                book.pool_remaining -= extra_total
+    return lots
 
 
 def compute_ma250_drawdown_ratio(price: float, ma250: float, drawdown: float) -> Tuple[float, str]:
-    if drawdown <= -0.30:
-        return 5.0, "极度恐慌(回撤<=30%)"
-    if drawdown <= -0.20:
-        return 3.0, "深度回调(回撤<=20%)"
-    if price < ma250:
-        return 2.0, "跌破年线(MA250)"
-    return 1.0, "趋势向上/正常"
+    from strategy.ma250_drawdown import ratio_for  # the strategy module owns the rule
 
+    return ratio_for(price, ma250, drawdown)
 
-def backtest_monthly_dca_with_ratios(
+
+def _summarize(
     *,
     symbol: str,
     strategy_key: str,
-    dates: Sequence[date],
-    closes: Sequence[float],
-    ratio_for_index: Callable[[int], float],
-    base_amount: float,
-    invest_day: int = 10,
-    trailing_years: int = 3,
+    start: date,
+    end: date,
+    final_prices: Sequence[float],
+    book: _Book,
+    trailing_years: int,
 ) -> BacktestResult:
-    if len(dates) != len(closes):
-        raise ValueError("dates and closes length mismatch")
-    if len(dates) == 0:
-        raise ValueError("empty price series")
-
-    invest_dates = set(monthly_invest_dates(dates, invest_day=invest_day))
-    shares = 0.0
-    cashflows: List[Cashflow] = []
-    total_invested = 0.0
-    daily_values: List[Tuple[date, float]] = []
-
-    for i, d in enumerate(dates):
-        px = float(closes[i])
-        daily_values.append((d, shares * px))
-        if d not in invest_dates:
-            continue
-        ratio = float(ratio_for_index(i))
-        amount = float(base_amount) * ratio
-        if px <= 0:
-            continue
-        shares += amount / px
-        total_invested += amount
-        cashflows.append((d, -amount))
-        daily_values[-1] = (d, shares * px)
-
-    end = dates[-1]
-    final_value = shares * float(closes[-1])
-    cashflows_end = cashflows + [(end, final_value)]
-
+    final_value = sum(sh * float(px) for sh, px in zip(book.shares, final_prices))
+    cashflows_end = list(book.cashflows) + [(end, final_value)]
     full_xirr = xirr(cashflows_end)
 
     trailing_start = end - timedelta(days=int(trailing_years * 365.25))
-    trailing_cashflows = [(d, cf) for d, cf in cashflows if d >= trailing_start] + [(end, final_value)]
+    trailing_cashflows = [(d, cf) for d, cf in book.cashflows if d >= trailing_start] + [(end, final_value)]
     trailing_xirr = xirr(trailing_cashflows)
 
-    yearly = yearly_xirr_from_cashflows(cashflows=cashflows, daily_values=daily_values)
-
     return BacktestResult(
         symbol=symbol,
         strategy_key=strategy_key,
-        start=dates[0],
+        start=start,
         end=end,
-        total_invested=total_invested,
+        total_invested=book.total_invested,
         final_value=final_value,
-        shares=shares,
-        yearly_xirr=yearly,
+        shares=sum(book.shares),
+        yearly_xirr=book.yearly.finalize(),
         trailing_3y_xirr=trailing_xirr,
         full_period_xirr=full_xirr,
+        risk=book.risk.finalize(),
     )
 
 
-def backtest_two_asset_dca_with_pool(
+def sweep_plan(
+    *,
+    symbol: str,
+    strategy_key: str,
+    dates: Sequence[date],
+    closes: Sequence[Sequence[float]],
+    base_ratio: Sequence[float],
+    extra_ratio: Sequence[float],
+    pool_fraction: Sequence[float],
+    monthly_amount: float,
+    weights: Sequence[float],
+    schedules: Sequence[Schedule],
+    annual_reserve_pool: float | None = None,
+    trailing_years: int = 3,
+    calendar: TradingCalendar | None = None,
+) -> List[BacktestResult]:
+    """Backtest per-bar contribution plans (strategy signal columns) under several schedules in one pass."""
+    if len(dates) == 0:
+        raise ValueError("empty price series")
+    if not all(len(x) == len(dates) for x in (*closes, base_ratio, extra_ratio, pool_fraction)):
+        raise ValueError("series length mismatch")
+    if len(weights) != len(closes):
+        raise ValueError("weights and closes length mismatch")
+
+    def order(i: int, d: date, prices: Sequence[float], book: _Book) -> List[Lot]:
+        return _plan_lots(
+            d=d,
+            book=book,
+            prices=prices,
+            base_ratio=float(base_ratio[i]),
+            extra_ratio=float(extra_ratio[i]),
+            pool_fraction=float(pool_fraction[i]),
+            monthly_amount=monthly_amount,
+            weights=weights,
+            annual_reserve_pool=annual_reserve_pool,
+        )
+
+    books = _run_books(dates=dates, closes=closes, schedules=schedules, order=order, calendar=calendar)
+    return [
+        _summarize(
+            symbol=symbol,
+            strategy_key=strategy_key,
+            start=dates[0],
+            end=dates[-1],
+            final_prices=[c[-1] for c in closes],
+            book=book,
+            trailing_years=trailing_years,
+        )
+        for book in books
+    ]
+
+
+def sweep_monthly_dca_with_ratios(
+    *,
+    symbol: str,
+    strategy_key: str,
+    dates: Sequence[date],
+    closes: Sequence[float],
+    ratio_for_index: Callable[[int], float],
+    base_amount: float,
+    schedules: Sequence[Schedule],
+    trailing_years: int = 3,
+    calendar: TradingCalendar | None = None,
+) -> List[BacktestResult]:
+    """Backtest one ratio series under several schedules in a single pass over the prices."""
+    if len(dates) != len(closes):
+        raise ValueError("dates and closes length mismatch")
+    n = len(dates)
+    return sweep_plan(
+        symbol=symbol,
+        strategy_key=strategy_key,
+        dates=dates,
+        closes=[closes],
+        base_ratio=[float(ratio_for_index(i)) for i in range(n)],
+        extra_ratio=[0.0] * n,
+        pool_fraction=[0.0] * n,
+        monthly_amount=base_amount,
+        weights=(1.0,),
+        schedules=schedules,
+        trailing_years=trailing_years,
+        calendar=calendar,
+    )
+
+
+def backtest_monthly_dca_with_ratios(
+    *,
+    symbol: str,
+    strategy_key: str,
+    dates: Sequence[date],
+    closes: Sequence[float],
+    ratio_for_index: Callable[[int], float],
+    base_amount: float,
+    invest_day: int = 10,
+    trailing_years: int = 3,
+    schedule: Schedule | None = None,
+    calendar: TradingCalendar | None = None,
+) -> BacktestResult:
+    return sweep_monthly_dca_with_ratios(
+        symbol=symbol,
+        strategy_key=strategy_key,
+        dates=dates,
+        closes=closes,
+        ratio_for_index=ratio_for_index,
+        base_amount=base_amount,
+        schedules=[schedule or Schedule.monthly(invest_day)],
+        trailing_years=trailing_years,
+        calendar=calendar,
+    )[0]
+
+
+def sweep_two_asset_dca_with_pool(
     *,
     symbols: Tuple[str, str],
     strategy_key: str,
@@ -206,95 +576,69 @@ def backtest_two_asset_dca_with_pool(
     drawdown_b: Sequence[float],
     vix: Sequence[float | None],
     monthly_total_usd: float,
+    schedules: Sequence[Schedule],
     weights: Tuple[float, float] = (0.5, 0.5),
-    invest_day: int = 10,
     annual_reserve_pool_usd: float = 4000,
     trailing_years: int = 3,
-) -> BacktestResult:
+    calendar: TradingCalendar | None = None,
+) -> List[BacktestResult]:
+    """Backtest the two-asset dip-buy tiers on precomputed drawdowns under several schedules."""
+    from strategy.etf_dca_dip_buy import plan_columns  # the strategy module owns the tiers
+
     if not (len(dates) == len(closes_a) == len(closes_b) == len(drawdown_a) == len(drawdown_b) == len(vix)):
         raise ValueError("series length mismatch")
 
-    invest_dates = set(monthly_invest_dates(dates, invest_day=invest_day))
-    shares_a = 0.0
-    shares_b = 0.0
-    cashflows: List[Cashflow] = []
-    total_invested = 0.0
-    daily_values: List[Tuple[date, float]] = []
-
-    pool_remaining = float(annual_reserve_pool_usd)
-    current_year = dates[0].year
-
-    for i, d in enumerate(dates):
-        px_a_today = float(closes_a[i])
-        px_b_today = float(closes_b[i])
-        daily_values.append((d, shares_a * px_a_today + shares_b * px_b_today))
-        if d.year != current_year:
-            current_year = d.year
-            pool_remaining = float(annual_reserve_pool_usd)
-
-        if d not in invest_dates:
-            continue
-
-        base_a = float(monthly_total_usd) * float(weights[0])
-        base_b = float(monthly_total_usd) * float(weights[1])
-
-        px_a = px_a_today
-        px_b = px_b_today
-        if px_a > 0:
-            shares_a += base_a / px_a
-        if px_b > 0:
-            shares_b += base_b / px_b
-        total_invested += base_a + base_b
-        cashflows.append((d, -(base_a + base_b)))
-
-        worst_dd = min(float(drawdown_a[i]), float(drawdown_b[i]))
-        vix_i = vix[i]
-
-        extra_total = 0.0
-        if worst_dd <= -0.35:
-            extra_total = pool_remaining * 0.5
-        elif worst_dd <= -0.25 and (vix_i is not None and float(vix_i) > 25.0):
-            extra_total = float(monthly_total_usd) * 1.0
-        elif worst_dd <= -0.15:
-            extra_total = float(monthly_total_usd) * 0.5
-        elif -0.14 <= worst_dd <= -0.08 and (vix_i is not None and float(vix_i) > 20.0):
-            extra_total = float(monthly_total_usd) * 0.25
-
-        if extra_total > 0:
-            extra_total = min(extra_total, pool_remaining)
-            if extra_total > 0:
-                extra_a = extra_total * float(weights[0])
-                extra_b = extra_total * float(weights[1])
-                if px_a > 0:
-                    shares_a += extra_a / px_a
-                if px_b > 0:
-                    shares_b += extra_b / px_b
-                total_invested += extra_total
-                cashflows.append((d, -extra_total))
-                pool_remaining -= extra_total
-        daily_values[-1] = (d, shares_a * px_a + shares_b * px_b)
-
-    end = dates[-1]
-    final_value = shares_a * float(closes_a[-1]) + shares_b * float(closes_b[-1])
-    cashflows_end = cashflows + [(end, final_value)]
-
-    full_xirr = xirr(cashflows_end)
-
-    trailing_start = end - timedelta(days=int(trailing_years * 365.25))
-    trailing_cashflows = [(d, cf) for d, cf in cashflows if d >= trailing_start] + [(end, final_value)]
-    trailing_xirr = xirr(trailing_cashflows)
-
-    yearly = yearly_xirr_from_cashflows(cashflows=cashflows, daily_values=daily_values)
+    worst_dd = [min(float(dd_a), float(dd_b)) for dd_a, dd_b in zip(drawdown_a, drawdown_b)]
+    extra_ratio, pool_fraction = plan_columns(worst_dd, vix)
 
-    return BacktestResult(
+    return sweep_plan(
         symbol=",".join(symbols),
         strategy_key=strategy_key,
-        start=dates[0],
-        end=end,
-        total_invested=total_invested,
-        final_value=final_value,
-        shares=shares_a + shares_b,
-        yearly_xirr=yearly,
-        trailing_3y_xirr=trailing_xirr,
-        full_period_xirr=full_xirr,
+        dates=dates,
+        closes=[closes_a, closes_b],
+        base_ratio=[1.0] * len(dates),
+        extra_ratio=extra_ratio,
+        pool_fraction=pool_fraction,
+        monthly_amount=monthly_total_usd,
+        weights=weights,
+        schedules=schedules,
+        annual_reserve_pool=annual_reserve_pool_usd,
+        trailing_years=trailing_years,
+        calendar=calendar,
     )
+
+
+def backtest_two_asset_dca_with_pool(
+    *,
+    symbols: Tuple[str, str],
+    strategy_key: str,
+    dates: Sequence[date],
+    closes_a: Sequence[float],
+    closes_b: Sequence[float],
+    drawdown_a: Sequence[float],
+    drawdown_b: Sequence[float],
+    vix: Sequence[float | None],
+    monthly_total_usd: float,
+    weights: Tuple[float, float] = (0.5, 0.5),
+    invest_day: int = 10,
+    annual_reserve_pool_usd: float = 4000,
+    trailing_years: int = 3,
+    schedule: Schedule | None = None,
+    calendar: TradingCalendar | None = None,
+) -> BacktestResult:
+    return sweep_two_asset_dca_with_pool(
+        symbols=symbols,
+        strategy_key=strategy_key,
+        dates=dates,
+        closes_a=closes_a,
+        closes_b=closes_b,
+        drawdown_a=drawdown_a,
+        drawdown_b=drawdown_b,
+        vix=vix,
+        monthly_total_usd=monthly_total_usd,
+        schedules=[schedule or Schedule.monthly(invest_day)],
+        weights=weights,
+        annual_reserve_pool_usd=annual_reserve_pool_usd,
+        trailing_years=trailing_years,
+        calendar=calendar,
+    )[0]
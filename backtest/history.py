@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Dict, Sequence
+
+try:
+    from backtest._compat import require_numpy
+    from backtest.align import EPOCH_ORDINAL, Series
+except ModuleNotFoundError:
+    from _compat import require_numpy  # type: ignore
+    from align import EPOCH_ORDINAL, Series  # type: ignore
+
+HISTORY_MAX_AGE_SECONDS = 12 * 3600.0
+
+
+class HistoryUnavailable(ValueError):
+    """A history could not be downloaded (yfinance missing, or no data for a symbol)."""
+
+
+def history_dir() -> Path:
+    """Directory of downloaded backtest histories, one binary file per (symbol, period, adjustment):
+    reloading dozens of 20y series is a few np.load calls instead of a network round trip or CSV
+    parsing. HISTORY_CACHE_DIR, else ``.cache/history``; read on every call."""
+    return Path(os.getenv("HISTORY_CACHE_DIR", "").strip() or Path(__file__).resolve().parent.parent / ".cache" / "history")
+
+
+def _path(symbol: str, period: str, auto_adjust: bool, directory: Path | str | None = None) -> Path:
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in symbol)
+    return Path(directory or history_dir()) / f"{safe}-{period}{'-adj' if auto_adjust else ''}.npy"
+
+
+def read_cached(
+    symbol: str,
+    period: str,
+    *,
+    auto_adjust: bool = False,
+    max_age: float | None = HISTORY_MAX_AGE_SECONDS,
+    directory: Path | str | None = None,
+) -> Series | None:
+    """Cached ``(ordinals, closes)`` or None when missing or older than ``max_age`` seconds (None = any age)."""
+    np = require_numpy()
+    path = _path(symbol, period, auto_adjust, directory)
+    try:
+        if max_age is not None and time.time() - path.stat().st_mtime > max_age:
+            return None
+        data = np.load(path)  # (2, n) float64: day ordinals (exact in float64), closes
+    except (FileNotFoundError, ValueError):
+        return None
+    return data[0].astype(np.int64), np.ascontiguousarray(data[1])
+
+
+def write_cached(
+    symbol: str,
+    period: str,
+    series: Series,
+    *,
+    auto_adjust: bool = False,
+    directory: Path | str | None = None,
+) -> None:
+    np = require_numpy()
+    path = _path(symbol, period, auto_adjust, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp_path.open("wb") as f:
+        np.save(f, np.vstack([series[0].astype(np.float64), series[1]]))
+    os.replace(tmp_path, path)
+
+
+def _series(close) -> Series:
+    """(ordinals, closes) of a pandas close Series: NaNs dropped, sorted, duplicate days keep the last."""
+    np = require_numpy()
+    close = close.dropna()
+    index = close.index
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)  # exchange-local calendar day
+    days = np.asarray(index.values, dtype="datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+    values = np.asarray(close.to_numpy(), dtype=np.float64)
+    order = np.argsort(days, kind="stable")
+    days, values = days[order], values[order]
+    last = np.append(days[1:] != days[:-1], True) if len(days) else np.zeros(0, dtype=bool)
+    return np.ascontiguousarray(days[last]), np.ascontiguousarray(values[last])
+
+
+def download(symbols: Sequence[str], period: str = "20y", *, auto_adjust: bool = False) -> Dict[str, Series]:
+    try:
+        import yfinance as yf
+    except ModuleNotFoundError as e:
+        raise HistoryUnavailable("Missing dependency: yfinance (install: pip install yfinance)") from e
+
+    df = yf.download(
+        tickers=" ".join(symbols),
+        period=period,
+        group_by="ticker",
+        auto_adjust=auto_adjust,
+        progress=False,
+        threads=True,
+    )
+    if df is None or len(df) == 0:
+        raise HistoryUnavailable(f"No data returned for {', '.join(symbols)}")
+
+    out: Dict[str, Series] = {}
+    for sym in symbols:
+        if sym in df.columns.get_level_values(0):
+            close = df[sym]["Close"]
+        else:
+            close = df["Close"]
+        out[sym] = _series(close)
+        if len(out[sym][0]) == 0:
+            raise HistoryUnavailable(f"No data for {sym}")
+    return out
+
+
+def load_closes(
+    symbols: Sequence[str],
+    period: str = "20y",
+    *,
+    auto_adjust: bool = False,
+    max_age: float | None = HISTORY_MAX_AGE_SECONDS,
+    directory: Path | str | None = None,
+) -> Dict[str, Series]:
+    """Daily closes per symbol from the history cache; symbols missing or stale there are downloaded
+    in one batch and written back. ``max_age=0`` always downloads."""
+    out: Dict[str, Series] = {}
+    missing = []
+    for sym in dict.fromkeys(symbols):
+        hit = read_cached(sym, period, auto_adjust=auto_adjust, max_age=max_age, directory=directory)
+        if hit is None:
+            missing.append(sym)
+        else:
+            out[sym] = hit
+    if missing:
+        for sym, series in download(missing, period, auto_adjust=auto_adjust).items():
+            out[sym] = series
+            try:
+                write_cached(sym, period, series, auto_adjust=auto_adjust, directory=directory)
+            except OSError as e:
+                print(f">> Could not cache {sym} history: {e}")
+    return out
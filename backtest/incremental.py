@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import copy
+import csv
+from dataclasses import asdict
+from datetime import date, datetime, time
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from backtest.engine import (
+    BacktestResult,
+    Lot,
+    RiskAccumulator,
+    TRADING_DAYS_PER_YEAR,
+    _Book,
+    _as_date,
+    _plan_lots,
+    _summarize,
+)
+from backtest.trading_calendar import OnlineScheduler, Schedule
+
+from strategy import get_strategy
+from strategy.base import PLAN_COLUMNS
+from strategy.etf_dca_dip_buy import EtfDcaDipBuyParams
+from strategy.ma250_drawdown import Ma250Params
+
+
+Bar = Tuple[date | datetime, Sequence[float], float | None]  # (date or bar timestamp, close per symbol, vix or None)
+# (timestamps, close column per symbol, vix column or None); columns only need len() and indexing,
+# so lists, array.array, numpy memmap slices or DataFrame column values all work.
+Chunk = Tuple[Sequence, Sequence[Sequence[float]], Sequence[float | None] | None]
+
+CHECKPOINT_VERSION = 4
+
+
+def _as_timestamp(x) -> datetime:
+    if isinstance(x, datetime):
+        return x.replace(tzinfo=None)
+    if isinstance(x, date):
+        return datetime.combine(x, time.min)
+    if isinstance(x, str):
+        return datetime.fromisoformat(x.strip())
+    if hasattr(x, "to_pydatetime"):  # pandas.Timestamp
+        return x.to_pydatetime().replace(tzinfo=None)
+    raise TypeError(f"Unsupported timestamp type: {type(x)}")
+
+
+class IncrementalBacktest:
+    """Backtest whose full state can be checkpointed and resumed with newly arrived bars.
+
+    Appending k bars costs O(k) (plus the XIRRs, which only touch the cashflow list and the
+    current year). Results match the batch engine run over the same bars. Memory does not grow
+    with the number of bars (only with the number of contributions), so bars can come from any
+    iterator, e.g. `iter_chunk_bars(iter_csv_chunks(...))`.
+
+    Signals come from the strategy's own per-bar signal state (see `strategy.base.Strategy`), so
+    any registered strategy can be run incrementally.
+
+    Bars may be intraday (several timestamps per date): rolling windows are counted in bars,
+    contributions happen on the first bar of an invest day, and ``periods_per_year`` should be
+    set to the bar frequency for the risk metrics.
+    """
+
+    def __init__(
+        self,
+        *,
+        strategy_key: str,
+        params: Any,
+        schedule: Schedule,
+        trailing_years: int = 3,
+        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+    ) -> None:
+        self.strategy = get_strategy(strategy_key)
+        self.strategy_key = self.strategy.key
+        self.params = params
+        self.symbols = list(self.strategy.requirements(params).symbols)
+        self.terms = self.strategy.terms(params)
+        self.signal_state = self.strategy.signal_state(params)
+        self.trailing_years = int(trailing_years)
+        self.scheduler = OnlineScheduler(schedule)
+        self.book = _Book(
+            invest_idx=set(),
+            shares=[0.0] * len(self.symbols),
+            risk=RiskAccumulator(periods_per_year=int(periods_per_year)),
+        )
+        self.start: date | None = None
+        # The newest bar is held back (it may be a partial bar revised later) and only enters the
+        # signal state and the book once a newer bar arrives; result() settles it on a copy.
+        self.pending: Tuple[datetime, List[float], float | None] | None = None
+
+    @classmethod
+    def ma250_drawdown(
+        cls,
+        *,
+        symbol: str,
+        base_amount: float,
+        schedule: Schedule,
+        trailing_years: int = 3,
+        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+    ) -> "IncrementalBacktest":
+        return cls(
+            strategy_key="ma250_drawdown",
+            params=Ma250Params(symbol=symbol, base_amount=float(base_amount)),
+            schedule=schedule,
+            trailing_years=trailing_years,
+            periods_per_year=periods_per_year,
+        )
+
+    @classmethod
+    def etf_dca_dip_buy(
+        cls,
+        *,
+        symbols: Tuple[str, str],
+        monthly_total_usd: float,
+        weights: Tuple[float, float],
+        annual_reserve_pool_usd: float,
+        schedule: Schedule,
+        trailing_years: int = 3,
+        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+    ) -> "IncrementalBacktest":
+        return cls(
+            strategy_key="etf_dca_dip_buy",
+            params=EtfDcaDipBuyParams(
+                etfs=tuple(symbols),
+                weights=tuple(float(w) for w in weights),
+                monthly_total_usd=float(monthly_total_usd),
+                annual_reserve_pool_usd=float(annual_reserve_pool_usd),
+            ),
+            schedule=schedule,
+            trailing_years=trailing_years,
+            periods_per_year=periods_per_year,
+        )
+
+    @property
+    def last_date(self) -> date | None:
+        return self.pending[0].date() if self.pending else None
+
+    def _signal(self, row: Dict[str, float | None]) -> Dict[str, float]:
+        return {k: float(row[k] or 0.0) for k in PLAN_COLUMNS}
+
+    def _lots(self, d: date, book: _Book, prices: Sequence[float], signal: Dict[str, float]) -> List[Lot]:
+        return _plan_lots(
+            d=d,
+            book=book,
+            prices=prices,
+            base_ratio=signal["base_ratio"],
+            extra_ratio=signal["extra_ratio"],
+            pool_fraction=signal["pool_fraction"],
+            monthly_amount=self.terms.monthly_amount,
+            weights=self.terms.weights,
+            annual_reserve_pool=self.terms.annual_reserve_pool,
+        )
+
+    def _commit(self) -> None:
+        _, prices, vix = self.pending  # type: ignore[misc]
+        self._settle(self.signal_state.update(prices, vix))
+
+    def _settle(self, row: Dict[str, float | None]) -> None:
+        ts, prices, _ = self.pending  # type: ignore[misc]
+        d = ts.date()
+        signal = self._signal(row)
+        invest = self.scheduler.is_invest(d)
+        self.book.step(d, prices, (lambda: self._lots(d, self.book, prices, signal)) if invest else None)
+
+    def append(self, bars: Iterable[Bar]) -> int:
+        """Feed bars in time order; bars older than the last seen bar are skipped.
+
+        A bar with the same timestamp as the last one replaces it (a partial bar revised by a
+        later download), even across a checkpoint.
+        """
+        added = 0
+        for ts, prices, vix in bars:
+            ts = _as_timestamp(ts)
+            if self.pending is not None and ts < self.pending[0]:
+                continue
+            prices = [float(px) for px in prices]
+            if len(prices) != len(self.symbols):
+                raise ValueError(f"expected {len(self.symbols)} prices per bar, got {len(prices)}")
+            if self.pending is None:
+                self.start = ts.date()
+                added += 1
+            elif ts > self.pending[0]:
+                self._commit()
+                added += 1
+            self.pending = (ts, prices, None if vix is None else float(vix))
+        return added
+
+    def result(self) -> BacktestResult:
+        if self.pending is None:
+            raise ValueError("empty price series")
+        # Settle the held-back bar on a copy; its signal is peeked, so the state stays untouched.
+        tmp = copy.copy(self)
+        tmp.book = copy.deepcopy(self.book)
+        tmp.scheduler = copy.deepcopy(self.scheduler)
+        tmp._settle(self.signal_state.peek(self.pending[1], self.pending[2]))
+        return _summarize(
+            symbol=",".join(self.symbols),
+            strategy_key=self.strategy_key,
+            start=self.start,  # type: ignore[arg-type]
+            end=self.pending[0].date(),
+            final_prices=self.pending[1],
+            book=tmp.book,
+            trailing_years=self.trailing_years,
+        )
+
+    def to_dict(self) -> dict:
+        pending = None
+        if self.pending is not None:
+            ts, prices, vix = self.pending
+            pending = {"ts": ts.isoformat(), "prices": prices, "vix": vix}
+        return {
+            "version": CHECKPOINT_VERSION,
+            "strategy_key": self.strategy_key,
+            "params": asdict(self.params),
+            "trailing_years": self.trailing_years,
+            "scheduler": self.scheduler.to_dict(),
+            "book": self.book.to_dict(),
+            "signal_state": self.signal_state.to_dict(),
+            "start": self.start.isoformat() if self.start else None,
+            "pending": pending,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IncrementalBacktest":
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {data.get('version')}")
+        scheduler = OnlineScheduler.from_dict(data["scheduler"])
+        strategy = get_strategy(data["strategy_key"])
+        params = strategy.params_from_dict(data["params"])
+        inc = cls(
+            strategy_key=strategy.key,
+            params=params,
+            schedule=scheduler.schedule,
+            trailing_years=data["trailing_years"],
+        )
+        inc.scheduler = scheduler
+        inc.book = _Book.from_dict(data["book"])
+        inc.signal_state = strategy.signal_state(params, data["signal_state"])
+        inc.start = _as_date(data["start"]) if data["start"] else None
+        if data["pending"] is not None:
+            p = data["pending"]
+            inc.pending = (_as_timestamp(p["ts"]), [float(x) for x in p["prices"]], p["vix"])
+        return inc
+
+    def save(self, path: str) -> None:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IncrementalBacktest":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def iter_chunk_bars(chunks: Iterable[Chunk]) -> Iterator[Bar]:
+    """Flatten columnar chunks into bars without materializing more than one chunk."""
+    for timestamps, columns, vix in chunks:
+        for i in range(len(timestamps)):
+            yield timestamps[i], [col[i] for col in columns], (None if vix is None else vix[i])
+
+
+def iter_csv_chunks(
+    path: str,
+    *,
+    date_column: str = "date",
+    price_columns: Sequence[str],
+    vix_column: str | None = None,
+    chunk_size: int = 100_000,
+) -> Iterator[Chunk]:
+    """Stream a CSV in fixed-size columnar chunks (stdlib only).
+
+    Rows with a missing/non-positive price in any ``price_columns`` are dropped (like the
+    aligned download path); an empty VIX cell becomes None and is forward-filled by the engine.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        wanted = [date_column, *price_columns, *([vix_column] if vix_column else [])]
+        missing = [c for c in wanted if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+
+        def empty_chunk():
+            return [], [[] for _ in price_columns], ([] if vix_column else None)
+
+        ts, cols, vix = empty_chunk()
+        for row in reader:
+            try:
+                prices = [float(row[c]) for c in price_columns]
+            except (TypeError, ValueError):
+                continue
+            if any(not (px > 0) for px in prices):
+                continue
+            ts.append(row[date_column])
+            for col, px in zip(cols, prices):
+                col.append(px)
+            if vix is not None:
+                raw = (row[vix_column] or "").strip()
+                vix.append(float(raw) if raw and raw.lower() != "nan" else None)
+            if len(ts) >= chunk_size:
+                yield ts, cols, vix
+                ts, cols, vix = empty_chunk()
+        if ts:
+            yield ts, cols, vix
+
+
+def backtest_chunks(inc: IncrementalBacktest, chunks: Iterable[Chunk]) -> BacktestResult:
+    """Run ``inc`` over an iterator of chunks; state carries across chunk boundaries."""
+    inc.append(iter_chunk_bars(chunks))
+    return inc.result()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, List, Tuple
+
+
+class RollingMax:
+    """Rolling maximum over the last ``window`` values (monotonic deque, amortized O(1) per update)."""
+
+    def __init__(self, window: int) -> None:
+        self.window = int(window)
+        self.count = 0
+        self._q: Deque[Tuple[int, float]] = deque()  # (position, value), values decreasing
+
+    def update(self, x: float) -> float | None:
+        """Push one value; returns the max once the window is full, else None."""
+        x = float(x)
+        pos = self.count
+        self.count += 1
+        while self._q and self._q[-1][1] <= x:
+            self._q.pop()
+        self._q.append((pos, x))
+        while self._q[0][0] <= pos - self.window:
+            self._q.popleft()
+        return self._q[0][1] if self.count >= self.window else None
+
+    def peek(self, x: float) -> float | None:
+        """What `update(x)` would return, without pushing ``x`` (O(1))."""
+        x = float(x)
+        pos = self.count
+        best = x
+        for p, v in self._q:  # only the front entry can fall out of the window on the next push
+            if p > pos - self.window:
+                best = max(v, x)
+                break
+        return best if pos + 1 >= self.window else None
+
+    def to_dict(self) -> dict:
+        return {"window": self.window, "count": self.count, "q": [list(e) for e in self._q]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollingMax":
+        obj = cls(data["window"])
+        obj.count = int(data["count"])
+        obj._q = deque((int(p), float(v)) for p, v in data["q"])
+        return obj
+
+
+class RollingMean:
+    """Rolling mean over the last ``window`` values (running sum, O(1) per update)."""
+
+    # re-sum the window every N updates so float error from add/subtract cannot accumulate
+    RESUM_EVERY = 10_000
+
+    def __init__(self, window: int) -> None:
+        self.window = int(window)
+        self.count = 0
+        self._values: Deque[float] = deque(maxlen=self.window)
+        self._sum = 0.0
+
+    def update(self, x: float) -> float | None:
+        """Push one value; returns the mean once the window is full, else None."""
+        x = float(x)
+        if len(self._values) == self.window:
+            self._sum -= self._values[0]
+        self._values.append(x)
+        self._sum += x
+        self.count += 1
+        if self.count % self.RESUM_EVERY == 0:
+            self._sum = sum(self._values)
+        return self._sum / self.window if self.count >= self.window else None
+
+    def peek(self, x: float) -> float | None:
+        """What `update(x)` would return, without pushing ``x`` (O(1))."""
+        # same operation order as update(), so both round identically
+        x = float(x)
+        full = len(self._values) == self.window
+        if (self.count + 1) % self.RESUM_EVERY == 0:
+            total = sum(list(self._values)[1:] if full else self._values) + x
+        else:
+            total = (self._sum - self._values[0] if full else self._sum) + x
+        return total / self.window if self.count + 1 >= self.window else None
+
+    def to_dict(self) -> dict:
+        return {"window": self.window, "count": self.count, "values": list(self._values), "sum": self._sum}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollingMean":
+        obj = cls(data["window"])
+        obj.count = int(data["count"])
+        values: List[float] = [float(v) for v in data["values"]]
+        obj._values.extend(values)
+        obj._sum = float(data["sum"])
+        return obj
@@ -1,132 +1,280 @@
 from __future__ import annotations
 
 import argparse
-from dataclasses import replace
+from dataclasses import dataclass
 from datetime import date
 import os
-from typing import List, Tuple
-
-try:
-    from backtest.engine import (
-        BacktestResult,
-        backtest_monthly_dca_with_ratios,
-        backtest_two_asset_dca_with_pool,
-        compute_ma250_drawdown_ratio,
-    )
-except ModuleNotFoundError:
-    from engine import (  # type: ignore
-        BacktestResult,
-        backtest_monthly_dca_with_ratios,
-        backtest_two_asset_dca_with_pool,
-        compute_ma250_drawdown_ratio,
+from pathlib import Path
+import sys
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+if not __package__:
+    # run as a script (python backtest/run_backtest.py): the backtest and strategy packages live in the repo root
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backtest._compat import require_numpy
+from backtest.align import AlignedSeries, Series, align, union_calendar
+from backtest.engine import BacktestResult, sweep_plan
+from backtest.history import HISTORY_MAX_AGE_SECONDS, HistoryUnavailable, load_closes
+from backtest.incremental import IncrementalBacktest, iter_chunk_bars, iter_csv_chunks
+from backtest.trading_calendar import Schedule, TradingCalendar
+from backtest.tournament import (
+    RANK_METRICS,
+    DataKey,
+    Dataset,
+    Variant,
+    data_keys,
+    load_variants,
+    print_table,
+    rank,
+    render_html,
+    run_tournament,
+)
+from backtest.walk_forward import WalkForwardReport, walk_forward
+
+from strategy import get_strategy
+from strategy.base import PLAN_COLUMNS, DataRequirements, Signals, compute_signals
+from strategy.etf_dca_dip_buy import DEFAULT_TIER_THRESHOLDS, EtfDcaDipBuyParams
+from strategy.ma250_drawdown import Ma250Params
+from strategy.signal_store import SignalStore, store_symbol
+
+
+@dataclass(frozen=True)
+class LoadOptions:
+    """How histories are aligned: forward-fill limits in bars (0 = common trading days only) and cache age."""
+
+    ffill_limit: int | None = 0
+    vix_ffill_limit: int | None = 0
+    max_age: float | None = HISTORY_MAX_AGE_SECONDS
+
+
+def _load_aligned(
+    symbols: Sequence[str],
+    vix_sym: str | None,
+    period: str,
+    load: LoadOptions = LoadOptions(),
+    *,
+    auto_adjust: bool = False,
+    series: Mapping[str, Series] | None = None,
+) -> Tuple[AlignedSeries, AlignedSeries | None]:
+    """Closes of ``symbols`` on the days where every one of them is valid, plus VIX on the same days.
+
+    ``series`` are already loaded histories (of the same adjustment); by default they are loaded here.
+    """
+    if series is None:
+        wanted = list(symbols) + ([vix_sym] if vix_sym else [])
+        series = load_closes(wanted, period=period, auto_adjust=auto_adjust, max_age=load.max_age)
+    calendar = union_calendar([series[sym][0] for sym in symbols])
+    closes = align({sym: series[sym] for sym in symbols}, calendar, load.ffill_limit)
+    closes = closes.select(closes.valid.all(axis=0))
+    vix = align({vix_sym: series[vix_sym]}, closes.ordinals, load.vix_ffill_limit) if vix_sym else None
+    return closes, vix
+
+
+def _align_closes_and_vix(
+    symbols: Sequence[str],
+    vix_sym: str | None,
+    period: str,
+    load: LoadOptions = LoadOptions(),
+    *,
+    auto_adjust: bool = False,
+    series: Mapping[str, Series] | None = None,
+) -> Tuple[List[date], List[List[float]], List[float | None] | None]:
+    """`_load_aligned` as the lists the engine consumes.
+
+    The engine and the signal states index plain lists element by element, so this is where the
+    arrays stop: one C-level ``tolist()`` per column (~10 ms for 50 symbols x 20y) and datetime64
+    date conversion. Callers that can work on arrays should use `_load_aligned` directly.
+    """
+    np = require_numpy()
+    closes, vix = _load_aligned(symbols, vix_sym, period, load, auto_adjust=auto_adjust, series=series)
+    # missing VIX becomes None
+    vix_list = np.where(vix.valid[0], vix.values[0], None).tolist() if vix is not None else None
+    return closes.dates(), closes.values.tolist(), vix_list
+
+
+def uses_adjusted_closes(req: DataRequirements) -> bool:
+    """Price basis of a backtest: single-symbol runs have always used adjusted closes (Ticker.history),
+    multi-symbol ones raw closes. Stored signals are only reused when computed on the same basis."""
+    return len(req.symbols) == 1 and not req.needs_vix
+
+
+def load_history(
+    req: DataRequirements,
+    period: str,
+    load: LoadOptions = LoadOptions(),
+    series: Mapping[str, Series] | None = None,
+) -> Tuple[List[date], List[List[float]], List[float | None] | None]:
+    """Daily closes for a strategy's data requirements, aligned on common dates (VIX filled up to ``load.vix_ffill_limit``)."""
+    vix_sym = "^VIX" if req.needs_vix else None
+    return _align_closes_and_vix(req.symbols, vix_sym, period, load, auto_adjust=uses_adjusted_closes(req), series=series)
+
+
+def _load_options(args) -> LoadOptions:
+    def limit(value: int) -> int | None:
+        return None if value < 0 else value
+
+    return LoadOptions(
+        ffill_limit=limit(int(args.ffill_limit)),
+        vix_ffill_limit=limit(int(args.vix_ffill_limit)),
+        max_age=float(args.history_max_age) * 3600.0,
     )
 
 
-def _download_one(symbol: str, period: str = "20y") -> Tuple[List[date], List[float]]:
-    try:
-        import yfinance as yf
-    except ModuleNotFoundError as e:
-        raise SystemExit("Missing dependency: yfinance (install: pip install yfinance)") from e
+def _parse_two(value: str, name: str, example: str) -> List[str]:
+    items = [s.strip() for s in str(value).split(",") if s.strip()]
+    if len(items) != 2:
+        raise SystemExit(f"--{name} must contain exactly 2 values, e.g. {example}")
+    return items
 
-    hist = yf.Ticker(symbol).history(period=period)
-    if len(hist) == 0:
-        raise SystemExit(f"No data for {symbol}")
 
-    dates = [d.date() for d in hist.index.to_pydatetime()]
-    closes = [float(x) for x in hist["Close"].tolist()]
-    return dates, closes
+def _parse_weights(value: str) -> Tuple[float, float]:
+    w_list = _parse_two(value, "weights", "0.5,0.5")
+    w0, w1 = float(w_list[0]), float(w_list[1])
+    if w0 < 0 or w1 < 0 or abs((w0 + w1) - 1.0) > 1e-6:
+        raise SystemExit("--weights must be non-negative and sum to 1.0")
+    return w0, w1
 
 
-def _ratio_series_ma250_drawdown(dates: List[date], closes: List[float]) -> List[float]:
-    try:
-        import pandas as pd
-    except ModuleNotFoundError as e:
-        raise SystemExit("Missing dependency: pandas (install: pip install pandas)") from e
-
-    s = pd.Series(closes, index=pd.to_datetime(dates))
-    ma250 = s.rolling(window=250).mean()
-    high_250 = s.rolling(window=250).max()
-    drawdown = (s - high_250) / high_250
-
-    ratios: List[float] = []
-    for i in range(len(s)):
-        if i < 250 or pd.isna(ma250.iat[i]) or pd.isna(drawdown.iat[i]):
-            ratios.append(1.0)
-            continue
-        r, _reason = compute_ma250_drawdown_ratio(
-            price=float(s.iat[i]),
-            ma250=float(ma250.iat[i]),
-            drawdown=float(drawdown.iat[i]),
-        )
-        ratios.append(r)
-    return ratios
-
+def _params_from_args(args, strategy_key: str) -> Any:
+    if strategy_key == "ma250_drawdown":
+        return Ma250Params(symbol=args.symbol, base_amount=float(args.base_amount))
+    sym_a, sym_b = _parse_two(args.symbols, "symbols", "SPY,QQQ")
+    return EtfDcaDipBuyParams(
+        etfs=(sym_a, sym_b),
+        weights=_parse_weights(args.weights),
+        monthly_total_usd=float(args.monthly_total),
+        annual_reserve_pool_usd=float(args.annual_pool),
+        invest_day=int(args.invest_day),
+    )
 
-def _download_many(symbols: List[str], period: str = "20y"):
-    try:
-        import yfinance as yf
-    except ModuleNotFoundError as e:
-        raise SystemExit("Missing dependency: yfinance (install: pip install yfinance)") from e
 
-    try:
-        import pandas as pd
-    except ModuleNotFoundError as e:
-        raise SystemExit("Missing dependency: pandas (install: pip install pandas)") from e
-
-    df = yf.download(
-        tickers=" ".join(symbols),
-        period=period,
-        group_by="ticker",
-        auto_adjust=False,
-        progress=False,
-        threads=True,
+def backtest_market(
+    strategy_key: str,
+    params: Any,
+    dates: List[date],
+    closes: List[List[float]],
+    vix: List[float | None] | None,
+    schedules: List[Schedule],
+    trailing_years: int = 3,
+    signals: Signals | None = None,
+) -> List[BacktestResult]:
+    """Run the plan sweep over already loaded history; signals are computed unless given (e.g. from the store)."""
+    strategy = get_strategy(strategy_key)
+    req = strategy.requirements(params)
+    terms = strategy.terms(params)
+    if signals is None:
+        signals = compute_signals(strategy, params, closes, vix)
+    return sweep_plan(
+        symbol=",".join(req.symbols),
+        strategy_key=strategy.key,
+        dates=dates,
+        closes=closes,
+        base_ratio=signals["base_ratio"],
+        extra_ratio=signals["extra_ratio"],
+        pool_fraction=signals["pool_fraction"],
+        monthly_amount=terms.monthly_amount,
+        weights=terms.weights,
+        schedules=schedules,
+        annual_reserve_pool=terms.annual_reserve_pool,
+        trailing_years=trailing_years,
+        calendar=TradingCalendar(dates),
     )
-    if df is None or len(df) == 0:
-        raise SystemExit("No data returned")
-
-    closes = {}
-    for sym in symbols:
-        if sym in df.columns.get_level_values(0):
-            close = df[sym]["Close"].copy()
-        else:
-            close = df["Close"].copy()
-        close.index = pd.to_datetime(close.index).date
-        closes[sym] = close
-    return closes
-
-
-def _align_two_assets_and_vix(
-    sym_a: str,
-    sym_b: str,
-    vix_sym: str,
-    period: str,
-) -> Tuple[List[date], List[float], List[float], List[float], List[float], List[float | None]]:
-    import pandas as pd
-
-    closes = _download_many([sym_a, sym_b, vix_sym], period=period)
-    a = closes[sym_a].rename("a")
-    b = closes[sym_b].rename("b")
-    v = closes[vix_sym].rename("vix")
 
-    df = pd.concat([a, b, v], axis=1)
-    df = df.dropna(subset=["a", "b"])
-    df["vix"] = df["vix"].ffill()
 
-    roll_max_a = df["a"].rolling(window=126).max()
-    roll_max_b = df["b"].rolling(window=126).max()
-    dd_a = (df["a"] - roll_max_a) / roll_max_a
-    dd_b = (df["b"] - roll_max_b) / roll_max_b
+def _stored_signals(
+    store: SignalStore,
+    strategy_key: str,
+    params: Any,
+    dates: List[date],
+    closes: List[List[float]],
+    vix: List[float | None] | None,
+) -> Signals | None:
+    """Plan columns for ``dates`` from the signal store, or None unless every date is stored.
+
+    Only rows computed on this backtest's price basis are used. The first ``min_bars`` rows are the
+    warm-up of a run starting at ``dates[0]`` (the store never holds warm-up rows), so they are
+    computed from those bars; every later row does not depend on where the history starts.
+    """
+    strategy = get_strategy(strategy_key)
+    req = strategy.requirements(params)
+    warmup = min(req.min_bars, len(dates))
+    rest = dates[warmup:]
+    stored_dates, stored = (
+        store.range(strategy.key, store_symbol(strategy, params), rest[0], rest[-1], adjusted=uses_adjusted_closes(req))
+        if rest
+        else ([], {})
+    )
+    index = {d: i for i, d in enumerate(stored_dates)}
+    if any(d not in index for d in rest) or (rest and any(c not in stored for c in PLAN_COLUMNS)):
+        return None
+    head = compute_signals(strategy, params, [c[:warmup] for c in closes], None if vix is None else vix[:warmup])
+    return {c: head.get(c, [])[:warmup] + [stored[c][index[d]] for d in rest] for c in PLAN_COLUMNS}
 
-    df["dd_a"] = dd_a
-    df["dd_b"] = dd_b
 
-    dates = list(df.index)
-    closes_a = [float(x) for x in df["a"].tolist()]
-    closes_b = [float(x) for x in df["b"].tolist()]
-    drawdown_a = [float(x) if x == x else 0.0 for x in df["dd_a"].tolist()]
-    drawdown_b = [float(x) if x == x else 0.0 for x in df["dd_b"].tolist()]
-    vix = [float(x) if x == x else None for x in df["vix"].tolist()]
-    return dates, closes_a, closes_b, drawdown_a, drawdown_b, vix
+def _backtest_strategy(
+    strategy_key: str,
+    params: Any,
+    schedules: List[Schedule],
+    period: str,
+    store: SignalStore | None = None,
+    load: LoadOptions = LoadOptions(),
+) -> List[BacktestResult]:
+    """Download the strategy's data, get its signals (store or computed), run the plan sweep."""
+    req = get_strategy(strategy_key).requirements(params)
+    dates, closes, vix = load_history(req, period=period, load=load)
+    signals = None
+    if store is not None and dates:
+        signals = _stored_signals(store, strategy_key, params, dates, closes, vix)
+        print(f">> {strategy_key}: signals {'read from' if signals else 'not fully covered by'} {store.path}")
+    return backtest_market(strategy_key, params, dates, closes, vix, schedules, signals=signals)
+
+
+def _run_incremental(args, schedule: Schedule) -> None:
+    """Streamed/resumable run: bars come from ``--csv`` (chunked) or a download, state from ``--checkpoint``.
+
+    Without a checkpoint the data comes from ``--period``; when resuming only ``--refresh-period``
+    is downloaded. Memory stays flat in the number of bars either way.
+    """
+    path = str(args.checkpoint) if args.checkpoint else None
+    if path and os.path.exists(path):
+        inc = IncrementalBacktest.load(path)
+        if inc.strategy_key != args.strategy:
+            raise SystemExit(f"Checkpoint {path} is for {inc.strategy_key}, not {args.strategy}")
+        period = str(args.refresh_period)
+        print(f">> Resuming {path} (last bar {inc.last_date}); parameters come from the checkpoint")
+    else:
+        inc = IncrementalBacktest(
+            strategy_key=args.strategy,
+            params=_params_from_args(args, args.strategy),
+            schedule=schedule,
+            periods_per_year=args.bars_per_year,
+        )
+        period = str(args.period)
+    req = inc.strategy.requirements(inc.params)
+
+    if args.csv:
+        chunks = iter_csv_chunks(
+            str(args.csv),
+            date_column=str(args.csv_date_column),
+            price_columns=inc.symbols,
+            vix_column=str(args.csv_vix_column) if req.needs_vix else None,
+            chunk_size=int(args.chunk_size),
+        )
+        added = inc.append(iter_chunk_bars(chunks))
+    else:
+        dates, closes, vix = load_history(req, period=period, load=_load_options(args))
+        bars = iter_chunk_bars([(dates, closes, vix)])
+        if inc.last_date is not None and dates and dates[0] > inc.last_date:
+            print(f">> Warning: refresh data starts {dates[0]}, after the checkpoint's last bar; widen --refresh-period")
+        added = inc.append(bars)
+
+    if path:
+        inc.save(path)
+        print(f">> Appended {added} new bar(s); checkpoint saved: {path}")
+    else:
+        print(f">> Processed {added} bar(s)")
+    _print_result(inc.result())
 
 
 def _print_result(r: BacktestResult) -> None:
@@ -144,12 +292,69 @@ def _print_result(r: BacktestResult) -> None:
     print(f"shares:         {r.shares:,.6f}")
     print(f"trailing_3y_xirr: {pct(r.trailing_3y_xirr)}")
     print(f"full_period_xirr: {pct(r.full_period_xirr)}")
+    if r.risk is not None:
+        m = r.risk
+
+        def num(x):
+            return "N/A" if x is None else f"{x:.2f}"
+
+        worst = "N/A" if m.worst_year is None else f"{m.worst_year} ({pct(m.worst_year_return)})"
+        print(f"max_drawdown:     {pct(m.max_drawdown)}")
+        print(f"max_underwater:   {m.max_underwater_days} days")
+        print(f"annualized_vol:   {pct(m.annualized_volatility)}")
+        print(f"sharpe:           {num(m.sharpe)}")
+        print(f"sortino:          {num(m.sortino)}")
+        print(f"worst_year:       {worst}")
     if r.yearly_xirr:
         print("yearly_xirr:")
         for y in sorted(r.yearly_xirr):
             print(f"  {y}: {pct(r.yearly_xirr[y])}")
 
 
+def _print_invest_day_sweep(results: List[BacktestResult], invest_days: List[int]) -> None:
+    def pct(x):
+        return "N/A" if x is None else f"{x*100:.2f}%"
+
+    print("== Invest-day sensitivity ==")
+    print(f"symbol: {results[0].symbol}")
+    print(f"strategy: {results[0].strategy_key}")
+    print(f"period: {results[0].start} -> {results[0].end}")
+    print(f"{'day':>3}  {'full_xirr':>10}  {'trailing_3y':>11}  {'total_invested':>15}  {'final_value':>15}")
+    for day, r in zip(invest_days, results):
+        print(
+            f"{day:>3}  {pct(r.full_period_xirr):>10}  {pct(r.trailing_3y_xirr):>11}  "
+            f"${r.total_invested:>14,.2f}  ${r.final_value:>14,.2f}"
+        )
+
+    scored = [(r.full_period_xirr, day) for day, r in zip(invest_days, results) if r.full_period_xirr is not None]
+    if scored:
+        (worst_x, worst_d), (best_x, best_d) = min(scored), max(scored)
+        print(f"best_xirr:  day {best_d} {pct(best_x)}")
+        print(f"worst_xirr: day {worst_d} {pct(worst_x)}")
+        print(f"xirr_spread: {(best_x - worst_x) * 10000:.0f} bp")
+    values = [(r.final_value, day) for day, r in zip(invest_days, results)]
+    (lo_v, lo_d), (hi_v, hi_d) = min(values), max(values)
+    print(f"final_value_spread: ${hi_v - lo_v:,.2f} (day {hi_d} vs day {lo_d})")
+
+
+def _print_walk_forward(report: WalkForwardReport) -> None:
+    def pct(x):
+        return "N/A" if x is None else f"{x*100:.2f}%"
+
+    print("== Walk-forward (etf_dca_dip_buy tier thresholds) ==")
+    print(f"{'test window':<23}  {'tier2':>6}  {'tier3':>6}  {'tier4':>6}  {'extra x':>7}  {'train_xirr':>10}  {'test_xirr':>9}")
+    for w in report.windows:
+        scale = w.thresholds.tier2_extra / DEFAULT_TIER_THRESHOLDS.tier2_extra
+        print(
+            f"{w.test_start} -> {w.test_end}  {w.thresholds.tier2_dd*100:>5.0f}%  {w.thresholds.tier3_dd*100:>5.0f}%  "
+            f"{w.thresholds.tier4_dd*100:>5.0f}%  {scale:>7.2f}  {pct(w.train_xirr):>10}  {pct(w.test_xirr):>9}"
+        )
+    oos, base = report.oos, report.oos_baseline
+    print(f"out-of-sample: {oos.start} -> {oos.end}")
+    print(f"stitched_oos_xirr:   {pct(oos.full_period_xirr)}  (final ${oos.final_value:,.2f} / invested ${oos.total_invested:,.2f})")
+    print(f"default_thresholds:  {pct(base.full_period_xirr)}  (final ${base.final_value:,.2f} / invested ${base.total_invested:,.2f})")
+
+
 def _plot_total_return_bar(results: List[BacktestResult], out_path: str) -> None:
     try:
         import matplotlib.pyplot as plt
@@ -269,7 +474,113 @@ def _plot_trailing_3y_xirr_bar(results: List[BacktestResult], out_path: str) ->
     print(f">> Saved trailing 3Y XIRR bar: {out_path}")
 
 
+def _plot_risk_metrics_bar(results: List[BacktestResult], out_path: str) -> None:
+    try:
+        import matplotlib.pyplot as plt
+    except ModuleNotFoundError:
+        print(">> Skip plot: missing dependency matplotlib (install: pip install matplotlib)")
+        return
+
+    results = [r for r in results if r.risk is not None]
+    if not results:
+        print(">> Skip plot: no risk metrics")
+        return
+
+    parent = os.path.dirname(out_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+    def pct(x):
+        return None if x is None else float(x) * 100.0
+
+    panels = [
+        ("Max Drawdown (%)", lambda m: pct(m.max_drawdown), "{:.1f}%"),
+        ("Max Time Underwater (days)", lambda m: float(m.max_underwater_days), "{:.0f}"),
+        ("Annualized Volatility (%)", lambda m: pct(m.annualized_volatility), "{:.1f}%"),
+        ("Sharpe (rf=0)", lambda m: m.sharpe, "{:.2f}"),
+        ("Sortino (rf=0)", lambda m: m.sortino, "{:.2f}"),
+        ("Worst Calendar Year (%)", lambda m: pct(m.worst_year_return), "{:.1f}%"),
+    ]
+    labels = [f"{r.strategy_key}\n({r.symbol})" for r in results]
+
+    fig, axes = plt.subplots(nrows=2, ncols=3, figsize=(14, 8))
+    for ax, (title, getter, fmt) in zip(axes.flat, panels):
+        values = [getter(r.risk) for r in results]
+        bars = ax.bar(labels, [0.0 if v is None else v for v in values])
+        ax.set_title(title)
+        ax.grid(True, axis="y", linestyle="--", alpha=0.3)
+        ax.tick_params(axis="x", labelsize=8)
+        for b, v, r in zip(bars, values, results):
+            label = "N/A" if v is None else fmt.format(v)
+            if title.startswith("Worst") and r.risk.worst_year is not None:
+                label = f"{label}\n{r.risk.worst_year}"
+            va = "top" if b.get_height() < 0 else "bottom"
+            ax.text(b.get_x() + b.get_width() / 2.0, b.get_height(), label, ha="center", va=va, fontsize=9)
+
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=150)
+    print(f">> Saved risk metrics bar: {out_path}")
+
+
+def _tournament_datasets(variants: Sequence[Variant], period: str, load: LoadOptions) -> Dict[DataKey, Dataset]:
+    """One dataset per `Variant.data_key`, loaded like `load_history` would for that variant alone.
+
+    Each symbol is downloaded once per adjustment; every key is then aligned on its own symbols, so a
+    short-history symbol only shortens the variants that use it.
+    """
+    reqs = {key: DataRequirements(symbols=key[0], period=period, min_bars=0, needs_vix=key[1]) for key in data_keys(variants)}
+    series: Dict[bool, Dict[str, Series]] = {}
+    for adjusted in (False, True):
+        wanted = [
+            sym
+            for req in reqs.values()
+            if uses_adjusted_closes(req) == adjusted
+            for sym in req.symbols + (("^VIX",) if req.needs_vix else ())
+        ]
+        if wanted:
+            series[adjusted] = load_closes(wanted, period=period, auto_adjust=adjusted, max_age=load.max_age)
+
+    datasets: Dict[DataKey, Dataset] = {}
+    for key, req in reqs.items():
+        loaded = series[uses_adjusted_closes(req)]
+        datasets[key] = Dataset(*load_history(req, period, load, series=loaded))
+        ds = datasets[key]
+        if not ds.dates:
+            raise SystemExit(f"--tournament: {','.join(req.symbols)} have no common trading days")
+        firsts = {sym: int(loaded[sym][0][0]) for sym in req.symbols}
+        limiting = f", start set by {max(firsts, key=firsts.get)}" if len(set(firsts.values())) > 1 else ""
+        print(
+            f">> {','.join(req.symbols)}{' +VIX' if req.needs_vix else ''}: "
+            f"{ds.dates[0]} → {ds.dates[-1]} ({len(ds.dates)} bars{limiting})"
+        )
+    return datasets
+
+
+def _run_tournament(args) -> None:
+    try:
+        variants = load_variants(args.tournament)
+    except (OSError, ValueError, KeyError) as e:
+        raise SystemExit(f"--tournament: {e}") from e
+    datasets = _tournament_datasets(variants, str(args.period), _load_options(args))
+    entries = run_tournament(variants, datasets, workers=int(args.workers) or (os.cpu_count() or 1))
+    ranked = rank(entries, args.rank_by)
+    print_table(ranked, args.rank_by)
+
+    out_path = os.path.join(str(args.out_dir), "tournament.html")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(render_html(ranked, by=args.rank_by))
+    print(f">> Saved tournament report: {out_path}")
+
+
 def main() -> None:
+    try:
+        _main()
+    except HistoryUnavailable as e:
+        raise SystemExit(str(e)) from e
+
+
+def _main() -> None:
     p = argparse.ArgumentParser(description="Backtest monthly DCA strategies on Nasdaq proxy data (default QQQ).")
     p.add_argument(
         "--strategy",
@@ -288,71 +599,166 @@ def main() -> None:
     p.add_argument("--annual-pool", type=float, default=4000, help="For etf_dca_dip_buy: annual reserve pool in USD (reset each year).")
     p.add_argument("--weights", default="0.5,0.5", help="For etf_dca_dip_buy: weights, comma-separated (e.g. 0.6,0.4).")
     p.add_argument("--invest-day", type=int, default=10, help="Calendar day-of-month to invest (1..28).")
+    p.add_argument(
+        "--schedule",
+        default=None,
+        help="Invest cadence kind:day, e.g. monthly:10, weekly:0 (Mon), biweekly:2, nth:1, nth:-1 "
+        "(default: monthly on --invest-day).",
+    )
+    p.add_argument(
+        "--invest-day-sweep",
+        action="store_true",
+        help="Evaluate every monthly invest day 1..28 in one pass and print XIRR/final value per day plus the spread.",
+    )
+    p.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Path of an engine state file: resume from it and append only new bars (created from --period if missing).",
+    )
+    p.add_argument(
+        "--refresh-period",
+        default="1mo",
+        help="With --checkpoint: how much recent data to download when resuming (must overlap the last bar).",
+    )
+    p.add_argument(
+        "--csv",
+        default=None,
+        help="Stream bars from a CSV (columns: date, one close column per symbol, optional VIX) "
+        "in chunks instead of downloading; memory stays constant regardless of length.",
+    )
+    p.add_argument("--csv-date-column", default="date", help="With --csv: date/timestamp column name.")
+    p.add_argument("--csv-vix-column", default="vix", help="With --csv: VIX column name (etf_dca_dip_buy).")
+    p.add_argument("--chunk-size", type=int, default=100_000, help="With --csv: rows per chunk.")
+    p.add_argument(
+        "--bars-per-year",
+        type=int,
+        default=252,
+        help="Bars per year for annualizing risk metrics in streamed runs (e.g. 98280 for 1-minute bars).",
+    )
+    p.add_argument(
+        "--walk-forward",
+        action="store_true",
+        help="etf_dca_dip_buy: search tier thresholds on rolling train windows and report stitched out-of-sample XIRR.",
+    )
+    p.add_argument("--wf-train-years", type=float, default=5, help="With --walk-forward: train window length in years.")
+    p.add_argument("--wf-test-years", type=float, default=1, help="With --walk-forward: test window length (and step) in years.")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="With --walk-forward/--tournament: worker processes (0 = one per CPU).",
+    )
+    p.add_argument(
+        "--tournament",
+        default=None,
+        help="JSON list of variants {name, strategy, params, schedule} to backtest on one shared dataset; "
+        "prints a ranked table and writes <out-dir>/tournament.html (sortable table + charts).",
+    )
+    p.add_argument(
+        "--rank-by",
+        default="full_period_xirr",
+        choices=list(RANK_METRICS),
+        help="With --tournament: ranking metric.",
+    )
+    p.add_argument(
+        "--signal-store",
+        nargs="?",
+        const="",
+        default=None,
+        help="Read signals from the precomputed signal store (optional path; default .cache/signals.sqlite) "
+        "instead of recomputing them; falls back to computing when the store does not cover every date.",
+    )
     p.add_argument("--period", default="20y", help="Data period (e.g. 20y).")
+    p.add_argument(
+        "--ffill-limit",
+        type=int,
+        default=0,
+        help="Forward-fill a symbol's close over at most this many missing bars when aligning several symbols "
+        "(0 = keep only days every symbol traded, -1 = no limit).",
+    )
+    p.add_argument(
+        "--vix-ffill-limit",
+        type=int,
+        default=0,
+        help="Forward-fill VIX over at most this many missing bars (0 = exact days only, -1 = no limit).",
+    )
+    p.add_argument(
+        "--history-max-age",
+        type=float,
+        default=HISTORY_MAX_AGE_SECONDS / 3600.0,
+        help="Reuse downloaded histories from .cache/history younger than this many hours (0 = always download).",
+    )
     p.add_argument("--out-dir", default="backtest", help="Output directory for comparison charts (all-mode).")
     args = p.parse_args()
 
-    if args.strategy in ("ma250_drawdown", "all"):
-        dates, closes = _download_one(args.symbol, period=args.period)
-        ratios = _ratio_series_ma250_drawdown(dates, closes)
-        result_ma = backtest_monthly_dca_with_ratios(
-            symbol=args.symbol,
-            strategy_key=args.strategy,
-            dates=dates,
-            closes=closes,
-            ratio_for_index=lambda i: ratios[i],
-            base_amount=args.base_amount,
-            invest_day=args.invest_day,
-            trailing_years=3,
-        )
-        result_ma = replace(result_ma, strategy_key="ma250_drawdown")
-        if args.strategy == "ma250_drawdown":
-            _print_result(result_ma)
-            return
-
-    if args.strategy in ("etf_dca_dip_buy", "all"):
-        sym_list = [s.strip() for s in str(args.symbols).split(",") if s.strip()]
-        if len(sym_list) != 2:
-            raise SystemExit("--symbols must contain exactly 2 symbols, e.g. SPY,QQQ")
-        w_list = [s.strip() for s in str(args.weights).split(",") if s.strip()]
-        if len(w_list) != 2:
-            raise SystemExit("--weights must contain exactly 2 numbers, e.g. 0.5,0.5")
-        w0, w1 = float(w_list[0]), float(w_list[1])
-        if w0 < 0 or w1 < 0 or abs((w0 + w1) - 1.0) > 1e-6:
-            raise SystemExit("--weights must be non-negative and sum to 1.0")
-
-        dts, ca, cb, dda, ddb, vix = _align_two_assets_and_vix(sym_list[0], sym_list[1], "^VIX", period=args.period)
-        result_dip = backtest_two_asset_dca_with_pool(
-            symbols=(sym_list[0], sym_list[1]),
-            strategy_key=args.strategy,
-            dates=dts,
-            closes_a=ca,
-            closes_b=cb,
-            drawdown_a=dda,
-            drawdown_b=ddb,
-            vix=vix,
-            monthly_total_usd=float(args.monthly_total),
-            weights=(w0, w1),
-            invest_day=args.invest_day,
-            annual_reserve_pool_usd=float(args.annual_pool),
-            trailing_years=3,
+    try:
+        schedule = Schedule.parse(args.schedule) if args.schedule else Schedule.monthly(args.invest_day)
+    except ValueError as e:
+        raise SystemExit(f"--schedule/--invest-day: {e}") from e
+
+    if args.checkpoint or args.csv:
+        if args.strategy == "all" or args.invest_day_sweep:
+            raise SystemExit("--checkpoint/--csv work with a single strategy and without --invest-day-sweep")
+        _run_incremental(args, schedule)
+        return
+
+    if args.tournament:
+        _run_tournament(args)
+        return
+
+    if args.walk_forward:
+        if args.strategy != "etf_dca_dip_buy":
+            raise SystemExit("--walk-forward tunes the etf_dca_dip_buy tiers; use --strategy etf_dca_dip_buy")
+        params = _params_from_args(args, args.strategy)
+        strategy = get_strategy(args.strategy)
+        dates, closes, vix = load_history(strategy.requirements(params), period=str(args.period), load=_load_options(args))
+        # indicators once over the full history; windows only slice them
+        signals = compute_signals(strategy, params, closes, vix)
+        try:
+            report = walk_forward(
+                dates=dates,
+                closes=closes,
+                worst_dd=signals["worst_dd"],
+                vix=signals["vix"],
+                terms=strategy.terms(params),
+                schedule=schedule,
+                train_years=float(args.wf_train_years),
+                test_years=float(args.wf_test_years),
+                workers=int(args.workers) or (os.cpu_count() or 1),
+            )
+        except ValueError as e:
+            raise SystemExit(f"--walk-forward: {e}") from e
+        _print_walk_forward(report)
+        return
+
+    if args.invest_day_sweep:
+        invest_days = list(range(1, 29))
+        schedules = [Schedule.monthly(d) for d in invest_days]
+    else:
+        schedules = [schedule]
+
+    keys = ["ma250_drawdown", "etf_dca_dip_buy"] if args.strategy == "all" else [args.strategy]
+    store = SignalStore(args.signal_store or None) if args.signal_store is not None else None
+    results = []
+    for key in keys:
+        sweep = _backtest_strategy(
+            key, _params_from_args(args, key), schedules, period=str(args.period), store=store, load=_load_options(args)
         )
-        result_dip = replace(result_dip, strategy_key="etf_dca_dip_buy")
-        if args.strategy == "etf_dca_dip_buy":
-            _print_result(result_dip)
-            return
+        if args.invest_day_sweep:
+            _print_invest_day_sweep(sweep, invest_days)
+        results.append(sweep[0])
 
+    if args.invest_day_sweep:
+        return
+
+    for r in results:
+        _print_result(r)
     if args.strategy == "all":
-        results = [result_ma, result_dip]  # type: ignore[name-defined]
-        for r in results:
-            _print_result(r)
         plot_dir = str(args.out_dir)
         _plot_yearly_xirr_line_with_table(results, out_path=os.path.join(plot_dir, "yearly_xirr_compare.png"))
         _plot_total_return_bar(results, out_path=os.path.join(plot_dir, "total_return_compare.png"))
         _plot_trailing_3y_xirr_bar(results, out_path=os.path.join(plot_dir, "trailing_3y_xirr_compare.png"))
-        return
-
-    raise SystemExit(f"Unsupported strategy: {args.strategy}")
+        _plot_risk_metrics_bar(results, out_path=os.path.join(plot_dir, "risk_metrics_compare.png"))
 
 
 if __name__ == "__main__":
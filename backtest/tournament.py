@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields, is_dataclass
+from datetime import date
+import html
+import json
+import math
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from backtest._compat import require_numpy
+from backtest.align import ordinal_dates
+from backtest.arena import MarketArena, current_arena, init_worker
+from backtest.engine import BacktestResult, sweep_plan
+from backtest.trading_calendar import Schedule, TradingCalendar
+
+from strategy import get_strategy
+from strategy.base import compute_signals, unknown_keys
+
+# metric -> (label, higher is better); the first one is the default ranking
+RANK_METRICS: Dict[str, Tuple[str, bool]] = {
+    "full_period_xirr": ("Full XIRR", True),
+    "trailing_3y_xirr": ("3y XIRR", True),
+    "total_return": ("Total return", True),
+    "sharpe": ("Sharpe", True),
+    "sortino": ("Sortino", True),
+    "max_drawdown": ("Max drawdown", True),  # negative numbers: closer to 0 is better
+    "worst_year_return": ("Worst year", True),
+    "annualized_volatility": ("Volatility", False),
+}
+
+
+# (symbols, needs_vix)
+DataKey = Tuple[Tuple[str, ...], bool]
+
+
+@dataclass(frozen=True)
+class Variant:
+    name: str
+    strategy_key: str
+    params: Any  # the strategy's params dataclass
+    schedule: Schedule
+    symbols: Tuple[str, ...]
+    needs_vix: bool
+
+    @property
+    def data_key(self) -> DataKey:
+        """Variants with the same key run on the same aligned data."""
+        return self.symbols, self.needs_vix
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Aligned data of one `Variant.data_key`: ``closes`` holds one column per symbol of the key."""
+
+    dates: List[date]
+    closes: List[List[float]]
+    vix: List[float | None] | None = None
+
+
+@dataclass(frozen=True)
+class Entry:
+    variant: Variant
+    result: BacktestResult
+
+
+def load_variants(path: str) -> List[Variant]:
+    """Variants from a JSON list of ``{"name", "strategy", "params", "schedule"}``.
+
+    ``params`` defaults to the strategy defaults field by field (nested dataclass fields such as
+    ``thresholds`` too) and rejects keys the params do not have; ``schedule`` (``kind:day``)
+    defaults to monthly on ``params.invest_day`` (or the 10th).
+    """
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path}: expected a non-empty JSON list of variants")
+
+    variants: List[Variant] = []
+    seen = set()
+    for i, entry in enumerate(entries):
+        strategy = get_strategy(entry.get("strategy", ""))
+        raw_params = entry.get("params") or {}
+        params = strategy.params_from_dict(raw_params)
+        unknown = unknown_keys(params, raw_params)
+        if unknown:
+            names = ", ".join(f.name for f in fields(params))
+            raise ValueError(f"{path}: variant {i + 1}: unknown {strategy.key} parameter(s) {', '.join(unknown)}. Available: {names}")
+        spec = entry.get("schedule")
+        schedule = Schedule.parse(spec) if spec else Schedule.monthly(getattr(params, "invest_day", 10))
+        name = str(entry.get("name") or f"{strategy.key}#{i + 1}")
+        if name in seen:
+            raise ValueError(f"{path}: duplicate variant name {name!r}")
+        seen.add(name)
+        req = strategy.requirements(params)
+        variants.append(Variant(name, strategy.key, params, schedule, tuple(req.symbols), req.needs_vix))
+    return variants
+
+
+def data_keys(variants: Sequence[Variant]) -> List[DataKey]:
+    """Distinct data keys of the variants, first-seen order."""
+    return list(dict.fromkeys(v.data_key for v in variants))
+
+
+def _run_variant(
+    variant: Variant,
+    dates: Sequence[date],
+    closes: Sequence[Sequence[float]],
+    vix: Sequence[float | None] | None,
+    calendar: TradingCalendar | None = None,
+) -> BacktestResult:
+    strategy = get_strategy(variant.strategy_key)
+    terms = strategy.terms(variant.params)
+    signals = compute_signals(strategy, variant.params, closes, vix if variant.needs_vix else None)
+    return sweep_plan(
+        symbol=",".join(variant.symbols),
+        strategy_key=variant.strategy_key,
+        dates=dates,
+        closes=closes,
+        base_ratio=signals["base_ratio"],
+        extra_ratio=signals["extra_ratio"],
+        pool_fraction=signals["pool_fraction"],
+        monthly_amount=terms.monthly_amount,
+        weights=terms.weights,
+        schedules=[variant.schedule],
+        annual_reserve_pool=terms.annual_reserve_pool,
+        calendar=calendar,
+    )[0]
+
+
+def _variant_task(task) -> BacktestResult:
+    variant, group = task
+    np = require_numpy()
+    arena = current_arena()
+    # the arena holds every dataset on the union of their calendars; this one's days are where its closes are set
+    first = arena.column(f"g{group}_close_0")
+    days = ~np.isnan(first)
+    dates = ordinal_dates(arena.ordinals[days])
+    closes = [arena.column(f"g{group}_close_{k}")[days].tolist() for k in range(len(variant.symbols))]
+    vix = None
+    if variant.needs_vix and f"g{group}_vix" in arena:
+        vix = [None if x != x else x for x in arena.column(f"g{group}_vix")[days].tolist()]
+    return _run_variant(variant, dates, closes, vix)
+
+
+def _datasets_arena(keys: Sequence[DataKey], datasets: Mapping[DataKey, Dataset]) -> MarketArena:
+    """One arena for every dataset: columns ``g{j}_close_{k}`` / ``g{j}_vix`` on the union calendar, NaN off dataset j's days."""
+    np = require_numpy()
+    ordinals = [np.array([d.toordinal() for d in datasets[key].dates], dtype=np.int64) for key in keys]
+    calendar = np.unique(np.concatenate(ordinals))
+    columns: Dict[str, Any] = {}
+    for j, key in enumerate(keys):
+        ds = datasets[key]
+        pos = np.searchsorted(calendar, ordinals[j])
+        for k, col in enumerate(ds.closes):
+            columns[f"g{j}_close_{k}"] = np.full(len(calendar), np.nan)
+            columns[f"g{j}_close_{k}"][pos] = col
+        if ds.vix is not None:
+            columns[f"g{j}_vix"] = np.full(len(calendar), np.nan)
+            columns[f"g{j}_vix"][pos] = [np.nan if x is None else x for x in ds.vix]
+    return MarketArena.create([date.fromordinal(o) for o in calendar.tolist()], columns)
+
+
+def run_tournament(
+    variants: Sequence[Variant],
+    datasets: Mapping[DataKey, Dataset],
+    *,
+    workers: int = 1,
+) -> List[Entry]:
+    """Backtest every variant on the dataset of its `Variant.data_key`.
+
+    With ``workers > 1`` variants run in a process pool reading the data from a `MarketArena`.
+    """
+    keys = data_keys(variants)
+    missing = [",".join(key[0]) for key in keys if key not in datasets]
+    if missing:
+        raise ValueError(f"no dataset for: {'; '.join(missing)}")
+
+    if workers > 1 and len(variants) > 1:
+        group = {key: j for j, key in enumerate(keys)}
+        with _datasets_arena(keys, datasets) as arena:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(variants)),
+                initializer=init_worker,
+                initargs=(arena.spec,),
+            ) as pool:
+                results = list(pool.map(_variant_task, [(v, group[v.data_key]) for v in variants]))
+    else:
+        calendars = {key: TradingCalendar(datasets[key].dates) for key in keys}
+        results = []
+        for v in variants:
+            ds = datasets[v.data_key]
+            results.append(_run_variant(v, ds.dates, ds.closes, ds.vix, calendars[v.data_key]))
+    return [Entry(v, r) for v, r in zip(variants, results)]
+
+
+def metric(result: BacktestResult, key: str) -> float | None:
+    if key == "total_return":
+        return result.final_value / result.total_invested - 1 if result.total_invested > 0 else None
+    if hasattr(result, key):
+        value = getattr(result, key)
+    else:
+        value = getattr(result.risk, key, None) if result.risk is not None else None
+    return value if value is not None and math.isfinite(value) else None
+
+
+def rank(entries: Sequence[Entry], by: str = "full_period_xirr") -> List[Entry]:
+    if by not in RANK_METRICS:
+        raise ValueError(f"Unknown metric: {by}. Available: {', '.join(RANK_METRICS)}")
+    higher_better = RANK_METRICS[by][1]
+
+    def key(e: Entry):
+        x = metric(e.result, by)
+        return (x is None, -x if (x is not None and higher_better) else (x or 0.0))
+
+    return sorted(entries, key=key)
+
+
+def print_table(entries: Sequence[Entry], by: str) -> None:
+    def pct(x):
+        return "N/A" if x is None else f"{x*100:.2f}%"
+
+    def num(x):
+        return "N/A" if x is None else f"{x:.2f}"
+
+    width = max(4, *(len(e.variant.name) for e in entries))
+    print(f"== Tournament ({len(entries)} variants, ranked by {RANK_METRICS[by][0]}) ==")
+    print(
+        f"{'#':>3}  {'name':<{width}}  {'start':<10}  {'full_xirr':>9}  {'3y_xirr':>8}  {'total_ret':>9}  "
+        f"{'max_dd':>8}  {'sharpe':>6}  {'final_value':>14}"
+    )
+    for i, e in enumerate(entries, 1):
+        r = e.result
+        print(
+            f"{i:>3}  {e.variant.name:<{width}}  {r.start.isoformat():<10}  {pct(r.full_period_xirr):>9}  {pct(r.trailing_3y_xirr):>8}  "
+            f"{pct(metric(r, 'total_return')):>9}  {pct(metric(r, 'max_drawdown')):>8}  "
+            f"{num(metric(r, 'sharpe')):>6}  ${r.final_value:>13,.2f}"
+        )
+
+
+def _params_text(params: Any) -> str:
+    parts = []
+    for f in fields(params):
+        v = getattr(params, f.name)
+        if is_dataclass(v):
+            # nested settings (e.g. tier thresholds): only what differs from the field default
+            default = f.default
+            parts += [f"{f.name}.{k}={x}" for k, x in asdict(v).items() if getattr(default, k, None) != x]
+        else:
+            parts.append(f"{f.name}={','.join(str(x) for x in v) if isinstance(v, (list, tuple)) else v}")
+    return " ".join(parts)
+
+
+def _bar_chart_svg(entries: Sequence[Entry], key: str, label: str) -> str:
+    rows = [(e.variant.name, metric(e.result, key)) for e in entries]
+    values = [x for _n, x in rows if x is not None]
+    if not values:
+        return ""
+    lo, hi = min(0.0, min(values)), max(0.0, max(values))
+    span = (hi - lo) or 1.0
+    row_h, label_w, plot_w = 18, 220, 480
+    height = row_h * len(rows) + 30
+    zero_x = label_w + (0 - lo) / span * plot_w
+    out = [f'<svg width="{label_w + plot_w + 90}" height="{height}" class="chart"><text x="0" y="14" class="title">{html.escape(label)}</text>']
+    for i, (name, x) in enumerate(rows):
+        y = 24 + i * row_h
+        out.append(f'<text x="{label_w - 6}" y="{y + 12}" text-anchor="end">{html.escape(name)}</text>')
+        if x is None:
+            continue
+        x0, x1 = sorted((zero_x, label_w + (x - lo) / span * plot_w))
+        cls = "pos" if x >= 0 else "neg"
+        out.append(f'<rect x="{x0:.1f}" y="{y + 2}" width="{max(x1 - x0, 1):.1f}" height="{row_h - 5}" class="{cls}"><title>{html.escape(name)}: {x*100:.2f}%</title></rect>')
+        out.append(f'<text x="{x1 + 4:.1f}" y="{y + 12}">{x*100:.2f}%</text>')
+    out.append(f'<line x1="{zero_x:.1f}" y1="20" x2="{zero_x:.1f}" y2="{height}" class="axis"/></svg>')
+    return "".join(out)
+
+
+def _scatter_svg(entries: Sequence[Entry]) -> str:
+    """Risk/return map: max drawdown (x) vs full XIRR (y); names on hover."""
+    points = [(e.variant.name, metric(e.result, "max_drawdown"), metric(e.result, "full_period_xirr")) for e in entries]
+    points = [(n, x, y) for n, x, y in points if x is not None and y is not None]
+    if not points:
+        return ""
+    w, h, pad = 640, 360, 50
+    xs, ys = [p[1] for p in points], [p[2] for p in points]
+    x_lo, x_hi = min(xs), max(max(xs), 0.0)
+    y_lo, y_hi = min(min(ys), 0.0), max(ys)
+    sx = lambda x: pad + (x - x_lo) / ((x_hi - x_lo) or 1.0) * (w - 2 * pad)  # noqa: E731
+    sy = lambda y: h - pad - (y - y_lo) / ((y_hi - y_lo) or 1.0) * (h - 2 * pad)  # noqa: E731
+    out = [
+        f'<svg width="{w}" height="{h}" class="chart"><text x="0" y="14" class="title">Max drawdown vs full XIRR</text>',
+        f'<line x1="{pad}" y1="{h - pad}" x2="{w - pad}" y2="{h - pad}" class="axis"/>',
+        f'<line x1="{pad}" y1="{pad}" x2="{pad}" y2="{h - pad}" class="axis"/>',
+        f'<text x="{pad}" y="{h - pad + 16}">{x_lo*100:.1f}%</text><text x="{w - pad}" y="{h - pad + 16}" text-anchor="end">{x_hi*100:.1f}%</text>',
+        f'<text x="{pad - 4}" y="{h - pad}" text-anchor="end">{y_lo*100:.1f}%</text><text x="{pad - 4}" y="{pad + 4}" text-anchor="end">{y_hi*100:.1f}%</text>',
+    ]
+    for name, x, y in points:
+        out.append(
+            f'<circle cx="{sx(x):.1f}" cy="{sy(y):.1f}" r="5" class="pos">'
+            f"<title>{html.escape(name)}: max_dd {x*100:.2f}%, xirr {y*100:.2f}%</title></circle>"
+        )
+    out.append("</svg>")
+    return "".join(out)
+
+
+_STYLE = """
+body{font-family:-apple-system,Segoe UI,Helvetica,Arial,sans-serif;margin:24px;color:#222}
+table{border-collapse:collapse;font-size:13px}th,td{padding:4px 8px;border-bottom:1px solid #ddd;text-align:right;white-space:nowrap}
+th{cursor:pointer;background:#f4f4f4;position:sticky;top:0}th.sorted-asc:after{content:" \\25B2"}th.sorted-desc:after{content:" \\25BC"}
+td.text,th.text{text-align:left}td.params{white-space:normal;max-width:360px;color:#666;font-size:12px}
+.chart{display:block;margin:24px 0;font-size:12px}.chart .title{font-weight:bold}.pos{fill:#4c78a8}.neg{fill:#e45756}.axis{stroke:#999}
+.heat td{font-size:12px}
+"""
+
+_SCRIPT = """
+document.querySelectorAll("table.sortable").forEach(function(table){
+  table.querySelectorAll("th").forEach(function(th, col){
+    th.addEventListener("click", function(){
+      var asc = !th.classList.contains("sorted-asc");
+      table.querySelectorAll("th").forEach(function(h){h.classList.remove("sorted-asc","sorted-desc")});
+      th.classList.add(asc ? "sorted-asc" : "sorted-desc");
+      var body = table.tBodies[0];
+      var rows = Array.prototype.slice.call(body.rows);
+      rows.sort(function(a, b){
+        var x = a.cells[col].dataset.v, y = b.cells[col].dataset.v;
+        var nx = parseFloat(x), ny = parseFloat(y);
+        var r = (isNaN(nx) || isNaN(ny)) ? String(x).localeCompare(String(y)) : nx - ny;
+        if (x === "" && y !== "") return 1;
+        if (y === "" && x !== "") return -1;
+        return asc ? r : -r;
+      });
+      rows.forEach(function(r){body.appendChild(r)});
+    });
+  });
+});
+"""
+
+
+def render_html(entries: Sequence[Entry], *, by: str, title: str = "Strategy tournament") -> str:
+    """Self-contained HTML report: sortable ranking table, bar/scatter charts, yearly XIRR heatmap."""
+
+    def cell(value, text=None, cls=""):
+        v = "" if value is None else value
+        shown = text if text is not None else ("N/A" if value is None else value)
+        return f'<td class="{cls}" data-v="{html.escape(str(v))}">{html.escape(str(shown))}</td>'
+
+    def pct_cell(x):
+        return cell(x, "N/A" if x is None else f"{x*100:.2f}%")
+
+    def num_cell(x, fmt="{:.2f}"):
+        return cell(x, "N/A" if x is None else fmt.format(x))
+
+    headers = [
+        ("#", ""), ("Name", "text"), ("Strategy", "text"), ("Symbols", "text"), ("Period", "text"), ("Schedule", "text"),
+        ("Full XIRR", ""), ("3y XIRR", ""), ("Total return", ""), ("Invested", ""), ("Final value", ""),
+        ("Max DD", ""), ("Underwater days", ""), ("Volatility", ""), ("Sharpe", ""), ("Sortino", ""),
+        ("Worst year", ""), ("Params", "text"),
+    ]
+    rows = []
+    for i, e in enumerate(entries, 1):
+        r, v = e.result, e.variant
+        risk = r.risk
+        worst = f"{risk.worst_year} {risk.worst_year_return*100:.2f}%" if risk and risk.worst_year is not None else None
+        rows.append(
+            "<tr>"
+            + cell(i)
+            + cell(v.name, cls="text")
+            + cell(v.strategy_key, cls="text")
+            + cell(",".join(v.symbols), cls="text")
+            + cell(r.start.isoformat(), f"{r.start} → {r.end}", cls="text")
+            + cell(v.schedule.kind + ":" + str(v.schedule.day), v.schedule.describe(), cls="text")
+            + pct_cell(metric(r, "full_period_xirr"))
+            + pct_cell(metric(r, "trailing_3y_xirr"))
+            + pct_cell(metric(r, "total_return"))
+            + num_cell(r.total_invested, "{:,.0f}")
+            + num_cell(r.final_value, "{:,.0f}")
+            + pct_cell(metric(r, "max_drawdown"))
+            + num_cell(risk.max_underwater_days if risk else None, "{:d}")
+            + pct_cell(metric(r, "annualized_volatility"))
+            + num_cell(metric(r, "sharpe"))
+            + num_cell(metric(r, "sortino"))
+            + cell(risk.worst_year_return if risk else None, worst or "N/A")
+            + cell(_params_text(v.params), cls="text params")
+            + "</tr>"
+        )
+
+    years = sorted({y for e in entries for y in e.result.yearly_xirr})
+    heat_rows = []
+    for e in entries:
+        tds = []
+        for y in years:
+            x = e.result.yearly_xirr.get(y)
+            if x is None or not math.isfinite(x):
+                tds.append('<td data-v="">-</td>')
+                continue
+            alpha = min(abs(x) / 0.4, 1.0) * 0.8
+            color = f"rgba(76,120,168,{alpha:.2f})" if x >= 0 else f"rgba(228,87,86,{alpha:.2f})"
+            tds.append(f'<td data-v="{x}" style="background:{color}">{x*100:.1f}%</td>')
+        heat_rows.append(f'<tr><td class="text" data-v="{html.escape(e.variant.name)}">{html.escape(e.variant.name)}</td>{"".join(tds)}</tr>')
+
+    periods = sorted({(e.result.start, e.result.end) for e in entries})
+    if len(periods) == 1:
+        period = f"{periods[0][0]} → {periods[0][1]}"
+    else:
+        period = f"{len(periods)} data periods (variants start when their own symbols all have data)"
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title><style>{_STYLE}</style></head><body>"
+        f"<h1>{html.escape(title)}</h1>"
+        f"<p>{len(entries)} variants · {html.escape(period)} · ranked by {html.escape(RANK_METRICS[by][0])} · click a column to sort</p>"
+        "<table class='sortable'><thead><tr>"
+        + "".join(f"<th class='{cls}'>{html.escape(h)}</th>" for h, cls in headers)
+        + "</tr></thead><tbody>"
+        + "".join(rows)
+        + "</tbody></table>"
+        + _bar_chart_svg(entries, "full_period_xirr", "Full-period XIRR")
+        + _bar_chart_svg(entries, "max_drawdown", "Max drawdown (time-weighted)")
+        + _scatter_svg(entries)
+        + "<h2>Yearly XIRR</h2><table class='sortable heat'><thead><tr><th class='text'>Name</th>"
+        + "".join(f"<th>{y}</th>" for y in years)
+        + "</tr></thead><tbody>"
+        + "".join(heat_rows)
+        + "</tbody></table>"
+        + f"<script>{_SCRIPT}</script></body></html>"
+    )
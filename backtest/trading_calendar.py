@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, List, Tuple
+
+SCHEDULE_KINDS = ("monthly", "weekly", "biweekly", "nth")
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Invest cadence.
+
+    - monthly:  first trading day on or after the ``day``-th of each month (day 1..28)
+    - weekly:   first trading day on or after weekday ``day`` of each week (0=Mon .. 4=Fri)
+    - biweekly: same as weekly, every other week (week parity is absolute, so live and backtest agree)
+    - nth:      the Nth trading day of each month (1-based; negative counts from month end, -1 = last)
+
+    The target rolls forward, into the next month/week if need be (e.g. ``monthly:28`` in a
+    February that ends on Friday the 27th invests on Monday, March 2). Deciding a day never needs
+    later bars, so a live run on the latest bar agrees with the backtest. The exception is negative
+    ``nth``, which needs the month to be complete and is therefore backtest-only.
+    """
+
+    kind: str = "monthly"
+    day: int = 10
+
+    def __post_init__(self) -> None:
+        if self.kind not in SCHEDULE_KINDS:
+            raise ValueError(f"Unknown schedule kind: {self.kind}. Available: {', '.join(SCHEDULE_KINDS)}")
+        day = int(self.day)
+        if self.kind == "monthly" and not 1 <= day <= 28:
+            raise ValueError("invest_day should be 1..28 for predictable monthly scheduling")
+        if self.kind in ("weekly", "biweekly") and not 0 <= day <= 4:
+            raise ValueError("weekday should be 0..4 (Mon..Fri)")
+        if self.kind == "nth" and (day == 0 or abs(day) > 20):
+            raise ValueError("nth trading day should be 1..20 or -1..-20")
+
+    @classmethod
+    def monthly(cls, invest_day: int = 10) -> "Schedule":
+        return cls("monthly", int(invest_day))
+
+    @classmethod
+    def parse(cls, spec: str) -> "Schedule":
+        """Parse ``kind:day``, e.g. ``monthly:10``, ``weekly:0``, ``biweekly:2``, ``nth:-1``."""
+        kind, sep, day = (spec or "").strip().partition(":")
+        if not sep:
+            raise ValueError(f"Invalid schedule: {spec!r} (expected kind:day, e.g. monthly:10)")
+        return cls(kind.strip().lower(), int(day))
+
+    def describe(self) -> str:
+        if self.kind == "monthly":
+            return f"每月{self.day}号(非交易日顺延)"
+        weekday = "一二三四五"[self.day] if self.kind != "nth" else ""
+        if self.kind == "weekly":
+            return f"每周{weekday}(非交易日顺延)"
+        if self.kind == "biweekly":
+            return f"隔周{weekday}(非交易日顺延)"
+        if self.day > 0:
+            return f"每月第{self.day}个交易日"
+        return f"每月倒数第{-self.day}个交易日"
+
+
+def _week_no(ordinal: int) -> int:
+    # date(1, 1, 1) is a Monday with ordinal 1
+    return (ordinal - 1) // 7
+
+
+class TradingCalendar:
+    """Sorted trading-day index with precomputed month/week boundaries.
+
+    Lookups use bisect on day ordinals (O(log n)); a schedule is generated with one bisect per
+    period instead of scanning every day.
+    """
+
+    def __init__(self, dates: Iterable[date]) -> None:
+        self.dates: List[date] = sorted(set(dates))
+        self.ordinals: List[int] = [d.toordinal() for d in self.dates]
+        self._month_starts: List[int] = []
+        self._week_starts: List[int] = []
+        prev_month = prev_week = None
+        for i, d in enumerate(self.dates):
+            month = (d.year, d.month)
+            week = _week_no(self.ordinals[i])
+            if month != prev_month:
+                self._month_starts.append(i)
+                prev_month = month
+            if week != prev_week:
+                self._week_starts.append(i)
+                prev_week = week
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, d: object) -> bool:
+        if not isinstance(d, date):
+            return False
+        i = bisect_left(self.ordinals, d.toordinal())
+        return i < len(self.ordinals) and self.ordinals[i] == d.toordinal()
+
+    def index_of(self, d: date) -> int:
+        i = bisect_left(self.ordinals, d.toordinal())
+        if i == len(self.ordinals) or self.ordinals[i] != d.toordinal():
+            raise KeyError(f"{d} is not a trading day in this calendar")
+        return i
+
+    def next_on_or_after(self, d: date) -> int | None:
+        i = bisect_left(self.ordinals, d.toordinal())
+        return i if i < len(self.ordinals) else None
+
+    def last_on_or_before(self, d: date) -> int | None:
+        i = bisect_right(self.ordinals, d.toordinal()) - 1
+        return i if i >= 0 else None
+
+    def _starts_for(self, schedule: Schedule) -> List[int]:
+        return self._month_starts if schedule.kind in ("monthly", "nth") else self._week_starts
+
+    def _pick(self, schedule: Schedule, s: int, e: int) -> int | None:
+        """Invest index of period ``[s, e)`` (may lie in a later period), or None if not known (yet)."""
+        n = len(self.dates)
+        if schedule.kind == "nth":
+            if schedule.day > 0:
+                i = s + schedule.day - 1
+                return i if i < n else None
+            # counting from month end needs the month to be complete
+            return max(s, e + schedule.day) if e < n else None
+
+        first = self.dates[s]
+        if schedule.kind == "monthly":
+            target = date(first.year, first.month, schedule.day).toordinal()
+        else:
+            week = _week_no(self.ordinals[s])
+            if schedule.kind == "biweekly" and week % 2:
+                return None
+            target = week * 7 + 1 + schedule.day
+        i = bisect_left(self.ordinals, target, s)
+        return i if i < n else None
+
+    def _period_pick(self, schedule: Schedule, starts: List[int], k: int) -> int | None:
+        e = starts[k + 1] if k + 1 < len(starts) else len(self.dates)
+        return self._pick(schedule, starts[k], e)
+
+    def schedule_indices(self, schedule: Schedule) -> List[int]:
+        starts = self._starts_for(schedule)
+        result: List[int] = []
+        for k in range(len(starts)):
+            i = self._period_pick(schedule, starts, k)
+            # picks never decrease; one that rolled into the next period may coincide with its own
+            if i is not None and (not result or i != result[-1]):
+                result.append(i)
+        return result
+
+    def schedule_dates(self, schedule: Schedule) -> List[date]:
+        return [self.dates[i] for i in self.schedule_indices(schedule)]
+
+    def is_scheduled(self, d: date, schedule: Schedule) -> bool:
+        """Whether trading day ``d`` is an invest day of its own or a rolled-over earlier period."""
+        if d not in self:
+            return False
+        i = self.index_of(d)
+        starts = self._starts_for(schedule)
+        for k in range(bisect_right(starts, i) - 1, -1, -1):
+            p = self._period_pick(schedule, starts, k)
+            if p == i:
+                return True
+            if p is not None and p < i:
+                return False  # earlier periods pick earlier days
+        return False
+
+
+class OnlineScheduler:
+    """Bar-by-bar version of `TradingCalendar.schedule_indices` for appended/streamed data.
+
+    `is_invest(d)` is called once per bar in order (several intraday bars may share a date; only
+    the first bar of the invest day returns True). The roll-forward rule needs no later bars, so
+    this gives exactly the same invest days as the batch calendar. Negative ``nth`` schedules need
+    the month to be complete and are not supported.
+    """
+
+    def __init__(self, schedule: Schedule) -> None:
+        if schedule.kind == "nth" and schedule.day < 0:
+            raise ValueError("nth schedules counted from month end are not supported for incremental runs")
+        self.schedule = schedule
+        self.period: Tuple[int, int] | None = None
+        self.count = 0
+        self.picked = False
+        self.owed: List[int] = []  # bars until each rolled-over pick of an earlier period is due
+        self.last_day: date | None = None
+
+    def _period_of(self, d: date) -> Tuple[int, int]:
+        if self.schedule.kind in ("monthly", "nth"):
+            return (d.year, d.month)
+        return (_week_no(d.toordinal()), 0)
+
+    def _skips(self, period: Tuple[int, int]) -> bool:
+        return self.schedule.kind == "biweekly" and bool(period[0] % 2)
+
+    def is_invest(self, d: date) -> bool:
+        if d == self.last_day:
+            return False
+        self.last_day = d
+        kind, day = self.schedule.kind, self.schedule.day
+        period = self._period_of(d)
+        if period != self.period:
+            if self.period is not None and not self.picked and not self._skips(self.period):
+                # the target has not come in its own period: roll forward (a date target has passed
+                # by now; the Nth bar is that many bars after the period start)
+                self.owed.append(day - self.count if kind == "nth" else 1)
+            self.period, self.count, self.picked = period, 0, False
+        self.count += 1
+
+        self.owed = [r - 1 for r in self.owed]
+        hit = 0 in self.owed
+        self.owed = [r for r in self.owed if r > 0]
+        if not self.picked and not self._skips(period):
+            if kind == "monthly":
+                own = d.day >= day
+            elif kind == "nth":
+                own = self.count == day
+            else:
+                own = d.weekday() >= day
+            if own:
+                self.picked = hit = True
+        return hit
+
+    def to_dict(self) -> dict:
+        return {
+            "schedule": [self.schedule.kind, self.schedule.day],
+            "period": list(self.period) if self.period else None,
+            "count": self.count,
+            "picked": self.picked,
+            "owed": list(self.owed),
+            "last_day": self.last_day.isoformat() if self.last_day else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OnlineScheduler":
+        sched = cls(Schedule(data["schedule"][0], int(data["schedule"][1])))
+        sched.period = tuple(data["period"]) if data["period"] else None
+        sched.count = int(data["count"])
+        sched.picked = bool(data["picked"])
+        sched.owed = [int(r) for r in data["owed"]]
+        sched.last_day = date.fromisoformat(data["last_day"]) if data.get("last_day") else None
+        return sched
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date
+import itertools
+import math
+from typing import List, Sequence, Tuple
+
+from backtest.arena import MarketArena, current_arena, init_worker
+from backtest.engine import TRADING_DAYS_PER_YEAR, BacktestResult, sweep_plan
+from backtest.trading_calendar import Schedule, TradingCalendar
+
+from strategy.base import DcaTerms
+from strategy.etf_dca_dip_buy import DEFAULT_TIER_THRESHOLDS, TierThresholds, plan_columns
+
+
+@dataclass(frozen=True)
+class WalkForwardWindow:
+    train_start: date
+    train_end: date
+    test_start: date
+    test_end: date
+    thresholds: TierThresholds  # best on the train window
+    train_xirr: float | None
+    test_xirr: float | None  # chosen thresholds on the test window alone (fresh portfolio)
+
+
+@dataclass(frozen=True)
+class WalkForwardReport:
+    windows: List[WalkForwardWindow]
+    oos: BacktestResult  # one portfolio over all test windows, each using its own chosen thresholds
+    oos_baseline: BacktestResult  # same span with the live (default) thresholds
+
+
+def threshold_grid() -> List[TierThresholds]:
+    """Search space: tier 2/3/4 drawdown bounds x a scale on the tier 1-3 extra buys (defaults first).
+
+    The tier 1 band's floor moves with the tier 2 bound (as in the defaults, 0.01 above it), so a
+    drawdown that is tier 2 at a low VIX never drops to tier 1 at a higher one.
+    """
+    d = DEFAULT_TIER_THRESHOLDS
+    grid = [d]
+    for dd2, dd3, dd4, scale in itertools.product(
+        (-0.12, -0.15, -0.18),
+        (-0.20, -0.25, -0.30),
+        (-0.30, -0.35, -0.40),
+        (0.5, 1.0, 1.5),
+    ):
+        th = replace(
+            d,
+            tier1_dd_floor=round(dd2 + (d.tier1_dd_floor - d.tier2_dd), 4),
+            tier2_dd=dd2,
+            tier3_dd=dd3,
+            tier4_dd=dd4,
+            tier1_extra=d.tier1_extra * scale,
+            tier2_extra=d.tier2_extra * scale,
+            tier3_extra=d.tier3_extra * scale,
+        )
+        if th.is_ordered() and th != d:
+            grid.append(th)
+    assert all(th.is_ordered() for th in grid)
+    return grid
+
+
+def window_bounds(n: int, train_bars: int, test_bars: int) -> List[Tuple[int, int, int]]:
+    """Rolling ``(train_start, test_start, test_end)`` bar indices; windows advance by ``test_bars``."""
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("train and test windows must be positive")
+    out = []
+    s = 0
+    while s + train_bars < n:
+        out.append((s, s + train_bars, min(s + train_bars + test_bars, n)))
+        s += test_bars
+    return out
+
+
+def _run(
+    dates: Sequence[date],
+    closes: Sequence[Sequence[float]],
+    extra_ratio: Sequence[float],
+    pool_fraction: Sequence[float],
+    terms: DcaTerms,
+    schedule: Schedule,
+    calendar: TradingCalendar | None = None,
+) -> BacktestResult:
+    return sweep_plan(
+        symbol="",
+        strategy_key="etf_dca_dip_buy",
+        dates=dates,
+        closes=closes,
+        base_ratio=[1.0] * len(dates),
+        extra_ratio=extra_ratio,
+        pool_fraction=pool_fraction,
+        monthly_amount=terms.monthly_amount,
+        weights=terms.weights,
+        schedules=[schedule],
+        annual_reserve_pool=terms.annual_reserve_pool,
+        calendar=calendar,
+    )[0]
+
+
+def _score(r: BacktestResult) -> float:
+    x = r.full_period_xirr
+    return x if x is not None and math.isfinite(x) else -math.inf
+
+
+def _evaluate_window(
+    dates: Sequence[date],
+    closes: Sequence[Sequence[float]],
+    worst_dd: Sequence[float],
+    vix: Sequence[float | None],
+    bounds: Tuple[int, int, int],
+    grid: Sequence[TierThresholds],
+    terms: DcaTerms,
+    schedule: Schedule,
+) -> WalkForwardWindow:
+    s, m, e = bounds
+    train_dates = list(dates[s:m])
+    train_closes = [list(c[s:m]) for c in closes]
+    calendar = TradingCalendar(train_dates)
+    best, best_result = None, None
+    for th in grid:
+        extra, pool = plan_columns(worst_dd[s:m], vix[s:m], th)
+        r = _run(train_dates, train_closes, extra, pool, terms, schedule, calendar)
+        if best_result is None or _score(r) > _score(best_result):
+            best, best_result = th, r
+
+    extra, pool = plan_columns(worst_dd[m:e], vix[m:e], best)
+    test = _run(list(dates[m:e]), [list(c[m:e]) for c in closes], extra, pool, terms, schedule)
+    return WalkForwardWindow(
+        train_start=dates[s],
+        train_end=dates[m - 1],
+        test_start=dates[m],
+        test_end=dates[e - 1],
+        thresholds=best,  # type: ignore[arg-type]
+        train_xirr=best_result.full_period_xirr,  # type: ignore[union-attr]
+        test_xirr=test.full_period_xirr,
+    )
+
+
+def _window_task(task) -> WalkForwardWindow:
+    bounds, grid, terms, schedule = task
+    arena = current_arena()
+    s, m, e = bounds
+    # copy just this window out of the shared views (plain lists index faster in the engine loop)
+    closes = [c[s:e].tolist() for c in arena.closes]
+    worst_dd = arena.column("worst_dd")[s:e].tolist()
+    vix = [None if x != x else x for x in arena.vix[s:e].tolist()]
+    return _evaluate_window(arena.dates[s:e], closes, worst_dd, vix, (0, m - s, e - s), grid, terms, schedule)
+
+
+def walk_forward(
+    *,
+    dates: Sequence[date],
+    closes: Sequence[Sequence[float]],
+    worst_dd: Sequence[float],
+    vix: Sequence[float | None],
+    terms: DcaTerms,
+    schedule: Schedule,
+    train_years: float = 5,
+    test_years: float = 1,
+    workers: int = 1,
+    grid: Sequence[TierThresholds] | None = None,
+) -> WalkForwardReport:
+    """Walk-forward search of the etf_dca_dip_buy tier thresholds.
+
+    ``worst_dd``/``vix`` are the strategy's indicator columns computed once over the full series;
+    windows only slice them, and each candidate's plan is derived from the slices. With
+    ``workers > 1`` windows run in a process pool that shares the data through a `MarketArena`.
+    """
+    grid = list(grid or threshold_grid())
+    n = len(dates)
+    bounds = window_bounds(n, int(train_years * TRADING_DAYS_PER_YEAR), int(test_years * TRADING_DAYS_PER_YEAR))
+    if not bounds:
+        raise ValueError(f"{n} bars are not enough for a {train_years}y train window")
+
+    if workers > 1 and len(bounds) > 1:
+        signals = {"worst_dd": worst_dd}
+        with MarketArena.from_market(dates, closes, vix, signals) as arena:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(bounds)),
+                initializer=init_worker,
+                initargs=(arena.spec,),
+            ) as pool:
+                windows = list(pool.map(_window_task, [(b, grid, terms, schedule) for b in bounds]))
+    else:
+        windows = [_evaluate_window(dates, closes, worst_dd, vix, b, grid, terms, schedule) for b in bounds]
+
+    # stitch: one portfolio across every test window, each bar planned with its window's thresholds
+    oos_start, oos_end = bounds[0][1], bounds[-1][2]
+    extra: List[float] = []
+    pool_fraction: List[float] = []
+    for (s, m, e), w in zip(bounds, windows):
+        x, p = plan_columns(worst_dd[m:e], vix[m:e], w.thresholds)
+        extra.extend(x)
+        pool_fraction.extend(p)
+    oos_dates = list(dates[oos_start:oos_end])
+    oos_closes = [list(c[oos_start:oos_end]) for c in closes]
+    calendar = TradingCalendar(oos_dates)
+    oos = _run(oos_dates, oos_closes, extra, pool_fraction, terms, schedule, calendar)
+    base_extra, base_pool = plan_columns(worst_dd[oos_start:oos_end], vix[oos_start:oos_end])
+    baseline = _run(oos_dates, oos_closes, base_extra, base_pool, terms, schedule, calendar)
+    return WalkForwardReport(windows=windows, oos=oos, oos_baseline=baseline)
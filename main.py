@@ -1,71 +1,66 @@
-import requests
 import os
-from pathlib import Path
+import time
 
-from strategy import get_strategy, list_strategies
+from strategy import get_strategy, list_strategies, run_strategy
+from strategy.data_cache import wait_for_refreshes
+from strategy.notify import load_env_file, send_push
+from strategy.signal_store import SignalStore
 
 # ================= 配置区域 =================
 # 1. 你的基础定投金额 (例如：每次计划投 10000 元)
 BASE_AMOUNT = 10000 
 
-def _load_env_file(filename: str = ".env") -> None:
-    env_path = Path(__file__).resolve().parent / filename
-    if not env_path.exists():
-        return
-
-    for raw_line in env_path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        os.environ.setdefault(key, value)
-
-
-_load_env_file()
+load_env_file()
 
 # 2. PushPlus Token (去 pushplus.plus 官网免费申请一个，填到 .env 里)
-# 如果留空，则只在电脑屏幕打印，不发送微信
-PUSHPLUS_TOKEN = os.getenv("PUSHPLUS_TOKEN", "").strip()
+# 如果留空，则只在电脑屏幕打印，不发送微信（推送由 strategy/notify.py 发送，运行时读取 PUSHPLUS_TOKEN）
 
 # 3. 选择策略
 # - ma250_drawdown: 原本的 QQQ 年线+回撤策略
 # - etf_dca_dip_buy: VOO+QQQM 每月定投 + 下跌分档加仓策略
 STRATEGY_KEY = os.getenv("STRATEGY", "ma250_drawdown").strip() or "ma250_drawdown"
-# ===========================================
 
-def send_push(title, content):
-    """发送微信推送 (使用 PushPlus)"""
-    if not PUSHPLUS_TOKEN:
-        print(">> 未配置 PushPlus Token，跳过推送")
-        return
-    
-    url = "http://www.pushplus.plus/send"
-    data = {
-        "token": PUSHPLUS_TOKEN,
-        "title": title,
-        "content": content,
-        "template": "html"
-    }
-    try:
-        r = requests.post(url, json=data)
-        print(f">> 推送结果: {r.text}")
-    except Exception as e:
-        print(f">> 推送失败: {e}")
+# 4. 超时设置（秒）
+# - RUN_DEADLINE_SECONDS: 整次运行（获取行情+推送+等待后台下载）的总时限；超时的标的改用本地缓存数据（推送里会标注“缓存数据”）
+# - FETCH_TIMEOUT_SECONDS: 单个标的的下载时限
+# - PUSH_TIMEOUT_SECONDS: 从总时限里给推送预留的时间
+# - REFRESH_GRACE_SECONDS: 从总时限里给“推送后等待超时的下载在后台完成并更新缓存”预留的时间（推送提前完成时，省下的时间也用于等待）
+#   取数最多用到 总时限 - PUSH_TIMEOUT_SECONDS - REFRESH_GRACE_SECONDS（至少 1 秒）
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "60") or 60)
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "20") or 20)
+PUSH_TIMEOUT_SECONDS = float(os.getenv("PUSH_TIMEOUT_SECONDS", "10") or 10)
+REFRESH_GRACE_SECONDS = float(os.getenv("REFRESH_GRACE_SECONDS", "15") or 15)
+
+# 5. 信号库：每次运行把最新一根信号写入 SQLite（默认 .cache/signals.sqlite，可用 SIGNAL_STORE 指定路径；设为 off 关闭）
+RECORD_SIGNALS = os.getenv("SIGNAL_STORE", "").strip().lower() != "off"
+# ===========================================
 
 def main():
+    deadline = time.monotonic() + RUN_DEADLINE_SECONDS
     try:
-        runner = get_strategy(STRATEGY_KEY)
+        strategy = get_strategy(STRATEGY_KEY)
     except KeyError as e:
         print(str(e))
         print(f"Available strategies: {', '.join(sorted(list_strategies()))}")
         return
 
-    if STRATEGY_KEY == "ma250_drawdown":
-        result = runner(base_amount=BASE_AMOUNT, symbol=os.getenv("SYMBOL", "QQQ").strip() or "QQQ")
-    else:
-        result = runner()
+    # 每个策略自己从环境变量读取参数（例如 SYMBOL），BASE_AMOUNT 未配置时用上面的默认值
+    params = strategy.params_from_env({"BASE_AMOUNT": str(BASE_AMOUNT), **os.environ})
+    store = None
+    if RECORD_SIGNALS:
+        try:
+            store = SignalStore()
+        except Exception as e:
+            print(f">> 打开信号库失败: {e}")
+    result = run_strategy(
+        strategy,
+        params,
+        fetch_timeout=FETCH_TIMEOUT_SECONDS,
+        deadline_seconds=max(1.0, RUN_DEADLINE_SECONDS - PUSH_TIMEOUT_SECONDS - REFRESH_GRACE_SECONDS),
+        store=store,
+    )
+    if store is not None:
+        store.close()
 
     title = result["title"]
     content = result["content"]
@@ -76,8 +71,14 @@ def main():
     print(content.replace("<br>", "\n").replace("<b>", "").replace("</b>", ""))
     print("="*30 + "\n")
 
-    # 2. 发送推送
-    send_push(title, content)
+    # 2. 发送推送（最多 PUSH_TIMEOUT_SECONDS，且不占用为刷新缓存预留的时间；至少 1 秒）
+    push_timeout = min(PUSH_TIMEOUT_SECONDS, deadline - REFRESH_GRACE_SECONDS - time.monotonic())
+    send_push(title, content, timeout=max(1.0, push_timeout))
+
+    # 3. 用总时限剩余的时间（至少预留的 REFRESH_GRACE_SECONDS）等待后台仍在进行的下载完成，刷新本地缓存供下次使用
+    still_running = wait_for_refreshes(deadline - time.monotonic())
+    if still_running:
+        print(f">> {still_running} 个行情下载仍未完成，已放弃（下次运行会重试）")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,333 @@
+"""Local HTTP service: current strategy signals and on-demand backtests as JSON.
+
+    python server.py --port 8765             # Yahoo Finance (same timeouts/cache fallback as main.py)
+    python server.py --offline --data-dir D  # only <D>/<symbol>.csv files, no network
+
+Backtests load their history like ``run_backtest`` does (same closes, no cache fallback), so a
+failed or short download is an error rather than a backtest over fewer bars.
+
+Endpoints (GET):
+    /health
+    /strategies                                  strategy keys and their default params
+    /signal?strategy=KEY[&<param>=...]           latest signal row + rendered push text
+    /signal?strategy=KEY&date=YYYY-MM-DD         stored signal as of that date (needs --signal-store)
+    /signals?strategy=KEY[&start=...][&end=...]  stored signal rows in a date range (needs --signal-store)
+    /backtest?strategy=KEY[&schedule=monthly:10][&schedule=...][&period=20y][&<param>=...]
+
+``<param>`` is any field of the strategy's params dataclass (tuples comma-separated), e.g.
+``/signal?strategy=ma250_drawdown&symbol=QQQ`` or ``/backtest?strategy=etf_dca_dip_buy&etfs=SPY,QQQ``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import Future
+from dataclasses import asdict, fields, is_dataclass
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from backtest.run_backtest import backtest_market, load_history, uses_adjusted_closes
+from backtest.trading_calendar import Schedule
+from strategy import get_strategy, list_strategies
+from strategy.base import DataRequirements, compute_signals, render_latest
+from strategy.providers import LiveProvider, OfflineProvider
+from strategy.signal_store import SignalStore, store_symbol
+
+RESERVED_QUERY_KEYS = ("strategy", "schedule", "period", "date", "start", "end")
+
+
+class TTLCache:
+    """Thread-safe TTL cache; concurrent misses on one key compute once while the others wait.
+
+    Failures are not cached: every waiter of the failed computation gets the exception.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256) -> None:
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}  # key -> (expires_at, value)
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            hit = self._values.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                return hit[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        self._values[key] = (now + self.ttl, value)
+        if len(self._values) > self.max_entries:
+            for k in [k for k, (expires, _v) in self._values.items() if expires <= now]:
+                del self._values[k]
+            while len(self._values) > self.max_entries:
+                del self._values[min(self._values, key=lambda k: self._values[k][0])]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _jsonable(x: Any) -> Any:
+    if is_dataclass(x) and not isinstance(x, type):
+        return _jsonable(asdict(x))
+    if isinstance(x, dict):
+        return {str(k): _jsonable(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return [_jsonable(v) for v in x]
+    if isinstance(x, date):
+        return x.isoformat()
+    if isinstance(x, float) and not math.isfinite(x):
+        return None
+    return x
+
+
+def params_from_query(strategy, query: Dict[str, List[str]]) -> Any:
+    """Strategy params from query-string values, starting from the strategy defaults."""
+    default = strategy.default_params()
+    data = asdict(default)
+    names = {f.name: f for f in fields(default)}
+    # nested settings (e.g. tier thresholds) are set one number at a time: thresholds.tier2_dd=-0.18
+    nested = {f"{name}.{k}": (name, k) for name in names for k in (data[name] if isinstance(data[name], dict) else ())}
+    unknown = sorted(set(query) - set(names) - set(nested) - set(RESERVED_QUERY_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(unknown)}. Available: {', '.join([*names, *nested])}")
+    for key, (name, k) in nested.items():
+        if key in query:
+            data[name][k] = type(data[name][k])(query[key][-1])
+    for name, f in names.items():
+        if name not in query:
+            continue
+        raw = query[name][-1]
+        current = data[name]
+        if isinstance(current, dict):
+            raise ValueError(f"Set {name} field by field, e.g. {next(iter(nested), name)}=...")
+        if isinstance(current, tuple):
+            cast = type(current[0]) if current else str
+            if cast is int and "float" in str(f.type):
+                cast = float
+            data[name] = tuple(cast(x.strip()) for x in raw.split(",") if x.strip())
+        elif isinstance(current, (int, float)):
+            data[name] = int(raw) if str(f.type) == "int" else float(raw)
+        else:
+            data[name] = raw
+    return strategy.params_from_dict(data)
+
+
+History = Tuple[List[date], List[List[float]], List[float | None] | None]  # (dates, closes per symbol, vix), as `load_history`
+HistoryLoader = Callable[[DataRequirements, str], History]
+
+
+def offline_history(provider: OfflineProvider) -> HistoryLoader:
+    """Backtest history from the offline provider's CSV files (they are all the data there is)."""
+
+    def load(req: DataRequirements, period: str) -> History:
+        data = provider.market_data(req, period)
+        return data.dates, data.closes, data.vix
+
+    return load
+
+
+class SignalService:
+    """Signal/backtest computations over a data provider, with TTL caches for data and results.
+
+    Signals come from ``provider``; backtests from ``history`` (default: `load_history`).
+    """
+
+    def __init__(
+        self,
+        provider,
+        *,
+        history: HistoryLoader = load_history,
+        data_ttl: float = 300,
+        result_ttl: float = 300,
+        store: SignalStore | None = None,
+    ) -> None:
+        self.provider = provider
+        self.history = history
+        self.store = store
+        self.data_cache = TTLCache(data_ttl)
+        self.result_cache = TTLCache(result_ttl)
+
+    def _market_data(self, req, period: str | None = None):
+        key = ("data", req.symbols, period or req.period, req.needs_vix)
+        return self.data_cache.get_or_compute(key, lambda: self.provider.market_data(req, period))
+
+    def signal(self, strategy_key: str, params: Any) -> dict:
+        strategy = get_strategy(strategy_key)
+
+        def compute() -> dict:
+            req = strategy.requirements(params)
+            data = self._market_data(req)
+            if len(data.dates) < req.min_bars:
+                raise ValueError(f"{', '.join(req.symbols)} 数据不足")
+            signals = compute_signals(strategy, params, data.closes, data.vix)
+            rendered = render_latest(strategy, params, data, signals)
+            return {
+                "strategy": strategy.key,
+                "params": params,
+                "date": data.dates[-1],
+                "stale": list(data.stale),
+                "signal": {k: v[-1] for k, v in signals.items()},
+                "title": rendered["title"],
+                "content": rendered["content"],
+            }
+
+        return self.result_cache.get_or_compute(("signal", strategy.key, params), compute)
+
+    def _require_store(self) -> SignalStore:
+        if self.store is None:
+            raise ValueError("historical lookups need the signal store (start the server with --signal-store)")
+        return self.store
+
+    def stored_signal(self, strategy_key: str, params: Any, as_of: date) -> dict:
+        # rows on the backtest's price basis, the one the nightly job materializes
+        strategy = get_strategy(strategy_key)
+        symbol = store_symbol(strategy, params)
+        adjusted = uses_adjusted_closes(strategy.requirements(params))
+        hit = self._require_store().latest_on_or_before(strategy.key, symbol, as_of, adjusted=adjusted)
+        if hit is None:
+            raise KeyError(f"No stored {strategy.key} signal for {symbol} on or before {as_of}")
+        return {"strategy": strategy.key, "symbol": symbol, "adjusted": adjusted, "date": hit[0], "signal": hit[1]}
+
+    def stored_signals(self, strategy_key: str, params: Any, start: date | None, end: date | None) -> dict:
+        strategy = get_strategy(strategy_key)
+        symbol = store_symbol(strategy, params)
+        adjusted = uses_adjusted_closes(strategy.requirements(params))
+        dates, signals = self._require_store().range(strategy.key, symbol, start, end, adjusted=adjusted)
+        return {"strategy": strategy.key, "symbol": symbol, "adjusted": adjusted, "dates": dates, "signals": signals}
+
+    def backtest(self, strategy_key: str, params: Any, schedules: List[Schedule], period: str = "20y") -> dict:
+        strategy = get_strategy(strategy_key)
+
+        def compute() -> dict:
+            req = strategy.requirements(params)
+            key = ("history", req.symbols, period, req.needs_vix)
+            dates, closes, vix = self.data_cache.get_or_compute(key, lambda: self.history(req, period))
+            if len(dates) < req.min_bars:
+                raise ValueError(f"{', '.join(req.symbols)}: {len(dates)} common bars over {period}, need {req.min_bars}")
+            results = backtest_market(strategy.key, params, dates, closes, vix, schedules)
+            return {
+                "strategy": strategy.key,
+                "params": params,
+                "adjusted": uses_adjusted_closes(req),
+                "results": [{"schedule": s, **asdict(r)} for s, r in zip(schedules, results)],
+            }
+
+        return self.result_cache.get_or_compute(("backtest", strategy.key, params, tuple(schedules), period), compute)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "SignalServer"
+
+    def _send(self, status: int, body: Any) -> None:
+        payload = json.dumps(_jsonable(body), ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+        try:
+            if url.path == "/health":
+                self._send(200, {"status": "ok", "provider": service.provider.name})
+            elif url.path == "/strategies":
+                self._send(200, {key: s.default_params() for key, s in list_strategies().items()})
+            elif url.path in ("/signal", "/signals", "/backtest"):
+                strategy = get_strategy(query.get("strategy", [""])[-1])
+                params = params_from_query(strategy, query)
+
+                def day(name: str) -> date | None:
+                    return date.fromisoformat(query[name][-1]) if name in query else None
+
+                if url.path == "/signal" and "date" in query:
+                    self._send(200, service.stored_signal(strategy.key, params, day("date")))
+                elif url.path == "/signal":
+                    self._send(200, service.signal(strategy.key, params))
+                elif url.path == "/signals":
+                    self._send(200, service.stored_signals(strategy.key, params, day("start"), day("end")))
+                else:
+                    schedules = [Schedule.parse(s) for s in query.get("schedule", [])] or [Schedule.monthly()]
+                    period = query.get("period", ["20y"])[-1]
+                    self._send(200, service.backtest(strategy.key, params, schedules, period))
+            else:
+                self._send(404, {"error": f"Unknown path: {url.path}"})
+        except KeyError as e:
+            self._send(404, {"error": str(e.args[0]) if e.args else str(e)})
+        except (ValueError, ModuleNotFoundError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+class SignalServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: SignalService) -> None:
+        super().__init__(address, _Handler)
+        self.service = service
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Serve strategy signals and backtests over local HTTP (JSON).")
+    p.add_argument("--host", default="127.0.0.1", help="Bind address (keep it local).")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--offline", action="store_true", help="Read <data-dir>/<symbol>.csv files instead of downloading.")
+    p.add_argument("--data-dir", default=None, help="With --offline: directory of date,close CSVs (default: the live data cache).")
+    p.add_argument(
+        "--signal-store",
+        nargs="?",
+        const="",
+        default=None,
+        help="Serve historical lookups from the signal store (optional path; default .cache/signals.sqlite).",
+    )
+    p.add_argument("--data-ttl", type=float, default=300, help="Seconds loaded market data stays cached.")
+    p.add_argument("--result-ttl", type=float, default=300, help="Seconds computed signals/backtests stay cached.")
+    args = p.parse_args()
+
+    provider = OfflineProvider(args.data_dir) if args.offline else LiveProvider()
+    store = SignalStore(args.signal_store or None) if args.signal_store is not None else None
+    history = offline_history(provider) if args.offline else load_history
+    service = SignalService(provider, history=history, data_ttl=args.data_ttl, result_ttl=args.result_ttl, store=store)
+    server = SignalServer((args.host, args.port), service)
+    print(f">> Serving {provider.name} signals on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,26 @@
 from __future__ import annotations
 
-from typing import Callable, Dict
+from typing import Dict
 
-from .etf_dca_dip_buy import run as run_etf_dca_dip_buy
-from .ma250_drawdown import run as run_ma250_drawdown
+from .base import Strategy, run_strategy
+from .etf_dca_dip_buy import STRATEGY as ETF_DCA_DIP_BUY
+from .ma250_drawdown import STRATEGY as MA250_DRAWDOWN
 
-StrategyRunner = Callable[..., Dict[str, str]]
-
-STRATEGIES: Dict[str, StrategyRunner] = {
-    "ma250_drawdown": run_ma250_drawdown,
-    "etf_dca_dip_buy": run_etf_dca_dip_buy,
+STRATEGIES: Dict[str, Strategy] = {
+    MA250_DRAWDOWN.key: MA250_DRAWDOWN,
+    ETF_DCA_DIP_BUY.key: ETF_DCA_DIP_BUY,
 }
 
 
-def list_strategies() -> Dict[str, StrategyRunner]:
+def list_strategies() -> Dict[str, Strategy]:
     return dict(STRATEGIES)
 
 
-def get_strategy(key: str) -> StrategyRunner:
+def get_strategy(key: str) -> Strategy:
     key = (key or "").strip()
     if key not in STRATEGIES:
         raise KeyError(f"Unknown strategy: {key}. Available: {', '.join(sorted(STRATEGIES))}")
     return STRATEGIES[key]
+
+
+__all__ = ["STRATEGIES", "Strategy", "get_strategy", "list_strategies", "run_strategy"]
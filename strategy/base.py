@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, is_dataclass, replace
+from datetime import date, datetime
+import time
+from typing import Any, Dict, List, Mapping, Protocol, Sequence, Tuple
+
+from .data_cache import Closes, Fetch, read_cached
+
+# Every strategy's signal rows carry these columns; together they are the contribution plan the
+# backtest engine executes on invest days:
+# - base_ratio:    multiple of the regular amount invested
+# - extra_ratio:   extra buy relative to the regular amount (capped by the reserve pool, if any)
+# - pool_fraction: extra buy as a fraction of the remaining reserve pool (takes precedence)
+PLAN_COLUMNS = ("base_ratio", "extra_ratio", "pool_fraction")
+
+# Exchange time zone: dates of daily bars and of "today" for the live job.
+MARKET_TZ = "America/New_York"
+
+# Live-run time limits (seconds); main.py can override them from the environment.
+FETCH_TIMEOUT_SECONDS = 20.0
+RUN_DEADLINE_SECONDS = 60.0
+
+def market_tz():
+    from zoneinfo import ZoneInfo
+
+    return ZoneInfo(MARKET_TZ)
+
+
+def market_today() -> date:
+    """Today's date at the exchange; the latest daily bar only belongs to today if it has this date."""
+    return datetime.now(market_tz()).date()
+
+
+SignalRow = Dict[str, float | None]
+Signals = Dict[str, List[float | None]]  # column -> one value per bar
+
+
+@dataclass(frozen=True)
+class DataRequirements:
+    symbols: Tuple[str, ...]
+    period: str  # history fetched for a live run (yfinance period string)
+    min_bars: int  # bars needed before the latest signal is meaningful
+    needs_vix: bool = False
+
+
+@dataclass(frozen=True)
+class MarketData:
+    """Closes aligned on common trading dates; one column per requirements symbol."""
+
+    dates: List[date]
+    closes: List[List[float]]
+    vix: List[float | None] | None = None
+    stale: Tuple[str, ...] = ()  # symbols served from the local cache because the live fetch failed
+
+
+@dataclass(frozen=True)
+class DcaTerms:
+    """Amounts the contribution plan is applied to."""
+
+    monthly_amount: float
+    weights: Tuple[float, ...]
+    annual_reserve_pool: float | None = None  # None: extra buys are not capped by a pool
+
+
+class SignalState(Protocol):
+    def update(self, prices: Sequence[float], vix: float | None) -> SignalRow: ...
+
+    def peek(self, prices: Sequence[float], vix: float | None) -> SignalRow:
+        """The row `update` would return for these prices, leaving the state unchanged (intraday checks)."""
+        ...
+
+    def to_dict(self) -> dict: ...
+
+
+class Strategy(Protocol):
+    key: str
+    error_title: str
+
+    def default_params(self) -> Any: ...
+
+    def params_from_env(self, env: Mapping[str, str]) -> Any: ...
+
+    def params_from_dict(self, data: Mapping[str, Any]) -> Any: ...
+
+    def requirements(self, params: Any) -> DataRequirements: ...
+
+    def terms(self, params: Any) -> DcaTerms: ...
+
+    def signal_state(self, params: Any, data: dict | None = None) -> SignalState:
+        """Fresh per-bar signal state, or one restored from `SignalState.to_dict()` output."""
+        ...
+
+    def render(self, params: Any, data: MarketData, signals: Signals) -> Dict[str, str]: ...
+
+
+def dataclass_from_dict(cls, data: Mapping[str, Any]):
+    """Rebuild a params dataclass from JSON-ish data (lists back to tuples, unknown keys ignored).
+
+    A field whose default is itself a dataclass (e.g. tier thresholds) is rebuilt from a nested
+    mapping field by field, starting from that default.
+    """
+    kwargs = {}
+    for f in fields(cls):
+        if f.name in data:
+            value = data[f.name]
+            if is_dataclass(f.default) and isinstance(value, Mapping):
+                value = replace(f.default, **{g.name: value[g.name] for g in fields(f.default) if g.name in value})
+            kwargs[f.name] = tuple(value) if isinstance(value, list) else value
+    return cls(**kwargs)
+
+
+def unknown_keys(params: Any, data: Mapping[str, Any], prefix: str = "") -> List[str]:
+    """Keys of ``data`` that `dataclass_from_dict` would ignore for ``params``' class (nested as ``a.b``)."""
+    known = {f.name: getattr(params, f.name) for f in fields(params)}
+    out: List[str] = []
+    for key, value in data.items():
+        if key not in known:
+            out.append(f"{prefix}{key}")
+        elif is_dataclass(known[key]) and isinstance(value, Mapping):
+            out += unknown_keys(known[key], value, f"{prefix}{key}.")
+    return out
+
+
+def compute_signals(
+    strategy: Strategy,
+    params: Any,
+    closes: Sequence[Sequence[float]],
+    vix: Sequence[float | None] | None = None,
+) -> Signals:
+    """Array-in/array-out signals: run a fresh signal state over aligned close columns."""
+    state = strategy.signal_state(params)
+    n = len(closes[0]) if closes else 0
+    out: Signals = {}
+    for i in range(n):
+        row = state.update([col[i] for col in closes], None if vix is None else vix[i])
+        for k, v in row.items():
+            out.setdefault(k, []).append(v)
+    return out
+
+
+def _wait_closes(fetch: Fetch, until: float) -> Tuple[Closes, bool]:
+    """Closes from ``fetch`` if it lands before ``until`` (monotonic), else the cached bars (stale)."""
+    if fetch.wait(until - time.monotonic()) and fetch.error is None and fetch.closes:
+        return fetch.closes, False
+    cached = read_cached(fetch.symbol)
+    if cached:
+        return cached, True
+    if fetch.error is None:
+        raise ValueError(f"获取 {fetch.symbol} 数据超时（{until - fetch.started:.1f}秒），且没有本地缓存")
+    if isinstance(fetch.error, (ModuleNotFoundError, ValueError)):
+        raise fetch.error
+    raise ValueError(f"获取 {fetch.symbol} 数据失败：{fetch.error}")
+
+
+def load_market_data(
+    req: DataRequirements,
+    *,
+    fetch_timeout: float = FETCH_TIMEOUT_SECONDS,
+    deadline: float | None = None,
+) -> MarketData:
+    """Fetch closes for a live run and align them on the dates every symbol traded.
+
+    All symbols are fetched concurrently; each gets ``fetch_timeout`` seconds, bounded by the
+    absolute ``deadline`` (`time.monotonic()` value). A symbol whose fetch fails or times out
+    falls back to its last cached bars and is listed in `MarketData.stale`.
+    """
+    for sym in req.symbols:
+        print(f"正在获取 {sym} 的数据...")
+    fetches = [Fetch(sym, req.period) for sym in req.symbols]
+    vix_fetch = Fetch("^VIX", req.period) if req.needs_vix else None
+
+    def until(fetch: Fetch) -> float:
+        limit = fetch.started + fetch_timeout
+        return limit if deadline is None else min(limit, deadline)
+
+    by_symbol: List[Closes] = []
+    stale: List[str] = []
+    for fetch in fetches:
+        closes, is_stale = _wait_closes(fetch, until(fetch))
+        by_symbol.append(closes)
+        if is_stale:
+            stale.append(fetch.symbol)
+
+    vix_by_date: Closes | None = None
+    if vix_fetch is not None:
+        try:
+            vix_by_date, is_stale = _wait_closes(vix_fetch, until(vix_fetch))
+            if is_stale:
+                stale.append(vix_fetch.symbol)
+        except Exception:
+            vix_by_date = {}  # VIX is optional: tiers that need it simply do not trigger
+    return align_market_data(by_symbol, vix_by_date, stale=stale)
+
+
+def align_market_data(
+    by_symbol: Sequence[Closes],
+    vix_by_date: Closes | None = None,
+    *,
+    stale: Sequence[str] = (),
+) -> MarketData:
+    """Align per-symbol closes on the dates every symbol traded; VIX is looked up per date (may be None)."""
+    dates = sorted(set.intersection(*(set(s) for s in by_symbol))) if by_symbol else []
+    closes = [[s[d] for d in dates] for s in by_symbol]
+    vix = None if vix_by_date is None else [vix_by_date.get(d) for d in dates]
+    return MarketData(dates=dates, closes=closes, vix=vix, stale=tuple(stale))
+
+
+def run_strategy(
+    strategy: Strategy,
+    params: Any,
+    *,
+    fetch_timeout: float = FETCH_TIMEOUT_SECONDS,
+    deadline_seconds: float = RUN_DEADLINE_SECONDS,
+    store=None,
+) -> Dict[str, str]:
+    """Live run: fetch the declared data, compute signals over it, render the latest bar.
+
+    Data fetching is bounded by ``deadline_seconds``; if cached bars had to be used, the push is
+    marked as based on stale data. With a `SignalStore`, the latest signal row is recorded too.
+    """
+    req = strategy.requirements(params)
+    try:
+        data = load_market_data(req, fetch_timeout=fetch_timeout, deadline=time.monotonic() + deadline_seconds)
+    except (ModuleNotFoundError, ValueError) as e:
+        return {"title": strategy.error_title, "content": str(e)}
+    if len(data.dates) < req.min_bars:
+        return {"title": strategy.error_title, "content": f"{', '.join(req.symbols)} 数据不足"}
+    signals = compute_signals(strategy, params, data.closes, data.vix)
+    if store is not None:
+        try:
+            row = {k: v[-1] for k, v in signals.items()}
+            store.put(strategy.key, ",".join(req.symbols), [(data.dates[-1], row)], adjusted=True)  # Ticker.history closes
+        except Exception as e:  # the push matters more than the record
+            print(f">> 写入信号库失败: {e}")
+    return render_latest(strategy, params, data, signals)
+
+
+def render_latest(strategy: Strategy, params: Any, data: MarketData, signals: Signals) -> Dict[str, str]:
+    """`Strategy.render`, with a stale-data banner when cached bars had to be used."""
+    result = strategy.render(params, data, signals)
+    if data.stale:
+        result = {
+            "title": f"[缓存数据] {result['title']}",
+            "content": (
+                f"⚠️ 行情获取超时/失败，{', '.join(data.stale)} 使用本地缓存数据"
+                f"（截至 {data.dates[-1].isoformat()}），信号可能已过期<br>" + result["content"]
+            ),
+        }
+    return result
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import csv
+from datetime import date
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Dict, List
+
+CACHE_MAX_BARS = 1000  # ~4 years of daily bars, enough for every strategy's requirements
+
+Closes = Dict[date, float]
+
+_PENDING: List["Fetch"] = []
+_PENDING_LOCK = threading.Lock()
+
+
+def cache_dir() -> Path:
+    """Directory of the last successfully fetched closes per symbol, served when a live fetch fails or
+    times out. Read from DATA_CACHE_DIR on every call, so a value main.py loads from .env applies."""
+    return Path(os.getenv("DATA_CACHE_DIR", "").strip() or Path(__file__).resolve().parent.parent / ".cache" / "market")
+
+
+def history(symbol: str, period: str):
+    try:
+        import yfinance as yf
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("缺少依赖：yfinance（请先安装：pip install yfinance）") from e
+    return yf.Ticker(symbol).history(period=period)
+
+
+def _cache_path(symbol: str, directory: Path | str | None = None) -> Path:
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in symbol)
+    return Path(directory or cache_dir()) / f"{safe}.csv"
+
+
+def read_cached(symbol: str, directory: Path | str | None = None) -> Closes:
+    """Cached closes of ``symbol`` (``date,close`` CSV); ``directory`` defaults to `cache_dir()`."""
+    path = _cache_path(symbol, directory)
+    if not path.exists():
+        return {}
+    with path.open(newline="", encoding="utf-8") as f:
+        return {date.fromisoformat(row["date"]): float(row["close"]) for row in csv.DictReader(f)}
+
+
+def write_cached(symbol: str, closes: Closes) -> None:
+    """Merge ``closes`` into the symbol's cache (fresh values win) and keep the last CACHE_MAX_BARS."""
+    merged = {**read_cached(symbol), **closes}
+    days = sorted(merged)[-CACHE_MAX_BARS:]
+    path = _cache_path(symbol)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with tmp_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "close"])
+        for d in days:
+            writer.writerow([d.isoformat(), repr(merged[d])])
+    os.replace(tmp_path, path)
+
+
+class Fetch:
+    """One history download on a daemon thread.
+
+    The caller waits at most its own timeout; if that expires the download keeps running in the
+    background and still refreshes the cache when it finishes (see `wait_for_refreshes`).
+    """
+
+    def __init__(self, symbol: str, period: str) -> None:
+        self.symbol = symbol
+        self.period = period
+        self.started = time.monotonic()
+        self.closes: Closes | None = None
+        self.error: Exception | None = None
+        self._done = threading.Event()
+        with _PENDING_LOCK:
+            _PENDING.append(self)
+        threading.Thread(target=self._run, name=f"fetch-{symbol}", daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            hist = history(self.symbol, period=self.period)
+            close = hist["Close"].dropna()
+            closes = {d.date(): float(x) for d, x in zip(close.index.to_pydatetime(), close.tolist())}
+            if not closes:
+                raise ValueError(f"{self.symbol} 没有返回数据")
+            self.closes = closes
+            try:
+                write_cached(self.symbol, closes)
+            except OSError as e:
+                print(f">> 写入 {self.symbol} 行情缓存失败: {e}")
+        except Exception as e:  # surfaced to the waiting caller
+            self.error = e
+        finally:
+            self._done.set()
+            with _PENDING_LOCK:
+                if self in _PENDING:
+                    _PENDING.remove(self)
+
+    def wait(self, timeout: float) -> bool:
+        return self._done.wait(max(0.0, timeout))
+
+
+def wait_for_refreshes(timeout: float) -> int:
+    """Give downloads that outlived their fetch timeout up to ``timeout`` seconds to land in the cache.
+
+    Returns the number still running afterwards (they are abandoned when the process exits).
+    """
+    until = time.monotonic() + max(0.0, float(timeout))
+    with _PENDING_LOCK:
+        pending = list(_PENDING)
+    for fetch in pending:
+        fetch.wait(until - time.monotonic())
+    with _PENDING_LOCK:
+        return len(_PENDING)
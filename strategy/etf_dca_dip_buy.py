@@ -1,10 +1,26 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
 import datetime as _dt
 
+from backtest.indicators import RollingMax
+from backtest.trading_calendar import Schedule, TradingCalendar
+
+from .base import (
+    DataRequirements,
+    DcaTerms,
+    MarketData,
+    SignalRow,
+    Signals,
+    dataclass_from_dict,
+    market_today,
+    run_strategy,
+)
+
+HIGH_6M_WINDOW = 126
+
 
 @dataclass(frozen=True)
 class Tier:
@@ -15,6 +31,11 @@ class Tier:
     vix_min: float | None
     note: str
 
+    @property
+    def number(self) -> int:
+        """0-4 from the name; the value of the ``tier`` signal column."""
+        return int(self.name.removeprefix("档位"))
+
 
 TIERS: List[Tier] = [
     Tier(name="档位4", min_drawdown=-0.35, max_drawdown=None, extra_ratio=None, vix_min=None, note="极端行情：动用剩余加仓金50%"),
@@ -25,54 +46,240 @@ TIERS: List[Tier] = [
 ]
 
 
-def _history(symbol: str, period: str):
-    try:
-        import yfinance as yf
-    except ModuleNotFoundError as e:
-        raise ModuleNotFoundError("缺少依赖：yfinance（请先安装：pip install yfinance）") from e
-    return yf.Ticker(symbol).history(period=period)
+@dataclass(frozen=True)
+class TierThresholds:
+    """Drawdown/VIX bounds and extra buys of the tiers; the defaults are the live rules in TIERS."""
+
+    tier1_dd: float = -0.08  # 档位1 band upper bound; shallower drawdowns are 档位0
+    tier1_dd_floor: float = -0.14  # 档位1 band lower bound
+    tier1_vix: float = 20.0
+    tier2_dd: float = -0.15
+    tier3_dd: float = -0.25
+    tier3_vix: float = 25.0
+    tier4_dd: float = -0.35
+    tier1_extra: float = 0.25
+    tier2_extra: float = 0.5
+    tier3_extra: float = 1.0
+    tier4_pool_fraction: float = 0.5
+
+    def is_ordered(self) -> bool:
+        """Whether the drawdown bounds nest (4 < 3 < 2 < 1 floor <= 1), so a higher VIX never lowers the tier."""
+        return self.tier4_dd < self.tier3_dd < self.tier2_dd < self.tier1_dd_floor <= self.tier1_dd
+
+
+DEFAULT_TIER_THRESHOLDS = TierThresholds()
+_TIER_BY_NAME = {t.name: t for t in TIERS}
+_TIER_BY_NUMBER = {t.number: t for t in TIERS}
+
+
+def _pick_tier(drawdown: float, vix: float | None, thresholds: TierThresholds = DEFAULT_TIER_THRESHOLDS) -> Tier:
+    th = thresholds
+    if drawdown > th.tier1_dd:
+        return _TIER_BY_NAME["档位0"]
+
+    if th.tier1_dd_floor <= drawdown <= th.tier1_dd and (vix is not None and vix > th.tier1_vix):
+        return _TIER_BY_NAME["档位1"]
+
+    if drawdown <= th.tier4_dd:
+        return _TIER_BY_NAME["档位4"]
+
+    if drawdown <= th.tier3_dd and (vix is not None and vix > th.tier3_vix):
+        return _TIER_BY_NAME["档位3"]
+
+    if drawdown <= th.tier2_dd:
+        return _TIER_BY_NAME["档位2"]
+
+    return _TIER_BY_NAME["档位0"]
+
+
+def tier_plan(tier: Tier, thresholds: TierThresholds = DEFAULT_TIER_THRESHOLDS) -> Tuple[float, float]:
+    """(extra_ratio, pool_fraction) for a tier; 档位4 draws a fraction of the remaining reserve pool."""
+    if tier.name == "档位4":
+        return 0.0, thresholds.tier4_pool_fraction
+    extra = {"档位1": thresholds.tier1_extra, "档位2": thresholds.tier2_extra, "档位3": thresholds.tier3_extra}
+    return float(extra.get(tier.name, 0.0)), 0.0
+
+
+def plan_columns(
+    worst_dd: Sequence[float],
+    vix: Sequence[float | None],
+    thresholds: TierThresholds = DEFAULT_TIER_THRESHOLDS,
+) -> Tuple[List[float], List[float]]:
+    """(extra_ratio, pool_fraction) columns from precomputed worst-drawdown/VIX columns."""
+    extra_ratio: List[float] = []
+    pool_fraction: List[float] = []
+    for dd, v in zip(worst_dd, vix):
+        extra, pool = tier_plan(_pick_tier(float(dd), None if v is None else float(v), thresholds), thresholds)
+        extra_ratio.append(extra)
+        pool_fraction.append(pool)
+    return extra_ratio, pool_fraction
 
 
-def _six_month_drawdown(symbol: str) -> Tuple[float, float, float]:
-    hist = _history(symbol, period="1y")
-    if len(hist) < 30:
-        raise ValueError(f"{symbol} 数据不足")
+@dataclass(frozen=True)
+class EtfDcaDipBuyParams:
+    etfs: Tuple[str, str] = ("VOO", "QQQM")
+    weights: Tuple[float, float] = (0.5, 0.5)
+    monthly_total_usd: float = 900
+    annual_reserve_pool_usd: float = 4000
+    invest_day: int = 10
+    thresholds: TierThresholds = DEFAULT_TIER_THRESHOLDS
+
+
+class EtfDipBuySignalState:
+    """Per-symbol drawdown from the 6-month (126-bar) high plus forward-filled VIX, per bar.
+
+    Drawdowns are 0 until a symbol has a full 126-bar window.
+    """
+
+    def __init__(self, n_symbols: int, thresholds: TierThresholds = DEFAULT_TIER_THRESHOLDS) -> None:
+        self.highs = [RollingMax(HIGH_6M_WINDOW) for _ in range(n_symbols)]
+        self.last_vix: float | None = None
+        self.thresholds = thresholds
+
+    def update(self, prices: Sequence[float], vix: float | None) -> SignalRow:
+        if vix is not None:
+            self.last_vix = float(vix)
+        return self._row(prices, [h.update(float(px)) for px, h in zip(prices, self.highs)], self.last_vix)
+
+    def peek(self, prices: Sequence[float], vix: float | None) -> SignalRow:
+        last_vix = float(vix) if vix is not None else self.last_vix
+        return self._row(prices, [h.peek(float(px)) for px, h in zip(prices, self.highs)], last_vix)
+
+    def _row(self, prices: Sequence[float], highs: Sequence[float | None], vix: float | None) -> SignalRow:
+        row: SignalRow = {}
+        worst_dd = 0.0
+        for k, (px, high) in enumerate(zip(prices, highs)):
+            px = float(px)
+            dd = 0.0 if high is None else (px - high) / high
+            row[f"price_{k}"] = px
+            row[f"high_6m_{k}"] = high
+            row[f"drawdown_{k}"] = dd
+            worst_dd = min(worst_dd, dd)
+
+        tier = _pick_tier(worst_dd, vix=vix, thresholds=self.thresholds)
+        extra_ratio, pool_fraction = tier_plan(tier, self.thresholds)
+        row.update(
+            {
+                "worst_dd": worst_dd,
+                "vix": vix,
+                "tier": float(tier.number),
+                "base_ratio": 1.0,
+                "extra_ratio": extra_ratio,
+                "pool_fraction": pool_fraction,
+            }
+        )
+        return row
 
-    close = hist["Close"].dropna()
-    tail = close.tail(126) if len(close) >= 126 else close
-    current = float(tail.iloc[-1])
-    high_6m = float(tail.max())
-    dd = (current - high_6m) / high_6m
-    return current, high_6m, dd
+    def to_dict(self) -> dict:
+        return {"highs": [h.to_dict() for h in self.highs], "last_vix": self.last_vix}
 
+    @classmethod
+    def from_dict(cls, data: dict, thresholds: TierThresholds = DEFAULT_TIER_THRESHOLDS) -> "EtfDipBuySignalState":
+        state = cls(len(data["highs"]), thresholds)
+        state.highs = [RollingMax.from_dict(h) for h in data["highs"]]
+        state.last_vix = data["last_vix"]
+        return state
 
-def _get_vix() -> float | None:
-    try:
-        hist = _history("^VIX", period="5d")
-        if len(hist) == 0:
-            return None
-        return float(hist["Close"].dropna().iloc[-1])
-    except Exception:
-        return None
 
+class EtfDcaDipBuyStrategy:
+    key = "etf_dca_dip_buy"
+    error_title = "策略运行失败"
 
-def _pick_tier(drawdown: float, vix: float | None) -> Tier:
-    if drawdown > -0.08:
-        return next(t for t in TIERS if t.name == "档位0")
+    def default_params(self) -> EtfDcaDipBuyParams:
+        return EtfDcaDipBuyParams()
 
-    if -0.14 <= drawdown <= -0.08 and (vix is not None and vix > 20):
-        return next(t for t in TIERS if t.name == "档位1")
+    def params_from_env(self, env: Mapping[str, str]) -> EtfDcaDipBuyParams:
+        return self.default_params()
+
+    def params_from_dict(self, data: Mapping[str, Any]) -> EtfDcaDipBuyParams:
+        params = dataclass_from_dict(EtfDcaDipBuyParams, data)
+        if not params.thresholds.is_ordered():
+            raise ValueError(f"tier drawdown bounds must satisfy tier4 < tier3 < tier2 < tier1 floor <= tier1: {params.thresholds}")
+        return params
+
+    def requirements(self, params: EtfDcaDipBuyParams) -> DataRequirements:
+        return DataRequirements(symbols=tuple(params.etfs), period="1y", min_bars=HIGH_6M_WINDOW, needs_vix=True)
+
+    def terms(self, params: EtfDcaDipBuyParams) -> DcaTerms:
+        return DcaTerms(
+            monthly_amount=float(params.monthly_total_usd),
+            weights=tuple(float(w) for w in params.weights),
+            annual_reserve_pool=float(params.annual_reserve_pool_usd),
+        )
 
-    if drawdown <= -0.35:
-        return next(t for t in TIERS if t.name == "档位4")
+    def signal_state(self, params: EtfDcaDipBuyParams, data: dict | None = None) -> EtfDipBuySignalState:
+        if data:
+            return EtfDipBuySignalState.from_dict(data, params.thresholds)
+        return EtfDipBuySignalState(len(params.etfs), params.thresholds)
+
+    def render(self, params: EtfDcaDipBuyParams, data: MarketData, signals: Signals) -> Dict[str, str]:
+        etfs, weights = params.etfs, params.weights
+        monthly_total_usd = params.monthly_total_usd
+        annual_reserve_pool_usd = params.annual_reserve_pool_usd
+        today = _dt.date.today()
+        schedule = Schedule.monthly(params.invest_day)
+
+        # Same roll-forward rule as the backtest, evaluated on the latest trading day we have data for.
+        # Only a bar dated today (exchange time) is acted on: a weekend/holiday run still sees
+        # Friday's bar and must not repeat Friday's instruction.
+        calendar = TradingCalendar(data.dates)
+        as_of = calendar.dates[-1]
+        trading_today = as_of == market_today()
+        should_dca = trading_today and calendar.is_scheduled(as_of, schedule)
+        dca_note = f"最新交易日 {as_of.isoformat()} {'执行' if should_dca else '不执行'}基础定投"
+        if not trading_today:
+            dca_note += "（今日非交易日）"
+
+        tier = _TIER_BY_NUMBER[int(signals["tier"][-1])]
+        worst_dd = float(signals["worst_dd"][-1])
+        vix = signals["vix"][-1]
+
+        base_allocations = {sym: monthly_total_usd * w for sym, w in zip(etfs, weights)}
+
+        extra_ratio, pool_fraction = tier_plan(tier, params.thresholds)
+        if tier.name == "档位4":
+            extra_total = annual_reserve_pool_usd * pool_fraction
+            extra_note = f"按策略动用加仓金 {pool_fraction*100:.0f}%（假设当前资金池 {annual_reserve_pool_usd:.0f} 美元）"
+        else:
+            extra_total = monthly_total_usd * extra_ratio
+            extra_note = f"加码 {extra_ratio*100:.0f}%（相对月定投总额）"
+
+        extra_allocations = {sym: extra_total * w for sym, w in zip(etfs, weights)}
+
+        title = "ETF定投+下跌加仓策略"
+
+        symbol_lines = []
+        for k, sym in enumerate(etfs):
+            price = float(signals[f"price_{k}"][-1])
+            high = signals[f"high_6m_{k}"][-1]
+            high_str = f"${float(high):.2f}" if high is not None else "N/A"
+            dd_pct = float(signals[f"drawdown_{k}"][-1]) * 100
+            symbol_lines.append(f"{sym}: 现价 ${price:.2f}｜6个月高点 {high_str}｜跌幅 {dd_pct:.2f}%")
+
+        vix_str = f"{vix:.2f}" if vix is not None else "N/A"
+        base_str = "；".join([f"{sym} ${base_allocations[sym]:.0f}" for sym in etfs])
+        extra_str = "；".join([f"{sym} ${extra_allocations[sym]:.0f}" for sym in etfs])
+        dd_worst_pct = worst_dd * 100
+
+        content = (
+            f"📅 日期: {today.isoformat()}<br>"
+            f"🗓️ 定投日: {schedule.describe()}｜{dca_note}<br>"
+            f"📌 标的: {', '.join(etfs)}<br>"
+            + "<br>".join(symbol_lines)
+            + "<br>"
+            f"📉 参考跌幅(取最深): {dd_worst_pct:.2f}%（基于近6个月高点）<br>"
+            f"🌡️ VIX: {vix_str}<br>"
+            f"-----------------------<br>"
+            f"🎯 触发档位: <b>{tier.name}</b>｜{tier.note}<br>"
+            f"💵 基础定投(合计 ${monthly_total_usd:.0f}): {base_str}<br>"
+            f"➕ 额外加仓(合计 ${extra_total:.0f}): {extra_str}<br>"
+            f"🧾 说明: {extra_note}<br>"
+        )
 
-    if drawdown <= -0.25 and (vix is not None and vix > 25):
-        return next(t for t in TIERS if t.name == "档位3")
+        return {"title": title, "content": content}
 
-    if drawdown <= -0.15:
-        return next(t for t in TIERS if t.name == "档位2")
 
-    return next(t for t in TIERS if t.name == "档位0")
+STRATEGY = EtfDcaDipBuyStrategy()
 
 
 def run(
@@ -83,65 +290,11 @@ def run(
     invest_day: int = 10,
     annual_reserve_pool_usd: float = 4000,
 ) -> Dict[str, str]:
-    today = _dt.date.today()
-    should_dca = today.day == invest_day
-
-    try:
-        vix = _get_vix()
-    except ModuleNotFoundError as e:
-        return {"title": "策略运行失败", "content": str(e)}
-
-    per_symbol: Dict[str, Dict[str, float]] = {}
-    worst_dd = 0.0
-    try:
-        for sym in etfs:
-            current, high_6m, dd = _six_month_drawdown(sym)
-            per_symbol[sym] = {"price": current, "high_6m": high_6m, "drawdown": dd}
-            worst_dd = min(worst_dd, dd)
-    except (ModuleNotFoundError, ValueError) as e:
-        return {"title": "策略运行失败", "content": str(e)}
-
-    tier = _pick_tier(worst_dd, vix=vix)
-
-    base_allocations = {sym: monthly_total_usd * w for sym, w in zip(etfs, weights)}
-
-    if tier.name == "档位4":
-        extra_total = annual_reserve_pool_usd * 0.5
-        extra_note = f"按策略动用加仓金 50%（假设当前资金池 {annual_reserve_pool_usd:.0f} 美元）"
-    else:
-        extra_ratio = float(tier.extra_ratio or 0.0)
-        extra_total = monthly_total_usd * extra_ratio
-        extra_note = f"加码 {extra_ratio*100:.0f}%（相对月定投总额）"
-
-    extra_allocations = {sym: extra_total * w for sym, w in zip(etfs, weights)}
-
-    title = "ETF定投+下跌加仓策略"
-
-    symbol_lines = []
-    for sym in etfs:
-        dd_pct = per_symbol[sym]["drawdown"] * 100
-        symbol_lines.append(
-            f"{sym}: 现价 ${per_symbol[sym]['price']:.2f}｜6个月高点 ${per_symbol[sym]['high_6m']:.2f}｜跌幅 {dd_pct:.2f}%"
-        )
-
-    vix_str = f"{vix:.2f}" if vix is not None else "N/A"
-    base_str = "；".join([f"{sym} ${base_allocations[sym]:.0f}" for sym in etfs])
-    extra_str = "；".join([f"{sym} ${extra_allocations[sym]:.0f}" for sym in etfs])
-    dd_worst_pct = worst_dd * 100
-
-    content = (
-        f"📅 日期: {today.isoformat()}<br>"
-        f"🗓️ 定投日: 每月{invest_day}号｜本次{'执行' if should_dca else '不执行'}基础定投<br>"
-        f"📌 标的: {', '.join(etfs)}<br>"
-        + "<br>".join(symbol_lines)
-        + "<br>"
-        f"📉 参考跌幅(取最深): {dd_worst_pct:.2f}%（基于近6个月高点）<br>"
-        f"🌡️ VIX: {vix_str}<br>"
-        f"-----------------------<br>"
-        f"🎯 触发档位: <b>{tier.name}</b>｜{tier.note}<br>"
-        f"💵 基础定投(合计 ${monthly_total_usd:.0f}): {base_str}<br>"
-        f"➕ 额外加仓(合计 ${extra_total:.0f}): {extra_str}<br>"
-        f"🧾 说明: {extra_note}<br>"
+    params = EtfDcaDipBuyParams(
+        etfs=etfs,
+        weights=weights,
+        monthly_total_usd=monthly_total_usd,
+        annual_reserve_pool_usd=annual_reserve_pool_usd,
+        invest_day=invest_day,
     )
-
-    return {"title": title, "content": content}
+    return run_strategy(STRATEGY, params)
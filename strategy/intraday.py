@@ -0,0 +1,428 @@
+"""Intraday tier checks on minute bars.
+
+    python -m strategy.intraday                         # poll 1m bars until the close, push on signal changes
+    python -m strategy.intraday --config tracked.json --poll 60 --confirm-bars 3
+    python -m strategy.intraday --replay 2026-03-09     # re-run a stored day offline: bar store + data cache, no push
+
+Daily signals only move at the close. During the session each tracked strategy is re-evaluated as
+if the day closed at the latest minute price: `SignalState.peek` on top of the state after the
+previous close, O(1) per bar. A push goes out only when the contribution plan (e.g. the
+``etf_dca_dip_buy`` tier) changes and the new plan has held for ``confirm_bars`` bars.
+``tracked.json`` has the `strategy.signal_store` format.
+"""
+
+from __future__ import annotations
+
+import argparse
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+from backtest._compat import require_numpy
+
+from .base import (
+    FETCH_TIMEOUT_SECONDS,
+    MARKET_TZ,
+    PLAN_COLUMNS,
+    MarketData,
+    SignalRow,
+    Signals,
+    market_tz,
+    render_latest,
+)
+from .notify import load_env_file, send_push
+
+BAR_SECONDS = 60
+
+Bars = Tuple[Any, Any]  # (int64 bar start in epoch seconds, float64 closes), ascending
+
+
+def default_dir() -> Path:
+    """Directory of the minute-bar store: INTRADAY_DIR, else ``.cache/intraday``; read on every call,
+    so a value loaded from .env applies."""
+    return Path(os.getenv("INTRADAY_DIR", "").strip() or Path(__file__).resolve().parent.parent / ".cache" / "intraday")
+
+
+class MinuteBarStore:
+    """Append-only minute closes: ``<directory>/<YYYY-MM-DD>/<symbol>.bin`` of 16-byte ``(ts, close)`` records.
+
+    Appends are plain file writes that only ever add bars newer than the last stored one; reads
+    are read-only memory maps, so re-reading a day never copies or parses it. A record torn by a
+    crash mid-write is dropped on the next append.
+    """
+
+    def __init__(self, directory: Path | str | None = None) -> None:
+        self.directory = Path(directory or default_dir())
+        self._last_ts: Dict[Tuple[date, str], int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def dtype():
+        np = require_numpy()
+        return np.dtype([("ts", "<i8"), ("close", "<f8")])
+
+    def _path(self, day: date, symbol: str) -> Path:
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in symbol)
+        return self.directory / day.isoformat() / f"{safe}.bin"
+
+    def bars(self, day: date, symbol: str):
+        """Read-only structured view (fields ``ts``, ``close``) of the stored bars; empty if none."""
+        np = require_numpy()
+        dtype = self.dtype()
+        path = self._path(day, symbol)
+        try:
+            n = path.stat().st_size // dtype.itemsize
+        except FileNotFoundError:
+            n = 0
+        if n == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+    def last_ts(self, day: date, symbol: str) -> int | None:
+        key = (day, symbol)
+        if key not in self._last_ts:
+            bars = self.bars(day, symbol)
+            if len(bars) == 0:
+                return None
+            self._last_ts[key] = int(bars["ts"][-1])
+        return self._last_ts[key]
+
+    def append(self, day: date, symbol: str, ts, closes) -> Bars:
+        """Append the bars newer than the last stored one; returns the appended ``(ts, closes)``."""
+        np = require_numpy()
+        ts = np.asarray(ts, dtype=np.int64)
+        closes = np.asarray(closes, dtype=np.float64)
+        with self._lock:
+            last = self.last_ts(day, symbol)
+            if last is not None:
+                keep = ts > last
+                ts, closes = ts[keep], closes[keep]
+            if len(ts) == 0:
+                return ts, closes
+            records = np.empty(len(ts), dtype=self.dtype())
+            records["ts"] = ts
+            records["close"] = closes
+            path = self._path(day, symbol)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("ab") as f:
+                torn = f.tell() % records.itemsize
+                if torn:
+                    f.truncate(f.tell() - torn)
+                    f.seek(0, os.SEEK_END)
+                f.write(records.tobytes())
+            self._last_ts[(day, symbol)] = int(ts[-1])
+        return ts, closes
+
+
+def fetch_minute_bars(symbol: str, now: float | None = None) -> Tuple[date, Any, Any] | None:
+    """Today's completed 1-minute bars ``(session day, ts, closes)`` from Yahoo Finance, or None."""
+    try:
+        import yfinance as yf
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("缺少依赖：yfinance（请先安装：pip install yfinance）") from e
+    np = require_numpy()
+    close = yf.Ticker(symbol).history(period="1d", interval="1m")["Close"].dropna()
+    if close.empty:
+        return None
+    index = close.index if close.index.tz is not None else close.index.tz_localize("UTC")
+    ts = np.asarray(index.as_unit("s").asi8, dtype=np.int64)
+    values = np.asarray(close.to_numpy(), dtype=np.float64)
+    complete = ts + BAR_SECONDS <= (time.time() if now is None else now)  # the last bar may still be forming
+    if not complete.any():
+        return None
+    return index[-1].tz_convert(MARKET_TZ).date(), ts[complete], values[complete]
+
+
+@dataclass(frozen=True)
+class Alert:
+    strategy_key: str
+    ts: int
+    title: str
+    content: str
+    row: SignalRow
+
+
+def _plan_text(plan: Tuple[float | None, ...] | None) -> str:
+    if plan is None:
+        return "无"
+    base, extra, pool = plan
+    text = f"基础×{base or 0:g}"
+    if pool:
+        return text + f" 动用资金池{pool * 100:.0f}%"
+    return text + (f" 加码{extra * 100:.0f}%" if extra else "")
+
+
+class _Watch:
+    """One tracked strategy: its state after the previous close plus the debounce bookkeeping."""
+
+    def __init__(self, strategy, params: Any, data: MarketData, day: date) -> None:
+        req = strategy.requirements(params)
+        self.strategy = strategy
+        self.params = params
+        self.symbols: Tuple[str, ...] = tuple(req.symbols)
+        self.needs_vix = req.needs_vix
+        keep = bisect_left(data.dates, day)  # a live daily download already contains today's partial bar
+        self.data = MarketData(
+            dates=data.dates[:keep],
+            closes=[col[:keep] for col in data.closes],
+            vix=None if data.vix is None else data.vix[:keep],
+            stale=data.stale,
+        )
+        self.state = strategy.signal_state(params)
+        self.signals: Signals = {}
+        for i in range(keep):
+            row = self.state.update([col[i] for col in self.data.closes], None if self.data.vix is None else self.data.vix[i])
+            for k, v in row.items():
+                self.signals.setdefault(k, []).append(v)
+        self.announced = tuple(self.signals[c][-1] for c in PLAN_COLUMNS) if keep else None
+        self.candidate: Tuple[float | None, ...] | None = None
+        self.streak = 0
+        self.last_push: int | None = None
+
+    def check(
+        self,
+        day: date,
+        ts: int,
+        prices: Sequence[float],
+        vix: float | None,
+        *,
+        confirm_bars: int,
+        min_interval: float,
+    ) -> Alert | None:
+        row = self.state.peek(prices, vix)
+        plan = tuple(row[c] for c in PLAN_COLUMNS)
+        if plan == self.announced:
+            self.candidate, self.streak = None, 0
+            return None
+        if plan != self.candidate:
+            self.candidate, self.streak = plan, 0
+        self.streak += 1
+        if self.streak < confirm_bars or (self.last_push is not None and ts - self.last_push < min_interval):
+            return None
+        previous, self.announced, self.last_push = self.announced, plan, ts
+        self.candidate, self.streak = None, 0
+        return self._alert(day, ts, prices, vix, row, previous)
+
+    def _alert(self, day, ts, prices, vix, row, previous) -> Alert:
+        data = self.data
+        provisional = MarketData(
+            dates=data.dates + [day],
+            closes=[col + [float(px)] for col, px in zip(data.closes, prices)],
+            vix=None if data.vix is None else data.vix + [row.get("vix", vix)],
+            stale=data.stale,
+        )
+        signals = {k: v + [row.get(k)] for k, v in self.signals.items()}
+        rendered = render_latest(self.strategy, self.params, provisional, signals)
+        clock = datetime.fromtimestamp(ts + BAR_SECONDS, market_tz()).strftime("%H:%M")
+        return Alert(
+            strategy_key=self.strategy.key,
+            ts=ts,
+            title=f"[盘中] {rendered['title']}",
+            content=(
+                f"⏱️ 盘中 {clock}（美东）按最新分钟价估算，收盘前仍可能变化<br>"
+                f"🔁 信号变化: {_plan_text(previous)} → {_plan_text(tuple(row[c] for c in PLAN_COLUMNS))}<br>"
+                + rendered["content"]
+            ),
+            row=row,
+        )
+
+
+class IntradayMonitor:
+    """Feeds minute bars to every tracked strategy and returns the alerts to push.
+
+    Bars are processed in timestamp order; each timestamp re-evaluates only the strategies whose
+    symbols (or VIX) moved, using the latest price of every symbol so far today.
+    """
+
+    def __init__(
+        self,
+        tracked: Sequence[Tuple[Any, Any, MarketData]],
+        day: date,
+        *,
+        confirm_bars: int = 3,
+        min_interval: float = 30 * 60,
+    ) -> None:
+        self.day = day
+        self.confirm_bars = max(1, int(confirm_bars))
+        self.min_interval = float(min_interval)
+        self.watches = [_Watch(strategy, params, data, day) for strategy, params, data in tracked]
+        self.latest: Dict[str, float] = {}
+        self._by_symbol: Dict[str, List[_Watch]] = {}
+        for w in self.watches:
+            for sym in w.symbols + (("^VIX",) if w.needs_vix else ()):
+                self._by_symbol.setdefault(sym, []).append(w)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._by_symbol)
+
+    def feed(self, bars: Mapping[str, Bars]) -> List[Alert]:
+        """Process new bars per symbol (each ascending); returns alerts in time order."""
+        np = require_numpy()
+        symbols = [sym for sym in bars if len(bars[sym][0])]
+        if not symbols:
+            return []
+        ts = np.concatenate([np.asarray(bars[sym][0], dtype=np.int64) for sym in symbols])
+        closes = np.concatenate([np.asarray(bars[sym][1], dtype=np.float64) for sym in symbols])
+        codes = np.repeat(np.arange(len(symbols)), [len(bars[sym][0]) for sym in symbols])
+        order = np.argsort(ts, kind="stable")
+
+        alerts: List[Alert] = []
+        touched: Dict[int, _Watch] = {}
+        current = None
+        for t, code, px in zip(ts[order].tolist(), codes[order].tolist(), closes[order].tolist()):
+            if t != current:
+                alerts.extend(self._evaluate(current, touched))
+                current, touched = t, {}
+            sym = symbols[code]
+            self.latest[sym] = px
+            for w in self._by_symbol.get(sym, ()):
+                touched[id(w)] = w
+        alerts.extend(self._evaluate(current, touched))
+        return alerts
+
+    def _evaluate(self, ts: int | None, touched: Mapping[int, _Watch]) -> List[Alert]:
+        out = []
+        for w in touched.values():
+            prices = [self.latest.get(sym) for sym in w.symbols]
+            if ts is None or any(px is None for px in prices):
+                continue
+            vix = self.latest.get("^VIX") if w.needs_vix else None
+            alert = w.check(self.day, ts, prices, vix, confirm_bars=self.confirm_bars, min_interval=self.min_interval)
+            if alert is not None:
+                out.append(alert)
+        return out
+
+
+def _print_alert(alert: Alert) -> None:
+    print("\n" + "=" * 30)
+    print(alert.title)
+    print(alert.content.replace("<br>", "\n").replace("<b>", "").replace("</b>", ""))
+    print("=" * 30 + "\n")
+
+
+def run_live(
+    monitor: IntradayMonitor,
+    store: MinuteBarStore,
+    *,
+    until: datetime,
+    poll_seconds: float = 60,
+    fetch_timeout: float = FETCH_TIMEOUT_SECONDS,
+    notify: Callable[[Alert], None] = _print_alert,
+) -> None:
+    """Poll minute bars of every monitored symbol until ``until``; new bars go to the store, then the monitor.
+
+    A fetch slower than ``fetch_timeout`` is skipped this round and not re-submitted while it runs.
+    """
+    symbols = monitor.symbols
+    pending: Dict[str, Future] = {}
+    with ThreadPoolExecutor(max_workers=min(8, len(symbols)) or 1, thread_name_prefix="minute") as pool:
+        while True:
+            started = time.monotonic()
+            for sym in symbols:
+                if sym not in pending:
+                    pending[sym] = pool.submit(fetch_minute_bars, sym)
+            wait(list(pending.values()), timeout=fetch_timeout)
+
+            new: Dict[str, Bars] = {}
+            for sym, future in list(pending.items()):
+                if not future.done():
+                    continue
+                del pending[sym]
+                try:
+                    got = future.result()
+                except Exception as e:
+                    print(f">> 获取 {sym} 分钟线失败: {e}")
+                    continue
+                if got is None or got[0] != monitor.day:
+                    continue
+                new[sym] = store.append(monitor.day, sym, got[1], got[2])
+            for alert in monitor.feed(new):
+                notify(alert)
+
+            if datetime.now(until.tzinfo) >= until:
+                return
+            time.sleep(max(0.0, poll_seconds - (time.monotonic() - started)))
+
+
+def replay(monitor: IntradayMonitor, store: MinuteBarStore) -> List[Alert]:
+    """Run a stored day through the monitor in one pass (memory-mapped bars, nothing downloaded)."""
+    return monitor.feed({sym: (b["ts"], b["close"]) for sym in monitor.symbols for b in [store.bars(monitor.day, sym)]})
+
+
+def main() -> None:
+    from .providers import LiveProvider, OfflineProvider
+    from .signal_store import _tracked
+
+    load_env_file()  # PUSHPLUS_TOKEN, INTRADAY_DIR, ... like main.py
+
+    p = argparse.ArgumentParser(description="Watch tracked strategies on minute bars and push when their plan changes.")
+    p.add_argument("--config", default=None, help="JSON list of {strategy, params} to watch (default: every strategy, env params).")
+    p.add_argument("--store-dir", default=None, help=f"Minute bar store directory (default: {default_dir()}; env INTRADAY_DIR).")
+    p.add_argument("--poll", type=float, default=60, help="Seconds between minute-bar polls.")
+    p.add_argument("--fetch-timeout", type=float, default=FETCH_TIMEOUT_SECONDS, help="Seconds to wait for one poll's downloads.")
+    p.add_argument("--confirm-bars", type=int, default=3, help="Bars a new plan must hold before it is pushed.")
+    p.add_argument("--min-interval", type=float, default=30, help="Minutes between two pushes of the same strategy.")
+    p.add_argument("--until", default="16:00", help="Stop polling at this US/Eastern time (HH:MM).")
+    p.add_argument(
+        "--replay",
+        default=None,
+        help="Replay a stored day (YYYY-MM-DD) instead of polling, without network: daily history from "
+        "--data-dir, minute bars from the store; alerts are only printed.",
+    )
+    p.add_argument("--no-push", action="store_true", help="Print alerts instead of sending them with PushPlus.")
+    p.add_argument("--offline", action="store_true", help="Daily history from <data-dir>/<symbol>.csv files instead of downloading.")
+    p.add_argument("--data-dir", default=None, help="With --offline/--replay: directory of date,close CSVs (default: the live data cache).")
+    args = p.parse_args()
+
+    tz = market_tz()
+    day = date.fromisoformat(args.replay) if args.replay else datetime.now(tz).date()
+    provider = OfflineProvider(args.data_dir) if args.offline or args.replay else LiveProvider(deadline_seconds=300)
+    tracked = []
+    for strategy, params in _tracked(args.config):
+        req = strategy.requirements(params)
+        try:
+            data = provider.market_data(req)
+        except (ModuleNotFoundError, ValueError) as e:
+            print(f">> {strategy.key}: {e}")
+            continue
+        if bisect_left(data.dates, day) < req.min_bars:
+            print(f">> {strategy.key}: {', '.join(req.symbols)} 数据不足")
+            continue
+        tracked.append((strategy, params, data))
+    if not tracked:
+        raise SystemExit(1)
+    monitor = IntradayMonitor(tracked, day, confirm_bars=args.confirm_bars, min_interval=args.min_interval * 60)
+    store = MinuteBarStore(args.store_dir)
+
+    if args.replay:
+        started = time.process_time()
+        alerts = replay(monitor, store)
+        for alert in alerts:
+            _print_alert(alert)
+        print(f">> {day}: {len(alerts)} 次信号变化，CPU {time.process_time() - started:.3f}s")
+        return
+
+    if args.no_push:
+        notify = _print_alert
+    else:
+        def push_alert(alert: Alert) -> None:
+            _print_alert(alert)
+            send_push(alert.title, alert.content)
+
+        notify = push_alert
+
+    hour, _, minute = args.until.partition(":")
+    until = datetime.combine(day, dt_time(int(hour), int(minute or 0)), tzinfo=tz)
+    print(f">> 盘中监控 {', '.join(monitor.symbols)}，直到 {until:%H:%M}（美东）")
+    run_live(monitor, store, until=until, poll_seconds=args.poll, fetch_timeout=args.fetch_timeout, notify=notify)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,126 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Sequence, Tuple
 
+from backtest.indicators import RollingMax, RollingMean
 
-def _get_market_data(symbol: str) -> Tuple[Dict[str, float | str] | None, str | None]:
-    try:
-        import yfinance as yf
-    except ModuleNotFoundError:
-        return None, "缺少依赖：yfinance（请先安装：pip install yfinance）"
+from .base import DataRequirements, DcaTerms, MarketData, SignalRow, Signals, dataclass_from_dict, run_strategy
 
-    print(f"正在获取 {symbol} 的数据...")
+MA_WINDOW = 250
 
-    ticker = yf.Ticker(symbol)
-    hist = ticker.history(period="2y")
 
-    if len(hist) < 250:
-        return None, "数据不足，无法计算年线"
+@dataclass(frozen=True)
+class Ma250Params:
+    symbol: str = "QQQ"
+    base_amount: float = 10000
 
-    current_price = float(hist["Close"].iloc[-1])
-    last_date = hist.index[-1].strftime("%Y-%m-%d")
 
-    ma250 = float(hist["Close"].rolling(window=250).mean().iloc[-1])
+def ratio_for(price: float, ma250: float, drawdown: float) -> Tuple[float, str]:
+    if drawdown <= -0.30:
+        return 5.0, "🚨 极度恐慌 (回撤超30%)，钻石坑机会！"
+    if drawdown <= -0.20:
+        return 3.0, "⚠️ 深度回调 (回撤超20%)，加大力度！"
+    if price < ma250:
+        return 2.0, "📉 跌破年线 (MA250)，价值低估区。"
+    return 1.0, "📈 趋势向上 (价格 > 年线)，保持在场。"
 
-    high_52w = float(hist["Close"].tail(250).max())
-    drawdown = (current_price - high_52w) / high_52w
 
-    return {
-        "date": last_date,
-        "price": round(current_price, 2),
-        "ma250": round(ma250, 2),
-        "high": round(high_52w, 2),
-        "drawdown": drawdown,
-    }, None
+class Ma250SignalState:
+    """MA250 and 250-bar high, updated per bar.
 
+    The ratio stays 1.0 until MA_WINDOW bars precede the current one (the historical warm-up of
+    the backtest); `ma250`/`high`/`drawdown` are reported as soon as the window is full.
+    """
 
-def _calculate_strategy(data: Dict[str, float | str], base_amount: float) -> Tuple[float, float, str]:
-    price = float(data["price"])
-    ma250 = float(data["ma250"])
-    dd = float(data["drawdown"])
+    def __init__(self) -> None:
+        self.ma = RollingMean(MA_WINDOW)
+        self.high = RollingMax(MA_WINDOW)
 
-    ratio = 1.0
-    reason = "市场正常 (价格 > 年线)"
+    def update(self, prices: Sequence[float], vix: float | None) -> SignalRow:
+        px = float(prices[0])
+        return self._row(px, self.ma.update(px), self.high.update(px), self.ma.count)
 
-    if dd <= -0.30:
-        ratio = 5.0
-        reason = "🚨 极度恐慌 (回撤超30%)，钻石坑机会！"
-    elif dd <= -0.20:
-        ratio = 3.0
-        reason = "⚠️ 深度回调 (回撤超20%)，加大力度！"
-    elif price < ma250:
-        ratio = 2.0
-        reason = "📉 跌破年线 (MA250)，价值低估区。"
-    else:
-        ratio = 1.0
-        reason = "📈 趋势向上 (价格 > 年线)，保持在场。"
+    def peek(self, prices: Sequence[float], vix: float | None) -> SignalRow:
+        px = float(prices[0])
+        return self._row(px, self.ma.peek(px), self.high.peek(px), self.ma.count + 1)
 
-    buy_amount = base_amount * ratio
-    return ratio, buy_amount, reason
+    @staticmethod
+    def _row(px: float, ma: float | None, high: float | None, count: int) -> SignalRow:
+        drawdown = None if high is None else (px - high) / high
+        ratio = 1.0
+        if ma is not None and drawdown is not None and count > MA_WINDOW:
+            ratio, _reason = ratio_for(px, ma, drawdown)
+        return {
+            "price": px,
+            "ma250": ma,
+            "high": high,
+            "drawdown": drawdown,
+            "base_ratio": ratio,
+            "extra_ratio": 0.0,
+            "pool_fraction": 0.0,
+        }
+
+    def to_dict(self) -> dict:
+        return {"ma": self.ma.to_dict(), "high": self.high.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Ma250SignalState":
+        state = cls()
+        state.ma = RollingMean.from_dict(data["ma"])
+        state.high = RollingMax.from_dict(data["high"])
+        return state
+
+
+class Ma250DrawdownStrategy:
+    key = "ma250_drawdown"
+    error_title = "获取数据失败"
+
+    def default_params(self) -> Ma250Params:
+        return Ma250Params()
+
+    def params_from_env(self, env: Mapping[str, str]) -> Ma250Params:
+        default = self.default_params()
+        return Ma250Params(
+            symbol=(env.get("SYMBOL") or "").strip() or default.symbol,
+            base_amount=float(env.get("BASE_AMOUNT") or default.base_amount),
+        )
+
+    def params_from_dict(self, data: Mapping[str, Any]) -> Ma250Params:
+        return dataclass_from_dict(Ma250Params, data)
+
+    def requirements(self, params: Ma250Params) -> DataRequirements:
+        return DataRequirements(symbols=(params.symbol,), period="2y", min_bars=MA_WINDOW)
+
+    def terms(self, params: Ma250Params) -> DcaTerms:
+        return DcaTerms(monthly_amount=float(params.base_amount), weights=(1.0,))
+
+    def signal_state(self, params: Ma250Params, data: dict | None = None) -> Ma250SignalState:
+        return Ma250SignalState.from_dict(data) if data else Ma250SignalState()
+
+    def render(self, params: Ma250Params, data: MarketData, signals: Signals) -> Dict[str, str]:
+        price = float(signals["price"][-1])
+        ma250 = float(signals["ma250"][-1])
+        dd = float(signals["drawdown"][-1])
+        ratio, reason = ratio_for(price, ma250, dd)
+        amount = params.base_amount * ratio
+
+        title = f"纳斯达克定投信号: {ratio}倍 买入{int(ratio * params.base_amount)}元"
+        content = (
+            f"📅 日期: {data.dates[-1].isoformat()}<br>"
+            f"🧾 标的: {params.symbol}<br>"
+            f"💲 最新价格: ${round(price, 2)}<br>"
+            f"📏 250日年线: ${round(ma250, 2)}<br>"
+            f"📉 当前回撤: {dd * 100:.2f}%<br>"
+            f"-----------------------<br>"
+            f"💡 <b>执行策略: {reason}</b><br>"
+            f"💰 <b>建议买入: {amount} 元</b> (基准{ratio}倍)<br>"
+        )
+        return {"title": title, "content": content}
+
+
+STRATEGY = Ma250DrawdownStrategy()
 
 
 def run(*, base_amount: float = 10000, symbol: str = "QQQ") -> Dict[str, str]:
-    data, err = _get_market_data(symbol)
-    if err:
-        return {"title": "获取数据失败", "content": err}
-
-    ratio, amount, reason = _calculate_strategy(data, base_amount=base_amount)
-    dd_str = f"{float(data['drawdown']) * 100:.2f}%"
-
-    title = f"纳斯达克定投信号: {ratio}倍 买入{int(ratio * base_amount)}元"
-    content = (
-        f"📅 日期: {data['date']}<br>"
-        f"🧾 标的: {symbol}<br>"
-        f"💲 最新价格: ${data['price']}<br>"
-        f"📏 250日年线: ${data['ma250']}<br>"
-        f"📉 当前回撤: {dd_str}<br>"
-        f"-----------------------<br>"
-        f"💡 <b>执行策略: {reason}</b><br>"
-        f"💰 <b>建议买入: {amount} 元</b> (基准{ratio}倍)<br>"
-    )
-    return {"title": title, "content": content}
+    return run_strategy(STRATEGY, Ma250Params(symbol=symbol, base_amount=base_amount))
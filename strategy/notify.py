@@ -0,0 +1,46 @@
+"""Push notifications (PushPlus) shared by main.py and the intraday monitor."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+PUSHPLUS_URL = "http://www.pushplus.plus/send"
+
+
+def load_env_file(filename: str = ".env") -> None:
+    """Load ``KEY=value`` lines from the repo-root .env into os.environ (existing variables win)."""
+    env_path = Path(__file__).resolve().parent.parent / filename
+    if not env_path.exists():
+        return
+
+    for raw_line in env_path.read_text(encoding="utf-8").splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        os.environ.setdefault(key, value)
+
+
+def send_push(title: str, content: str, timeout: float = 10) -> None:
+    """发送微信推送 (使用 PushPlus)；PUSHPLUS_TOKEN 每次调用时读取，未配置时只打印提示。"""
+    token = os.getenv("PUSHPLUS_TOKEN", "").strip()
+    if not token:
+        print(">> 未配置 PushPlus Token，跳过推送")
+        return
+
+    data = {
+        "token": token,
+        "title": title,
+        "content": content,
+        "template": "html",
+    }
+    try:
+        import requests
+
+        r = requests.post(PUSHPLUS_URL, json=data, timeout=timeout)
+        print(f">> 推送结果: {r.text}")
+    except Exception as e:
+        print(f">> 推送失败: {e}")
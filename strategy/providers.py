@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+import time
+
+from .base import FETCH_TIMEOUT_SECONDS, RUN_DEADLINE_SECONDS, DataRequirements, MarketData, align_market_data, load_market_data
+from .data_cache import _cache_path, cache_dir, read_cached
+
+
+class LiveProvider:
+    """Yahoo Finance via `load_market_data` (per-fetch timeouts, cached-bar fallback)."""
+
+    name = "live"
+
+    def __init__(self, *, fetch_timeout: float = FETCH_TIMEOUT_SECONDS, deadline_seconds: float = RUN_DEADLINE_SECONDS) -> None:
+        self.fetch_timeout = float(fetch_timeout)
+        self.deadline_seconds = float(deadline_seconds)
+
+    def market_data(self, req: DataRequirements, period: str | None = None) -> MarketData:
+        if period:
+            req = replace(req, period=period)
+        return load_market_data(req, fetch_timeout=self.fetch_timeout, deadline=time.monotonic() + self.deadline_seconds)
+
+
+class OfflineProvider:
+    """Closes from one ``date,close`` CSV per symbol (the data cache format), no network.
+
+    File names are the symbol with every character other than letters, digits and ``-_.`` replaced
+    by ``_``: ``QQQ.csv``, ``_VIX.csv`` for ``^VIX``. ``period`` is ignored: every bar in the files is
+    returned. Defaults to the live-run cache directory.
+    """
+
+    name = "offline"
+
+    def __init__(self, directory: Path | str | None = None) -> None:
+        self.directory = Path(directory or cache_dir())
+
+    def market_data(self, req: DataRequirements, period: str | None = None) -> MarketData:
+        by_symbol = []
+        for sym in req.symbols:
+            closes = read_cached(sym, self.directory)
+            if not closes:
+                raise ValueError(f"{sym}: 本地没有数据（{_cache_path(sym, self.directory)}）")
+            by_symbol.append(closes)
+        vix = None
+        if req.needs_vix:
+            vix = read_cached("^VIX", self.directory)
+            if not vix:
+                # same as a failed live VIX fetch: the VIX-gated tiers do not trigger
+                print(f">> ^VIX: 本地没有数据（{_cache_path('^VIX', self.directory)}），按无 VIX 计算")
+        return align_market_data(by_symbol, vix)
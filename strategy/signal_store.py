@@ -0,0 +1,242 @@
+"""Precomputed signal rows in SQLite, indexed by (symbol, strategy, price basis, date).
+
+Nightly job (recomputes the full history of every tracked strategy and upserts it, except the
+warm-up bars at the start of the downloaded window)::
+
+    python -m strategy.signal_store --period 20y
+    python -m strategy.signal_store --offline --data-dir .cache/market --config tracked.json
+
+``tracked.json`` is a list of ``{"strategy": key, "params": {...}}``; without it every registered
+strategy is tracked with the parameters `main.py` would use (``params_from_env``).
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+import json
+import math
+import os
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from . import get_strategy, list_strategies
+from .base import MarketData, SignalRow, Signals, compute_signals
+
+
+def default_path() -> Path:
+    """SIGNAL_STORE, else ``.cache/signals.sqlite``; read on every call, so a value main.py loads from .env applies."""
+    env_path = os.getenv("SIGNAL_STORE", "").strip()
+    if env_path and env_path.lower() != "off":
+        return Path(env_path)
+    return Path(__file__).resolve().parent.parent / ".cache" / "signals.sqlite"
+
+
+# ``adjusted`` is the price basis the rows were computed from (1: split/dividend-adjusted closes,
+# as Ticker.history and the live job use; 0: raw closes, as multi-symbol backtests use). Signals
+# differ between the two, so each basis has its own rows.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    symbol TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    adjusted INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (symbol, strategy, adjusted, date)
+) WITHOUT ROWID
+"""
+
+# Stores written before the price basis was recorded only ever held adjusted-close rows.
+_MIGRATE_V1 = """
+ALTER TABLE signals RENAME TO signals_v1;
+{schema};
+INSERT INTO signals (symbol, strategy, adjusted, date, row) SELECT symbol, strategy, 1, date, row FROM signals_v1;
+DROP TABLE signals_v1;
+"""
+
+
+def store_symbol(strategy, params: Any) -> str:
+    """Store key for a strategy's symbols (multi-symbol strategies join them, like `BacktestResult.symbol`)."""
+    return ",".join(strategy.requirements(params).symbols)
+
+
+def _encode(row: SignalRow) -> str:
+    return json.dumps({k: (None if v is None or not math.isfinite(v) else float(v)) for k, v in row.items()})
+
+
+class SignalStore:
+    """One SQLite connection; safe to share between threads (calls are serialized)."""
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path or default_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [r[1] for r in self._conn.execute("PRAGMA table_info(signals)")]
+        if columns and "adjusted" not in columns:
+            self._conn.executescript(_MIGRATE_V1.format(schema=_SCHEMA.strip()))
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> "SignalStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, args: tuple) -> list:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def put(self, strategy_key: str, symbol: str, rows: Iterable[Tuple[date, SignalRow]], *, adjusted: bool = True) -> int:
+        """Upsert signal rows computed from ``adjusted`` (or raw) closes; returns the number written."""
+        data = [(symbol, strategy_key, int(adjusted), d.isoformat(), _encode(row)) for d, row in rows]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO signals (symbol, strategy, adjusted, date, row) VALUES (?, ?, ?, ?, ?)", data
+            )
+        return len(data)
+
+    def put_signals(
+        self, strategy_key: str, symbol: str, dates: Sequence[date], signals: Signals, *, adjusted: bool = True
+    ) -> int:
+        columns = list(signals)
+        rows = ((d, {c: signals[c][i] for c in columns}) for i, d in enumerate(dates))
+        return self.put(strategy_key, symbol, rows, adjusted=adjusted)
+
+    def get(self, strategy_key: str, symbol: str, d: date, *, adjusted: bool = True) -> SignalRow | None:
+        """Row for exactly ``d`` (point lookup)."""
+        hits = self._query(
+            "SELECT row FROM signals WHERE symbol = ? AND strategy = ? AND adjusted = ? AND date = ?",
+            (symbol, strategy_key, int(adjusted), d.isoformat()),
+        )
+        return json.loads(hits[0][0]) if hits else None
+
+    def latest_on_or_before(
+        self, strategy_key: str, symbol: str, d: date, *, adjusted: bool = True
+    ) -> Tuple[date, SignalRow] | None:
+        """Most recent row at or before ``d`` (what the strategy said as of ``d``)."""
+        hits = self._query(
+            "SELECT date, row FROM signals WHERE symbol = ? AND strategy = ? AND adjusted = ? AND date <= ? "
+            "ORDER BY date DESC LIMIT 1",
+            (symbol, strategy_key, int(adjusted), d.isoformat()),
+        )
+        return (date.fromisoformat(hits[0][0]), json.loads(hits[0][1])) if hits else None
+
+    def range(
+        self,
+        strategy_key: str,
+        symbol: str,
+        start: date | None = None,
+        end: date | None = None,
+        *,
+        adjusted: bool = True,
+    ) -> Tuple[List[date], Signals]:
+        """Rows with ``start <= date <= end`` as dates plus columns (range scan on the primary key)."""
+        hits = self._query(
+            "SELECT date, row FROM signals WHERE symbol = ? AND strategy = ? AND adjusted = ? AND date >= ? AND date <= ? "
+            "ORDER BY date",
+            (symbol, strategy_key, int(adjusted), (start or date.min).isoformat(), (end or date.max).isoformat()),
+        )
+        dates: List[date] = []
+        rows: List[Dict[str, float | None]] = []
+        for d, raw in hits:
+            dates.append(date.fromisoformat(d))
+            rows.append(json.loads(raw))
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        return dates, {k: [row.get(k) for row in rows] for k in columns}
+
+    def last_date(self, strategy_key: str, symbol: str, *, adjusted: bool = True) -> date | None:
+        value = self._query(
+            "SELECT MAX(date) FROM signals WHERE symbol = ? AND strategy = ? AND adjusted = ?",
+            (symbol, strategy_key, int(adjusted)),
+        )[0][0]
+        return date.fromisoformat(value) if value else None
+
+
+def materialize(store: SignalStore, strategy, params: Any, data: MarketData, *, adjusted: bool = True) -> int:
+    """Compute signals over ``data`` (``adjusted`` or raw closes) and upsert the rows after the warm-up;
+    returns the number written.
+
+    The first ``min_bars`` rows come from cold rolling windows and depend on where ``data`` starts,
+    so they are never written (a shorter or later window must not overwrite good rows). Data with
+    stale symbols (cached bars served after a failed fetch) is rejected with a ValueError.
+    """
+    if data.stale:
+        raise ValueError(f"not storing signals computed from cached bars of {', '.join(data.stale)}")
+    warmup = strategy.requirements(params).min_bars
+    signals = compute_signals(strategy, params, data.closes, data.vix)
+    signals = {k: v[warmup:] for k, v in signals.items()}
+    return store.put_signals(strategy.key, store_symbol(strategy, params), data.dates[warmup:], signals, adjusted=adjusted)
+
+
+def _tracked(config: str | None) -> List[Tuple[Any, Any]]:
+    if not config:
+        return [(s, s.params_from_env(os.environ)) for s in list_strategies().values()]
+    with open(config, encoding="utf-8") as f:
+        entries = json.load(f)
+    out = []
+    for entry in entries:
+        strategy = get_strategy(entry["strategy"])
+        out.append((strategy, strategy.params_from_dict(entry.get("params") or {})))
+    return out
+
+
+def _history(strategy, params: Any, args) -> Tuple[MarketData, bool]:
+    """Market data to materialize from and whether its closes are adjusted.
+
+    Downloads go through the backtest's history loader, so the stored rows are computed from the
+    same price series (adjusted or raw) that ``run_backtest --signal-store`` reuses them for.
+    Offline files are the live data cache, i.e. adjusted closes.
+    """
+    req = strategy.requirements(params)
+    if args.offline:
+        from .providers import OfflineProvider
+
+        return OfflineProvider(args.data_dir).market_data(req), True
+    from backtest.run_backtest import load_history, uses_adjusted_closes
+
+    dates, closes, vix = load_history(req, args.period)
+    return MarketData(dates=dates, closes=closes, vix=vix), uses_adjusted_closes(req)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Materialize historical signals of tracked strategies into the signal store.")
+    p.add_argument("--store", default=None, help=f"SQLite path (default: {default_path()}; env SIGNAL_STORE).")
+    p.add_argument("--config", default=None, help="JSON list of {strategy, params} to track (default: every strategy, env params).")
+    p.add_argument("--period", default="20y", help="History to download per strategy.")
+    p.add_argument(
+        "--offline",
+        action="store_true",
+        help="Read <data-dir>/<symbol>.csv files (adjusted closes, like the live cache) instead of downloading.",
+    )
+    p.add_argument("--data-dir", default=None, help="With --offline: directory of date,close CSVs (default: the live data cache).")
+    args = p.parse_args()
+
+    failed = 0
+    with SignalStore(args.store) as store:
+        for strategy, params in _tracked(args.config):
+            symbol = store_symbol(strategy, params)
+            try:
+                data, adjusted = _history(strategy, params, args)
+                n = materialize(store, strategy, params, data, adjusted=adjusted)
+            except (ModuleNotFoundError, ValueError) as e:
+                print(f">> {strategy.key} [{symbol}]: {e}")
+                failed += 1
+                continue
+            basis = "adjusted" if adjusted else "raw"
+            print(f">> {strategy.key} [{symbol}]: {n} rows ({basis} closes) through {data.dates[-1] if data.dates else '-'}")
+        print(f">> Signal store: {store.path}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
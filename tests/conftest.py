@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the repo root holds the backtest/ and strategy/ packages (run from anywhere: pytest, python -m pytest)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
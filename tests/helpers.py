@@ -0,0 +1,63 @@
+"""Synthetic market data and result comparison shared by the tests (no network)."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from datetime import date, timedelta
+import math
+import random
+from typing import List, Tuple
+
+import pytest
+
+
+def trading_days(n: int, start: date = date(2010, 1, 4), seed: int = 1, skip: float = 0.03) -> List[date]:
+    """``n`` weekdays from ``start`` with a random ``skip`` share dropped as holidays."""
+    rnd = random.Random(seed)
+    out: List[date] = []
+    d = start
+    while len(out) < n:
+        if d.weekday() < 5 and rnd.random() >= skip:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+def random_walk(n: int, seed: int, start: float = 100.0, drift: float = 0.0003, vol: float = 0.018) -> List[float]:
+    rnd = random.Random(seed)
+    out: List[float] = []
+    px = start
+    for _ in range(n):
+        px *= math.exp(rnd.gauss(drift, vol))
+        out.append(px)
+    return out
+
+
+def market(n: int = 1500, seed: int = 1) -> Tuple[List[date], List[float], List[float], List[float | None]]:
+    """(dates, closes_a, closes_b, vix); ~5% of the VIX values are missing."""
+    dates = trading_days(n, seed=seed)
+    a = random_walk(n, seed + 1)
+    b = random_walk(n, seed + 2, start=50.0, vol=0.025)
+    rnd = random.Random(seed + 3)
+    vix: List[float | None] = []
+    level = 18.0
+    for _ in range(n):
+        level = min(80.0, max(9.0, level + rnd.gauss(0, 1.5)))
+        vix.append(None if rnd.random() < 0.05 else level)
+    return dates, a, b, vix
+
+
+def assert_same_result(actual, expected, rel: float = 1e-9) -> None:
+    """BacktestResults equal up to float rounding (dates, counts and years exactly)."""
+
+    def close(x, y, path):
+        if isinstance(x, dict):
+            assert x.keys() == y.keys(), path
+            for k in x:
+                close(x[k], y[k], f"{path}.{k}")
+        elif isinstance(x, float) and isinstance(y, float):
+            assert x == pytest.approx(y, rel=rel, abs=1e-9), path
+        else:
+            assert x == y, path
+
+    close(asdict(actual), asdict(expected), "result")
@@ -0,0 +1,150 @@
+from datetime import date, timedelta
+import math
+import os
+import random
+import time
+
+import pytest
+
+from backtest import history
+from backtest.align import align, intersect_calendar, ordinal_dates, union_calendar
+from backtest.run_backtest import LoadOptions, _align_closes_and_vix, _load_aligned
+from helpers import random_walk, trading_days
+
+np = pytest.importorskip("numpy")
+
+
+def _series(days, values):
+    return np.array([d.toordinal() for d in days], dtype=np.int64), np.array(values, dtype=np.float64)
+
+
+def _naive(obs_days, obs_values, calendar, limit):
+    """As-of join by scanning: latest observation on or before each day, valid while <= ``limit`` bars old."""
+    out = []
+    for i, c in enumerate(calendar):
+        prior = [k for k, d in enumerate(obs_days) if d <= c]
+        if not prior:
+            out.append(None)
+            continue
+        k = prior[-1]
+        bars_up_to_obs = [j for j, d in enumerate(calendar) if d <= obs_days[k]]
+        age = i - (bars_up_to_obs[-1] if bars_up_to_obs else -1)
+        ok = limit is None or age <= limit
+        if limit == 0:
+            ok = obs_days[k] == c
+        out.append(obs_values[k] if ok and not math.isnan(obs_values[k]) else None)
+    return out
+
+
+@pytest.fixture(scope="module")
+def sparse():
+    """A calendar plus a series that misses some of its days, has weekend prints and a NaN."""
+    rng = random.Random(38)
+    calendar = trading_days(300, seed=2, skip=0.0)
+    days = [d for d in calendar if rng.random() > 0.2]
+    days += [d + timedelta(days=1) for d in calendar if d.weekday() == 4 and rng.random() < 0.3]  # Saturdays
+    days = sorted(set(days))
+    values = random_walk(len(days), seed=4)
+    values[10] = float("nan")
+    return calendar, days, values
+
+
+@pytest.mark.parametrize("limit", [0, 1, 3, None])
+def test_align_matches_a_naive_as_of_join(sparse, limit):
+    calendar, days, values = sparse
+    got = align({"X": _series(days, values)}, [d.toordinal() for d in calendar], ffill_limit=limit)
+    expected = _naive(days, values, calendar, limit)
+    assert [None if not ok else v for ok, v in zip(got.valid[0], got.values[0].tolist())] == expected
+    assert np.isnan(got.values[0][~got.valid[0]]).all()
+
+
+def test_off_calendar_prints_are_never_exact(sparse):
+    calendar, days, values = sparse
+    weekend = [d for d in days if d.weekday() == 5]
+    on_calendar = set(calendar)
+    got = align({"X": _series(weekend, [1.0] * len(weekend))}, [d.toordinal() for d in calendar], ffill_limit=0)
+    assert not got.valid.any()
+    exact = align({"X": _series(days, values)}, [d.toordinal() for d in calendar], ffill_limit=0)
+    assert exact.valid[0].sum() == sum(d in on_calendar and not math.isnan(v) for d, v in zip(days, values))
+
+
+def test_per_symbol_limits(sparse):
+    calendar, days, values = sparse
+    series = {"X": _series(days, values), "Y": _series(days, values)}
+    got = align(series, [d.toordinal() for d in calendar], ffill_limit={"Y": None})
+    assert (got.valid[0] == align({"X": series["X"]}, got.ordinals, 0).valid[0]).all()
+    assert (got.valid[1] == align({"Y": series["Y"]}, got.ordinals, None).valid[0]).all()
+    assert got.row("Y") == 1 and got.dates() == calendar
+
+
+def test_calendars():
+    a = [1, 3, 5, 9]
+    b = [3, 4, 9, 12]
+    assert union_calendar([a, b]).tolist() == [1, 3, 4, 5, 9, 12]
+    assert intersect_calendar([a, b]).tolist() == [3, 9]
+    assert union_calendar([]).tolist() == intersect_calendar([]).tolist() == []
+
+
+def test_ordinal_dates():
+    days = [date(1, 1, 1), date(1969, 12, 31), date(1970, 1, 1), date(2024, 2, 29), date(9999, 12, 31)]
+    ordinals = np.array([d.toordinal() for d in days], dtype=np.int64)
+    assert ordinal_dates(ordinals) == [date.fromordinal(int(o)) for o in ordinals] == days
+    assert all(type(d) is date for d in ordinal_dates(ordinals))
+
+
+def test_history_cache_round_trip(tmp_path):
+    days = trading_days(50)
+    series = _series(days, random_walk(50, seed=1))
+    history.write_cached("^VIX", "20y", series, directory=tmp_path)
+    history.write_cached("^VIX", "20y", (series[0], series[1] * 2), auto_adjust=True, directory=tmp_path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["_VIX-20y-adj.npy", "_VIX-20y.npy"]
+    ordinals, closes = history.read_cached("^VIX", "20y", directory=tmp_path)
+    assert ordinals.dtype == np.int64 and (ordinals == series[0]).all() and (closes == series[1]).all()
+    assert (history.read_cached("^VIX", "20y", auto_adjust=True, directory=tmp_path)[1] == series[1] * 2).all()
+
+    old = time.time() - 2 * history.HISTORY_MAX_AGE_SECONDS
+    os.utime(tmp_path / "_VIX-20y.npy", (old, old))
+    assert history.read_cached("^VIX", "20y", directory=tmp_path) is None
+    assert history.read_cached("^VIX", "20y", max_age=None, directory=tmp_path) is not None
+    assert history.read_cached("QQQ", "20y", directory=tmp_path) is None
+
+
+def test_history_dir_is_read_per_call(tmp_path, monkeypatch):
+    series = _series(trading_days(5), [1.0] * 5)
+    monkeypatch.setenv("HISTORY_CACHE_DIR", str(tmp_path / "a"))
+    assert history.history_dir() == tmp_path / "a"
+    monkeypatch.setenv("HISTORY_CACHE_DIR", str(tmp_path / "b"))
+    history.write_cached("QQQ", "1y", series)
+    assert [p.name for p in (tmp_path / "b").iterdir()] == ["QQQ-1y.npy"]
+    assert history.read_cached("QQQ", "1y") is not None
+
+
+def test_pandas_close_series():
+    pd = pytest.importorskip("pandas")
+    stamps = ["2024-01-03 16:00", "2024-01-02 16:00", "2024-01-03 16:00", "2024-01-04 16:00"]
+    index = pd.to_datetime(stamps).tz_localize("America/New_York")
+    ordinals, closes = history._series(pd.Series([3.0, 2.0, 4.0, float("nan")], index=index))
+    assert ordinal_dates(ordinals) == [date(2024, 1, 2), date(2024, 1, 3)]
+    assert closes.tolist() == [2.0, 4.0]  # sorted, NaN dropped, duplicate day keeps the last print
+
+
+def test_load_aligned_with_preloaded_series(sparse):
+    calendar, days, values = sparse
+    vix_days = days[::3]
+    series = {
+        "A": _series(calendar, random_walk(len(calendar), seed=7)),
+        "B": _series(days, values),
+        "^VIX": _series(vix_days, [20.0] * len(vix_days)),
+    }
+    on_calendar = set(calendar)
+    common = [d for d, v in zip(days, values) if d in on_calendar and not math.isnan(v)]
+
+    closes, vix = _load_aligned(["A", "B"], "^VIX", "20y", LoadOptions(vix_ffill_limit=None), series=series)
+    assert closes.dates() == common and closes.valid.all()
+    assert (vix.ordinals == closes.ordinals).all()
+    assert vix.valid[0].tolist() == [d >= vix_days[0] for d in common]
+
+    dates, lists, vix_list = _align_closes_and_vix(["A", "B"], "^VIX", "20y", LoadOptions(), series=series)
+    assert dates == common and [len(c) for c in lists] == [len(common)] * 2
+    assert lists[1] == [v for d, v in zip(days, values) if d in set(common)]
+    assert [v is not None for v in vix_list] == [d in set(vix_days) for d in common]
@@ -0,0 +1,77 @@
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import pickle
+
+import pytest
+
+from backtest.arena import MarketArena, attach, current_arena, init_worker
+from helpers import market
+
+
+def _worker_sum(name):
+    """Runs in a pool worker: reads one column of the arena mapped by init_worker."""
+    arena = current_arena()
+    col = arena.column(name)
+    return os.getpid(), float(col[~(col != col)].sum()), col.flags.writeable
+
+
+@pytest.fixture()
+def data():
+    return market(300, seed=32)
+
+
+def test_from_market_round_trip(tmp_path, data):
+    dates, a, b, vix = data
+    with MarketArena.from_market(dates, [a, b], vix, {"tier": [float(i % 5) for i in range(len(dates))]}, directory=str(tmp_path)) as arena:
+        assert arena.spec.path.startswith(str(tmp_path))
+        assert len(arena) == len(dates) and arena.dates == dates
+        assert arena.spec.columns == ("close_0", "close_1", "vix", "tier")
+        assert [list(c) for c in arena.closes] == [a, b]
+        assert [None if math.isnan(x) else x for x in arena.vix] == vix  # None is stored as NaN
+        assert "tier" in arena and "close_2" not in arena
+        with pytest.raises(KeyError, match="close_2"):
+            arena.column("close_2")
+        with pytest.raises(ValueError):
+            arena.column("close_0")[0] = 1.0  # views are read-only
+        path = arena.spec.path
+        assert os.path.exists(path)
+    assert not os.path.exists(path)  # the owner removes the file on close
+
+
+def test_attach_by_spec_shares_the_file(tmp_path, data):
+    dates, a, _, _ = data
+    with MarketArena.from_market(dates, [a], directory=str(tmp_path)) as arena:
+        spec = pickle.loads(pickle.dumps(arena.spec))
+        view = attach(spec)
+        assert view is attach(spec)  # mapped once per process
+        assert not view.owner and view.vix is None
+        assert list(view.column("close_0")) == a
+
+
+def test_workers_read_zero_copy_views(tmp_path, data):
+    dates, a, b, vix = data
+    with MarketArena.from_market(dates, [a, b], vix, directory=str(tmp_path)) as arena:
+        with ProcessPoolExecutor(max_workers=2, initializer=init_worker, initargs=(arena.spec,)) as pool:
+            out = list(pool.map(_worker_sum, ["close_0", "close_1", "vix"] * 4))
+    assert {pid for pid, _, _ in out} - {os.getpid()}
+    sums = {name: s for name, (_, s, _) in zip(["close_0", "close_1", "vix"] * 4, out)}
+    assert sums["close_0"] == pytest.approx(sum(a))
+    assert sums["close_1"] == pytest.approx(sum(b))
+    assert sums["vix"] == pytest.approx(sum(x for x in vix if x is not None))
+    assert not any(writeable for _, _, writeable in out)
+
+
+def test_current_arena_needs_init_worker(monkeypatch):
+    monkeypatch.setattr("backtest.arena._CURRENT", None)
+    with pytest.raises(RuntimeError, match="init_worker"):
+        current_arena()
+
+
+def test_rejected_inputs(tmp_path, data):
+    dates, a, _, _ = data
+    with pytest.raises(ValueError, match="close_0"):
+        MarketArena.from_market(dates, [a[:-1]], directory=str(tmp_path))
+    with pytest.raises(ValueError):
+        MarketArena.create([], {"x": []}, directory=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []  # nothing left behind
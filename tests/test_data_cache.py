@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from helpers import random_walk, trading_days
+from strategy import data_cache, get_strategy, run_strategy
+from strategy.base import DataRequirements, load_market_data
+from strategy.data_cache import CACHE_MAX_BARS, Fetch, cache_dir, read_cached, wait_for_refreshes, write_cached
+from strategy.ma250_drawdown import Ma250Params
+
+pd = pytest.importorskip("pandas")
+
+DATES = trading_days(300, seed=33)
+LIVE = {"A": dict(zip(DATES, random_walk(300, seed=1))), "B": dict(zip(DATES, random_walk(300, seed=2)))}
+
+
+class FakeYahoo:
+    """Stands in for `data_cache.history`: serves LIVE, fails or hangs per symbol."""
+
+    def __init__(self, failing=(), hanging=()):
+        self.failing = set(failing)
+        self.hanging = set(hanging)
+        self.release = threading.Event()
+
+    def __call__(self, symbol, period):
+        if symbol in self.hanging:
+            self.release.wait(10)
+        if symbol in self.failing:
+            raise ConnectionError("rate limited")
+        closes = LIVE.get(symbol, {d: 20.0 for d in DATES})
+        return pd.DataFrame({"Close": list(closes.values())}, index=pd.to_datetime(list(closes)))
+
+
+@pytest.fixture()
+def yahoo(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path / "market"))
+    fake = FakeYahoo()
+    monkeypatch.setattr(data_cache, "history", fake)
+    yield fake
+    fake.release.set()
+    wait_for_refreshes(5)
+
+
+def test_cache_dir_is_read_at_call_time(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path / "a"))
+    assert cache_dir() == tmp_path / "a"
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path / "b"))
+    assert cache_dir() == tmp_path / "b"
+    monkeypatch.delenv("DATA_CACHE_DIR")
+    assert cache_dir().parts[-2:] == (".cache", "market")
+
+
+def test_write_merges_and_keeps_the_last_bars(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    days = trading_days(CACHE_MAX_BARS + 50)
+    write_cached("^VIX", {d: 1.0 for d in days[:600]})
+    write_cached("^VIX", {d: 2.0 for d in days[500:]})  # fresh values win on overlap
+    cached = read_cached("^VIX")
+    assert list(cached) == days[-CACHE_MAX_BARS:]
+    assert cached[days[550]] == 2.0 and cached[days[60]] == 1.0
+    assert [p.name for p in tmp_path.iterdir()] == ["_VIX.csv"]
+    assert read_cached("QQQ") == {}
+
+
+def test_live_fetch_refreshes_the_cache(yahoo):
+    data = load_market_data(DataRequirements(symbols=("A", "B"), period="2y", min_bars=1, needs_vix=True))
+    assert data.stale == () and data.dates == DATES
+    assert data.closes == [list(LIVE["A"].values()), list(LIVE["B"].values())]
+    assert read_cached("A") == LIVE["A"] and read_cached("^VIX")[DATES[0]] == 20.0
+
+
+def test_failed_fetch_serves_cached_bars_flagged_stale(yahoo):
+    write_cached("A", dict(list(LIVE["A"].items())[:200]))
+    yahoo.failing.add("A")
+    data = load_market_data(DataRequirements(symbols=("A", "B"), period="2y", min_bars=1))
+    assert data.stale == ("A",)
+    assert data.dates == DATES[:200]  # aligned on the dates both series have
+
+
+def test_timeout_is_bounded_by_the_deadline(yahoo):
+    write_cached("B", LIVE["B"])
+    yahoo.hanging.add("B")
+    t0 = time.monotonic()
+    data = load_market_data(
+        DataRequirements(symbols=("A", "B"), period="2y", min_bars=1), fetch_timeout=30, deadline=t0 + 0.3
+    )
+    assert time.monotonic() - t0 < 2
+    assert data.stale == ("B",) and data.dates == DATES
+
+    # the hung download still lands in the cache afterwards
+    write_cached("B", {DATES[0]: 1.0})
+    yahoo.release.set()
+    assert wait_for_refreshes(5) == 0
+    assert read_cached("B") == LIVE["B"]
+
+
+def test_no_cache_and_no_data_is_an_error(yahoo):
+    yahoo.failing.add("A")
+    with pytest.raises(ValueError, match="A"):
+        load_market_data(DataRequirements(symbols=("A",), period="2y", min_bars=1))
+    yahoo.hanging.add("B")
+    with pytest.raises(ValueError, match="超时"):
+        load_market_data(DataRequirements(symbols=("B",), period="2y", min_bars=1), fetch_timeout=0.1)
+
+
+def test_missing_vix_does_not_fail_the_run(yahoo):
+    yahoo.failing.add("^VIX")
+    data = load_market_data(DataRequirements(symbols=("A",), period="2y", min_bars=1, needs_vix=True))
+    assert data.stale == () and data.vix == [None] * len(DATES)
+
+
+def test_wait_for_refreshes_gives_up_after_the_timeout(yahoo):
+    yahoo.hanging.add("A")
+    fetch = Fetch("A", "2y")
+    assert not fetch.wait(0.05)
+    assert wait_for_refreshes(0.05) == 1
+    yahoo.release.set()
+    assert wait_for_refreshes(5) == 0 and fetch.closes == LIVE["A"]
+
+
+def test_stale_run_is_marked_in_the_push(yahoo):
+    write_cached("A", LIVE["A"])
+    yahoo.failing.add("A")
+    strategy = get_strategy("ma250_drawdown")
+    result = run_strategy(strategy, Ma250Params(symbol="A", base_amount=1000), deadline_seconds=5)
+    assert result["title"].startswith("[缓存数据]")
+    assert "A 使用本地缓存数据" in result["content"]
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from backtest.incremental import CHECKPOINT_VERSION, IncrementalBacktest, iter_chunk_bars
+from backtest.indicators import RollingMax, RollingMean
+from backtest.run_backtest import backtest_market
+from backtest.trading_calendar import Schedule
+from helpers import assert_same_result, market, random_walk
+from strategy.etf_dca_dip_buy import EtfDcaDipBuyParams
+from strategy.ma250_drawdown import Ma250Params
+
+SCHEDULES = [Schedule.monthly(10), Schedule.monthly(28), Schedule("weekly", 2), Schedule("biweekly", 0), Schedule("nth", 3)]
+STRATEGIES = [
+    ("ma250_drawdown", Ma250Params(symbol="A", base_amount=1000)),
+    ("etf_dca_dip_buy", EtfDcaDipBuyParams(etfs=("A", "B"))),
+]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return market(1100, seed=3)
+
+
+def _columns(data, key):
+    dates, a, b, vix = data
+    return dates, ([a] if key == "ma250_drawdown" else [a, b]), (vix if key == "etf_dca_dip_buy" else None)
+
+
+def _chunk(dates, closes, vix, lo, hi):
+    return dates[lo:hi], [c[lo:hi] for c in closes], None if vix is None else vix[lo:hi]
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: f"{s.kind}:{s.day}")
+@pytest.mark.parametrize("key, params", STRATEGIES, ids=[k for k, _ in STRATEGIES])
+def test_checkpointed_run_equals_batch(data, key, params, schedule):
+    dates, closes, vix = _columns(data, key)
+    expected = backtest_market(key, params, dates, closes, vix, [schedule])[0]
+
+    inc = IncrementalBacktest(strategy_key=key, params=params, schedule=schedule)
+    cut = 700
+    inc.append(iter_chunk_bars([_chunk(dates, closes, vix, 0, cut)]))
+    resumed = IncrementalBacktest.from_dict(json.loads(json.dumps(inc.to_dict())))
+    # the new download overlaps the checkpoint: bars already seen are skipped
+    resumed.append(iter_chunk_bars([_chunk(dates, closes, vix, cut - 30, len(dates))]))
+    assert_same_result(resumed.result(), expected)
+
+
+@pytest.mark.parametrize("key, params", STRATEGIES, ids=[k for k, _ in STRATEGIES])
+def test_revised_partial_bar_after_a_checkpoint(data, key, params):
+    dates, closes, vix = _columns(data, key)
+    schedule = Schedule.monthly(10)
+    cut = 600
+    inc = IncrementalBacktest(strategy_key=key, params=params, schedule=schedule)
+    inc.append(iter_chunk_bars([_chunk(dates, closes, vix, 0, cut - 1)]))
+    # the newest bar arrives mid-session with a partial close, far below the final one
+    inc.append([(dates[cut - 1], [c[cut - 1] * 0.5 for c in closes], None if vix is None else vix[cut - 1])])
+    resumed = IncrementalBacktest.from_dict(json.loads(json.dumps(inc.to_dict())))
+    # the next download revises it: the same timestamp with the final close replaces the partial bar
+    assert resumed.append(iter_chunk_bars([_chunk(dates, closes, vix, cut - 1, len(dates))])) == len(dates) - cut
+    assert_same_result(resumed.result(), backtest_market(key, params, dates, closes, vix, [schedule])[0])
+
+
+def test_result_does_not_consume_the_pending_bar(data):
+    dates, closes, vix = _columns(data, "ma250_drawdown")
+    params = STRATEGIES[0][1]
+    inc = IncrementalBacktest(strategy_key="ma250_drawdown", params=params, schedule=Schedule.monthly(10))
+    inc.append(iter_chunk_bars([_chunk(dates, closes, vix, 0, 500)]))
+    partial = inc.result()
+    assert partial == inc.result()
+    assert_same_result(partial, backtest_market("ma250_drawdown", params, dates[:500], [closes[0][:500]], None, [Schedule.monthly(10)])[0])
+    inc.append(iter_chunk_bars([_chunk(dates, closes, vix, 500, len(dates))]))
+    assert_same_result(inc.result(), backtest_market("ma250_drawdown", params, dates, closes, None, [Schedule.monthly(10)])[0])
+
+
+def test_save_and_load(tmp_path, data):
+    dates, closes, vix = _columns(data, "etf_dca_dip_buy")
+    inc = IncrementalBacktest(strategy_key="etf_dca_dip_buy", params=STRATEGIES[1][1], schedule=Schedule("weekly", 0))
+    inc.append(iter_chunk_bars([_chunk(dates, closes, vix, 0, 400)]))
+    path = tmp_path / "state" / "ckpt.json"
+    inc.save(str(path))
+    loaded = IncrementalBacktest.load(str(path))
+    assert loaded.last_date == inc.last_date == dates[399]
+    assert loaded.result() == inc.result()
+
+
+def test_rejected_inputs():
+    with pytest.raises(ValueError):
+        IncrementalBacktest(strategy_key="ma250_drawdown", params=STRATEGIES[0][1], schedule=Schedule("nth", -1))
+    inc = IncrementalBacktest(strategy_key="ma250_drawdown", params=STRATEGIES[0][1], schedule=Schedule.monthly(10))
+    with pytest.raises(ValueError):
+        inc.result()
+    with pytest.raises(ValueError):
+        inc.append([("2024-01-02", [1.0, 2.0], None)])
+    with pytest.raises(ValueError):
+        IncrementalBacktest.from_dict({**inc.to_dict(), "version": CHECKPOINT_VERSION - 1})
+
+
+@pytest.mark.parametrize("cls, reduce", [(RollingMax, max), (RollingMean, lambda xs: sum(xs) / len(xs))])
+def test_rolling_indicators_match_full_window_recomputation(cls, reduce):
+    xs = random_walk(400, seed=9)
+    window = 30
+    ind = cls(window)
+    for i, x in enumerate(xs):
+        got = ind.update(x)
+        if i + 1 < window:
+            assert got is None
+        else:
+            assert got == pytest.approx(reduce(xs[i + 1 - window : i + 1]), rel=1e-12)
+        if i == 200:
+            ind = cls.from_dict(json.loads(json.dumps(ind.to_dict())))
@@ -0,0 +1,128 @@
+from datetime import datetime, timezone
+import json
+
+import pytest
+
+from backtest.indicators import RollingMax, RollingMean
+from helpers import market, random_walk, trading_days
+from strategy import get_strategy
+from strategy.base import MarketData
+from strategy.etf_dca_dip_buy import EtfDcaDipBuyParams
+from strategy.intraday import IntradayMonitor, MinuteBarStore, default_dir, replay
+from strategy.ma250_drawdown import Ma250Params
+
+np = pytest.importorskip("numpy")
+
+PARAMS = EtfDcaDipBuyParams(etfs=("A", "B"))
+
+
+@pytest.mark.parametrize("cls", [RollingMax, RollingMean])
+def test_indicator_peek_equals_update(cls, monkeypatch):
+    monkeypatch.setattr(RollingMean, "RESUM_EVERY", 7)  # include the bars where the running sum is rebuilt
+    ind = cls(20)
+    for x in random_walk(200, seed=39):
+        before = ind.to_dict()
+        peeked = ind.peek(x)
+        assert ind.to_dict() == before
+        assert peeked == ind.update(x)
+
+
+@pytest.mark.parametrize(
+    "key, params",
+    [("ma250_drawdown", Ma250Params(symbol="A", base_amount=1000)), ("etf_dca_dip_buy", PARAMS)],
+)
+def test_signal_state_peek_equals_update(key, params):
+    dates, a, b, vix = market(600, seed=39)
+    closes = [a] if key == "ma250_drawdown" else [a, b]
+    state = get_strategy(key).signal_state(params)
+    for i in range(len(dates)):
+        prices = [c[i] for c in closes]
+        before = json.dumps(state.to_dict())
+        peeked = state.peek(prices, vix[i])
+        assert json.dumps(state.to_dict()) == before
+        assert peeked == state.update(prices, vix[i]), i
+
+
+def test_store_directory_is_read_per_call(tmp_path, monkeypatch):
+    monkeypatch.setenv("INTRADAY_DIR", str(tmp_path / "a"))
+    assert default_dir() == tmp_path / "a"
+    monkeypatch.setenv("INTRADAY_DIR", str(tmp_path / "b"))
+    assert MinuteBarStore().directory == tmp_path / "b"
+
+
+def test_bar_store_is_append_only(tmp_path):
+    store = MinuteBarStore(tmp_path)
+    day = trading_days(1)[0]
+    ts, closes = store.append(day, "^VIX", [60, 120, 180], [20.0, 21.0, 22.0])
+    assert ts.tolist() == [60, 120, 180]
+    # an overlapping download: only the newer bars are stored
+    ts, closes = store.append(day, "^VIX", [120, 180, 240], [0.0, 0.0, 23.0])
+    assert ts.tolist() == [240] and closes.tolist() == [23.0]
+    assert store.append(day, "^VIX", [60], [0.0])[0].tolist() == []
+
+    path = tmp_path / day.isoformat() / "_VIX.bin"
+    with path.open("ab") as f:
+        f.write(b"\x00" * 5)  # a record torn by a crash
+    reopened = MinuteBarStore(tmp_path)
+    assert reopened.last_ts(day, "^VIX") == 240
+    reopened.append(day, "^VIX", [300], [24.0])
+    bars = reopened.bars(day, "^VIX")
+    assert bars["ts"].tolist() == [60, 120, 180, 240, 300]
+    assert bars["close"].tolist() == [20.0, 21.0, 22.0, 23.0, 24.0]
+    assert path.stat().st_size == 5 * 16
+    assert len(reopened.bars(day, "QQQ")) == 0 and reopened.last_ts(day, "QQQ") is None
+
+
+@pytest.fixture()
+def session():
+    """130 flat daily closes (tier 0), then the session day; minute timestamps from 9:30 ET."""
+    days = trading_days(131, skip=0.0)
+    data = MarketData(dates=days[:-1], closes=[[100.0] * 130, [100.0] * 130], vix=[15.0] * 130)
+    day = days[-1]
+    open_ts = int(datetime(day.year, day.month, day.day, 14, 30, tzinfo=timezone.utc).timestamp())
+    return data, day, open_ts
+
+
+def _bars(open_ts, closes):
+    return np.arange(len(closes), dtype=np.int64) * 60 + open_ts, np.array(closes, dtype=np.float64)
+
+
+def test_monitor_debounces_tier_changes(session):
+    data, day, t0 = session
+    monitor = IntradayMonitor([(get_strategy("etf_dca_dip_buy"), PARAMS, data)], day, confirm_bars=3)
+    assert sorted(monitor.symbols) == ["A", "B", "^VIX"]
+    # A dips to -40% for two minutes (not confirmed), then for three (confirmed on the third)
+    a = [100.0, 60.0, 60.0, 100.0, 60.0, 60.0, 60.0, 60.0]
+    alerts = monitor.feed({"A": _bars(t0, a), "B": _bars(t0, [100.0] * len(a)), "^VIX": _bars(t0, [15.0] * len(a))})
+    assert [x.ts for x in alerts] == [t0 + 6 * 60]
+    alert = alerts[0]
+    assert alert.title.startswith("[盘中]") and alert.row["tier"] == 4.0
+    assert "档位4" in alert.content and "资金池50%" in alert.content
+
+    # back to tier 0 three minutes later: confirmed, but within min_interval of the last push
+    assert monitor.feed({"A": _bars(t0 + 8 * 60, [100.0] * 4)}) == []
+
+
+def test_monitor_ignores_partial_bar_in_daily_data(session):
+    data, day, t0 = session
+    with_today = MarketData(
+        dates=data.dates + [day], closes=[c + [50.0] for c in data.closes], vix=data.vix + [15.0]
+    )
+    monitor = IntradayMonitor([(get_strategy("etf_dca_dip_buy"), PARAMS, with_today)], day, confirm_bars=1)
+    assert monitor.feed({"A": _bars(t0, [100.0]), "B": _bars(t0, [100.0]), "^VIX": _bars(t0, [15.0])}) == []
+
+
+def test_replay_equals_feed(session, tmp_path):
+    data, day, t0 = session
+    store = MinuteBarStore(tmp_path)
+    a = [100.0 - i for i in range(40)]
+    bars = {"A": _bars(t0, a), "B": _bars(t0 + 30, [100.0] * 40), "^VIX": _bars(t0, [15.0 + i for i in range(40)])}
+    for sym, (ts, closes) in bars.items():
+        store.append(day, sym, ts, closes)
+
+    def monitor():
+        return IntradayMonitor([(get_strategy("etf_dca_dip_buy"), PARAMS, data)], day, confirm_bars=2, min_interval=0)
+
+    fed = monitor().feed(bars)
+    assert len(fed) >= 2 and fed == sorted(fed, key=lambda x: x.ts)
+    assert replay(monitor(), store) == fed
@@ -0,0 +1,80 @@
+import pytest
+
+from backtest.engine import (
+    backtest_monthly_dca_with_ratios,
+    backtest_two_asset_dca_with_pool,
+    sweep_monthly_dca_with_ratios,
+    sweep_plan,
+    sweep_two_asset_dca_with_pool,
+)
+from backtest.run_backtest import backtest_market
+from backtest.trading_calendar import Schedule
+from helpers import assert_same_result, market
+from strategy.etf_dca_dip_buy import EtfDcaDipBuyParams
+from strategy.ma250_drawdown import Ma250Params
+
+INVEST_DAYS = list(range(1, 29))
+
+
+@pytest.fixture(scope="module")
+def data():
+    return market(1300, seed=11)
+
+
+@pytest.mark.parametrize(
+    "key, params",
+    [("ma250_drawdown", Ma250Params(symbol="A", base_amount=1000)), ("etf_dca_dip_buy", EtfDcaDipBuyParams(etfs=("A", "B")))],
+)
+def test_one_pass_sweep_equals_one_run_per_invest_day(data, key, params):
+    dates, a, b, vix = data
+    closes = [a] if key == "ma250_drawdown" else [a, b]
+    v = vix if key == "etf_dca_dip_buy" else None
+    swept = backtest_market(key, params, dates, closes, v, [Schedule.monthly(d) for d in INVEST_DAYS])
+    assert len(swept) == len(INVEST_DAYS)
+    for d, result in zip(INVEST_DAYS, swept):
+        assert_same_result(result, backtest_market(key, params, dates, closes, v, [Schedule.monthly(d)])[0])
+
+
+def test_mixed_schedules_are_independent_books(data):
+    dates, a, _, _ = data
+    n = len(dates)
+    schedules = [Schedule.monthly(10), Schedule("weekly", 2), Schedule("nth", -1)]
+    kwargs = dict(
+        symbol="A",
+        strategy_key="test",
+        dates=dates,
+        closes=[a],
+        base_ratio=[1.0 + (i % 5) / 10 for i in range(n)],
+        extra_ratio=[0.0] * n,
+        pool_fraction=[0.0] * n,
+        monthly_amount=500.0,
+        weights=(1.0,),
+    )
+    swept = sweep_plan(schedules=schedules, **kwargs)
+    for schedule, result in zip(schedules, swept):
+        assert_same_result(result, sweep_plan(schedules=[schedule], **kwargs)[0])
+    assert swept[1].total_invested > swept[0].total_invested  # weekly invests ~4x as often
+
+
+def test_legacy_wrappers_sweep_like_single_runs(data):
+    dates, a, b, vix = data
+    dd = [0.0] * 130 + [-0.1 if i % 40 < 10 else -0.2 for i in range(len(dates) - 130)]
+    schedules = [Schedule.monthly(d) for d in (1, 15, 28)]
+
+    two = dict(
+        symbols=("A", "B"),
+        strategy_key="etf_dca_dip_buy",
+        dates=dates,
+        closes_a=a,
+        closes_b=b,
+        drawdown_a=dd,
+        drawdown_b=[0.0] * len(dates),
+        vix=vix,
+        monthly_total_usd=900,
+    )
+    for schedule, result in zip(schedules, sweep_two_asset_dca_with_pool(schedules=schedules, **two)):
+        assert_same_result(result, backtest_two_asset_dca_with_pool(schedule=schedule, **two))
+
+    one = dict(symbol="A", strategy_key="ma250_drawdown", dates=dates, closes=a, ratio_for_index=lambda i: 1 + i % 3, base_amount=1000)
+    for schedule, result in zip(schedules, sweep_monthly_dca_with_ratios(schedules=schedules, **one)):
+        assert_same_result(result, backtest_monthly_dca_with_ratios(schedule=schedule, **one))
@@ -0,0 +1,50 @@
+import types
+
+import pytest
+
+import main
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "fetch_seconds, push_seconds, push_timeout, grace",
+    [
+        (5.0, 1.0, 10.0, 54.0),  # fast fetch and push: the rest of the run waits for refreshes
+        (35.0, 2.0, 10.0, 23.0),  # fetch uses its whole budget: the push keeps its 10s, refreshes their 15s+
+        (50.0, 1.0, 1.0, 9.0),  # fetch overran its budget: the push still gets 1s, refreshes what is left
+    ],
+)
+def test_run_deadline_is_shared_by_fetch_push_and_refresh(monkeypatch, fetch_seconds, push_seconds, push_timeout, grace):
+    clock = FakeClock()
+    calls = {}
+
+    def run_strategy(strategy, params, *, fetch_timeout, deadline_seconds, store):
+        calls["deadline_seconds"] = deadline_seconds
+        clock.now += fetch_seconds
+        return {"title": "t", "content": "c"}
+
+    def send_push(title, content, timeout):
+        calls["push_timeout"] = timeout
+        clock.now += push_seconds
+
+    def wait_for_refreshes(timeout):
+        calls["grace"] = timeout
+        return 0
+
+    monkeypatch.setattr(main, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(main, "run_strategy", run_strategy)
+    monkeypatch.setattr(main, "send_push", send_push)
+    monkeypatch.setattr(main, "wait_for_refreshes", wait_for_refreshes)
+    monkeypatch.setattr(main, "RECORD_SIGNALS", False)
+    for name, value in [("RUN_DEADLINE_SECONDS", 60.0), ("PUSH_TIMEOUT_SECONDS", 10.0), ("REFRESH_GRACE_SECONDS", 15.0)]:
+        monkeypatch.setattr(main, name, value)
+
+    main.main()
+    assert calls == {"deadline_seconds": 35.0, "push_timeout": push_timeout, "grace": pytest.approx(grace)}
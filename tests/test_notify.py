@@ -0,0 +1,31 @@
+import os
+import sys
+import types
+
+from strategy import notify
+
+
+def test_send_push_reads_the_token_per_call(monkeypatch, capsys):
+    posted = []
+
+    def post(url, json, timeout):
+        posted.append((url, json, timeout))
+        return types.SimpleNamespace(text="ok")
+
+    monkeypatch.setitem(sys.modules, "requests", types.SimpleNamespace(post=post))
+    monkeypatch.delenv("PUSHPLUS_TOKEN", raising=False)
+    notify.send_push("t", "c")
+    assert posted == [] and "跳过推送" in capsys.readouterr().out
+
+    monkeypatch.setenv("PUSHPLUS_TOKEN", " tok ")
+    notify.send_push("t", "c", timeout=3)
+    assert posted == [(notify.PUSHPLUS_URL, {"token": "tok", "title": "t", "content": "c", "template": "html"}, 3)]
+
+
+def test_env_file_does_not_override(tmp_path, monkeypatch):
+    monkeypatch.setattr(notify, "__file__", str(tmp_path / "strategy" / "notify.py"))
+    (tmp_path / ".env").write_text("# comment\nA_KEY='from file'\nB_KEY = \"from file\"\nbad line\n", encoding="utf-8")
+    monkeypatch.setenv("A_KEY", "from env")
+    monkeypatch.delenv("B_KEY", raising=False)
+    notify.load_env_file()
+    assert (os.environ["A_KEY"], os.environ["B_KEY"]) == ("from env", "from file")
@@ -0,0 +1,128 @@
+import json
+import math
+import statistics
+
+import pytest
+
+from backtest.engine import RiskAccumulator, sweep_plan
+from backtest.trading_calendar import Schedule
+from helpers import market, random_walk, trading_days
+
+
+def _curve(n=900, seed=5):
+    """(date, value before flow, value after flow) of a DCA-like portfolio: 1000 in every ~21 bars."""
+    dates = trading_days(n, seed=seed)
+    prices = random_walk(n, seed)
+    shares = 0.0
+    out = []
+    for i, (d, px) in enumerate(zip(dates, prices)):
+        before = shares * px
+        if i % 21 == 0:
+            shares += 1000.0 / px
+        out.append((d, before, shares * px))
+    return out
+
+
+def _reference(curve, periods_per_year=252):
+    """Batch recomputation over the full curve, the way the metrics are defined."""
+    rets, navs, days = [], [], []
+    last, nav = 0.0, 1.0
+    first_day = None
+    for d, before, after in curve:
+        if last > 0:
+            r = before / last - 1.0
+            nav *= 1.0 + r
+            rets.append((d, r))
+            navs.append(nav)
+            days.append(d)
+        elif first_day is None and after > 0:
+            first_day = d
+        last = after
+
+    peak, peak_day, max_dd, underwater = 1.0, first_day, 0.0, 0
+    for d, v in zip(days, navs):
+        if v >= peak:
+            peak, peak_day = v, d
+        else:
+            max_dd = min(max_dd, v / peak - 1.0)
+            underwater = max(underwater, (d - peak_day).days)
+
+    years = {}
+    for d, r in rets:
+        years[d.year] = years.get(d.year, 1.0) * (1.0 + r)
+    worst_year = min(years, key=lambda y: years[y])
+
+    values = [r for _, r in rets]
+    mean, std = statistics.fmean(values), statistics.stdev(values)
+    downside = math.sqrt(sum(r * r for r in values if r < 0) / len(values))
+    return {
+        "max_drawdown": max_dd,
+        "max_underwater_days": underwater,
+        "annualized_volatility": std * math.sqrt(periods_per_year),
+        "sharpe": mean / std * math.sqrt(periods_per_year),
+        "sortino": mean / downside * math.sqrt(periods_per_year),
+        "worst_year": worst_year,
+        "worst_year_return": years[worst_year] - 1.0,
+    }
+
+
+def test_streaming_metrics_match_batch_recomputation():
+    curve = _curve()
+    acc = RiskAccumulator()
+    for point in curve:
+        acc.update(*point)
+    got = acc.finalize()
+    want = _reference(curve)
+    for field, value in want.items():
+        assert getattr(got, field) == pytest.approx(value, rel=1e-9), field
+
+
+def test_contributions_are_not_returns():
+    # flat prices: every new contribution raises the value, but the time-weighted NAV never moves
+    acc = RiskAccumulator()
+    for i, d in enumerate(trading_days(300)):
+        value = 1000.0 * (i // 21 + 1)
+        before = value - (1000.0 if i % 21 == 0 else 0.0)
+        acc.update(d, before, value)
+    risk = acc.finalize()
+    assert risk.max_drawdown == 0.0
+    assert risk.max_underwater_days == 0
+    assert risk.annualized_volatility == 0.0
+    assert risk.sharpe is None and risk.sortino is None
+
+
+def test_checkpoint_round_trip_continues_the_same_statistics():
+    curve = _curve()
+    whole = RiskAccumulator()
+    for point in curve:
+        whole.update(*point)
+
+    first = RiskAccumulator()
+    for point in curve[:400]:
+        first.update(*point)
+    resumed = RiskAccumulator.from_dict(json.loads(json.dumps(first.to_dict())))
+    for point in curve[400:]:
+        resumed.update(*point)
+    assert resumed.finalize() == whole.finalize()
+
+
+def test_backtest_results_carry_risk_metrics():
+    dates, a, _, _ = market(800)
+    n = len(dates)
+    result = sweep_plan(
+        symbol="A",
+        strategy_key="test",
+        dates=dates,
+        closes=[a],
+        base_ratio=[1.0] * n,
+        extra_ratio=[0.0] * n,
+        pool_fraction=[0.0] * n,
+        monthly_amount=1000.0,
+        weights=(1.0,),
+        schedules=[Schedule.monthly(10)],
+    )[0]
+    risk = result.risk
+    assert risk is not None
+    assert -1.0 < risk.max_drawdown <= 0.0
+    assert risk.annualized_volatility > 0
+    assert risk.worst_year in {d.year for d in dates}
@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+import json
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from helpers import market
+from backtest import run_backtest
+from backtest.trading_calendar import Schedule
+from server import SignalServer, SignalService, TTLCache, offline_history, params_from_query
+from strategy import get_strategy
+from strategy.base import DataRequirements
+from strategy.etf_dca_dip_buy import EtfDcaDipBuyParams
+from strategy.providers import OfflineProvider
+
+
+def _write(directory, name, dates, values):
+    rows = ["date,close"] + [f"{d.isoformat()},{v!r}" for d, v in zip(dates, values) if v is not None]
+    (directory / name).write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+
+@pytest.fixture()
+def data_dir(tmp_path):
+    dates, a, b, vix = market(400, seed=34)
+    _write(tmp_path, "A.csv", dates, a)
+    _write(tmp_path, "B.csv", dates, b)
+    _write(tmp_path, "_VIX.csv", dates, vix)
+    return tmp_path
+
+
+class CountingProvider(OfflineProvider):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = 0
+
+    def market_data(self, req, period=None):
+        self.calls += 1
+        time.sleep(0.05)  # long enough for concurrent requests to overlap
+        return super().market_data(req, period)
+
+
+def test_concurrent_misses_compute_once():
+    cache = TTLCache(ttl=60)
+    calls = []
+    gate = threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(cache.get_or_compute, "k", compute) for _ in range(8)]
+        time.sleep(0.1)
+        gate.set()
+        values = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert all(v is values[0] for v in values)
+    assert cache.get_or_compute("k", lambda: "recomputed") is values[0]
+
+
+def test_entries_expire_and_failures_are_not_cached():
+    cache = TTLCache(ttl=0.05)
+    assert cache.get_or_compute("k", lambda: 1) == 1
+    assert cache.get_or_compute("k", lambda: 2) == 1
+    time.sleep(0.1)
+    assert cache.get_or_compute("k", lambda: 3) == 3
+
+    def boom():
+        raise ValueError("down")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("e", boom)
+    assert cache.get_or_compute("e", lambda: "ok") == "ok"
+
+
+def test_cache_is_bounded():
+    cache = TTLCache(ttl=60, max_entries=3)
+    for k in range(10):
+        cache.get_or_compute(k, lambda k=k: k)
+    assert len(cache._values) == 3 and cache.get_or_compute(9, lambda: None) == 9
+
+
+def test_offline_provider_file_names(data_dir):
+    data = OfflineProvider(data_dir).market_data(DataRequirements(symbols=("A", "B"), period="2y", min_bars=1, needs_vix=True))
+    assert len(data.dates) == 400 and data.stale == ()
+    assert data.vix == market(400, seed=34)[3]  # ``^VIX`` is read from _VIX.csv; dates without a row are None
+
+
+def test_offline_provider_missing_files(data_dir, capsys):
+    (data_dir / "_VIX.csv").unlink()
+    data = OfflineProvider(data_dir).market_data(DataRequirements(symbols=("A",), period="2y", min_bars=1, needs_vix=True))
+    assert data.vix == [None] * len(data.dates)
+    assert "_VIX.csv" in capsys.readouterr().out
+    with pytest.raises(ValueError, match="QQQ.csv"):
+        OfflineProvider(data_dir).market_data(DataRequirements(symbols=("QQQ",), period="2y", min_bars=1))
+
+
+def test_params_from_query():
+    strategy = get_strategy("etf_dca_dip_buy")
+    params = params_from_query(strategy, {"etfs": ["A, B"], "monthly_total_usd": ["900"], "strategy": ["x"]})
+    assert params.etfs == ("A", "B") and params.monthly_total_usd == 900.0
+    with pytest.raises(ValueError, match="nope"):
+        params_from_query(strategy, {"nope": ["1"]})
+    params = params_from_query(strategy, {"thresholds.tier2_dd": ["-0.2"], "thresholds.tier1_dd_floor": ["-0.19"]})
+    assert (params.thresholds.tier2_dd, params.thresholds.tier1_dd_floor, params.thresholds.tier3_dd) == (-0.2, -0.19, -0.25)
+    with pytest.raises(ValueError, match="thresholds.tier1_dd"):
+        params_from_query(strategy, {"thresholds": ["x"]})
+
+
+@pytest.fixture()
+def server(data_dir):
+    provider = CountingProvider(data_dir)
+    srv = SignalServer(("127.0.0.1", 0), SignalService(provider, history=offline_history(provider)))
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, provider
+    srv.shutdown()
+    srv.server_close()
+
+
+def _get(srv, path):
+    try:
+        with urlopen(f"http://127.0.0.1:{srv.server_port}{path}", timeout=10) as r:
+            return r.status, json.loads(r.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_identical_requests_compute_once(server):
+    srv, provider = server
+    path = "/signal?strategy=etf_dca_dip_buy&etfs=A,B"
+    with ThreadPoolExecutor(6) as pool:
+        responses = list(pool.map(lambda _: _get(srv, path), range(6)))
+    assert provider.calls == 1
+    assert all(r == responses[0] for r in responses)
+    status, body = responses[0]
+    assert status == 200 and body["params"]["etfs"] == ["A", "B"] and body["title"]
+    assert set(body["signal"]) >= {"tier", "base_ratio", "extra_ratio", "pool_fraction"}
+
+
+def test_backtest_shares_the_data_cache(server):
+    srv, provider = server
+    status, body = _get(srv, "/backtest?strategy=etf_dca_dip_buy&etfs=A,B&schedule=monthly:10&schedule=weekly:2")
+    assert status == 200
+    assert [r["schedule"] for r in body["results"]] == [{"kind": "monthly", "day": 10}, {"kind": "weekly", "day": 2}]
+    assert body["results"][0]["total_invested"] > 0
+    _get(srv, "/backtest?strategy=etf_dca_dip_buy&etfs=A,B&schedule=monthly:10&schedule=weekly:2")
+    assert provider.calls == 1
+    # a different query still reuses the loaded market data
+    _get(srv, "/backtest?strategy=etf_dca_dip_buy&etfs=A,B&schedule=nth:1")
+    assert provider.calls == 1
+
+
+class NoProvider:
+    name = "none"
+
+    def market_data(self, req, period=None):
+        raise AssertionError("backtests must not read the signal provider")
+
+
+def test_backtest_loads_history_like_run_backtest(monkeypatch):
+    np = pytest.importorskip("numpy")
+    dates, a, b, vix = market(400, seed=34)
+    ordinals = np.array([d.toordinal() for d in dates], dtype=np.int64)
+    raw = {"A": np.array(a), "B": np.array(b), "^VIX": np.array([20.0 if v is None else v for v in vix])}
+    bars = {"20y": 400, "3mo": 60}
+    loads = []
+
+    def load_closes(symbols, period="20y", *, auto_adjust=False, max_age=None, directory=None):
+        loads.append((tuple(symbols), period, auto_adjust))
+        return {s: (ordinals[-bars[period]:], raw[s][-bars[period]:]) for s in symbols}
+
+    monkeypatch.setattr(run_backtest, "load_closes", load_closes)
+    service = SignalService(NoProvider())
+    params = EtfDcaDipBuyParams(etfs=("A", "B"))
+    schedules = [Schedule.monthly(10)]
+    body = service.backtest("etf_dca_dip_buy", params, schedules, "20y")
+    assert loads == [(("A", "B", "^VIX"), "20y", False)]  # raw closes, like run_backtest
+    assert body["adjusted"] is False and "stale" not in body
+
+    req = get_strategy("etf_dca_dip_buy").requirements(params)
+    expected = run_backtest.backtest_market("etf_dca_dip_buy", params, *run_backtest.load_history(req, "20y"), schedules)
+    assert body["results"] == [{"schedule": schedules[0], **asdict(expected[0])}]
+
+    with pytest.raises(ValueError, match="60 common bars over 3mo, need 126"):
+        service.backtest("etf_dca_dip_buy", params, schedules, "3mo")
+
+
+def test_errors(server):
+    srv, _ = server
+    assert _get(srv, "/health") == (200, {"status": "ok", "provider": "offline"})
+    assert _get(srv, "/nope")[0] == 404
+    assert _get(srv, "/signal?strategy=nope")[0] == 404
+    assert _get(srv, "/signal?strategy=etf_dca_dip_buy&etfs=A,QQQ")[0] == 400
+    assert _get(srv, "/signal?strategy=etf_dca_dip_buy&etfs=A,B&date=2012-01-02")[0] == 400  # no signal store
+    assert _get(srv, "/strategies")[1]["etf_dca_dip_buy"]["etfs"] == list(EtfDcaDipBuyParams().etfs)
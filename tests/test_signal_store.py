@@ -0,0 +1,241 @@
+from dataclasses import replace
+from datetime import date, timedelta
+import json
+import math
+from pathlib import Path
+import subprocess
+import sqlite3
+import sys
+
+import pytest
+
+from backtest import run_backtest
+from backtest.run_backtest import _backtest_strategy, _stored_signals
+from backtest.trading_calendar import Schedule
+from helpers import assert_same_result, market
+from server import SignalService
+from strategy import get_strategy
+from strategy.base import MarketData, compute_signals
+from strategy.etf_dca_dip_buy import HIGH_6M_WINDOW, EtfDcaDipBuyParams
+from strategy.ma250_drawdown import MA_WINDOW, Ma250Params
+from strategy.providers import OfflineProvider
+from strategy import signal_store
+from strategy.signal_store import SignalStore, default_path, materialize, store_symbol
+
+REPO = Path(__file__).resolve().parent.parent
+PARAMS = EtfDcaDipBuyParams(etfs=("A", "B"))
+WARMUP = HIGH_6M_WINDOW  # leading rows materialize() does not store
+
+
+@pytest.fixture(scope="module")
+def data():
+    dates, a, b, vix = market(500, seed=35)
+    return MarketData(dates=dates, closes=[a, b], vix=vix)
+
+
+@pytest.fixture()
+def store(tmp_path):
+    with SignalStore(tmp_path / "nested" / "signals.sqlite") as s:
+        yield s
+
+
+def _same(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+
+def test_materialized_rows_equal_recomputed_signals(store, data):
+    strategy = get_strategy("etf_dca_dip_buy")
+    assert materialize(store, strategy, PARAMS, data) == len(data.dates) - WARMUP
+    expected = compute_signals(strategy, PARAMS, data.closes, data.vix)
+    symbol = store_symbol(strategy, PARAMS)
+    assert symbol == "A,B"
+
+    dates, signals = store.range(strategy.key, symbol)
+    assert dates == data.dates[WARMUP:] and set(signals) == set(expected)
+    for k, column in expected.items():
+        assert all(_same(x, y) for x, y in zip(signals[k], column[WARMUP:])), k
+
+    i = 321
+    row = store.get(strategy.key, symbol, data.dates[i])
+    assert row == {k: v[i - WARMUP] for k, v in signals.items()}
+    assert store.last_date(strategy.key, symbol) == data.dates[-1]
+
+
+def test_point_and_range_lookups(store, data):
+    strategy = get_strategy("etf_dca_dip_buy")
+    materialize(store, strategy, PARAMS, data)
+    d = data.dates[WARMUP + 100]
+    gap = d + timedelta(days=1)
+    while gap in data.dates:
+        gap += timedelta(days=1)
+    assert store.get(strategy.key, "A,B", gap) is None
+    previous = max(x for x in data.dates if x < gap)
+    assert store.latest_on_or_before(strategy.key, "A,B", gap)[0] == previous
+    assert store.latest_on_or_before(strategy.key, "A,B", data.dates[WARMUP - 1]) is None
+
+    dates, signals = store.range(strategy.key, "A,B", data.dates[WARMUP + 10], data.dates[WARMUP + 19])
+    assert dates == data.dates[WARMUP + 10 : WARMUP + 20] and all(len(v) == 10 for v in signals.values())
+    assert store.range(strategy.key, "C", None, None) == ([], {})
+    assert store.last_date("ma250_drawdown", "A,B") is None
+
+
+def test_shorter_or_stale_windows_keep_good_rows(store):
+    # the reviewer's case: a later, shorter window (offline cache, moving --period) used to
+    # overwrite warm rows with cold ones (ma250=None, base_ratio=1.0)
+    strategy = get_strategy("ma250_drawdown")
+    params = Ma250Params(symbol="A")
+    dates, a, _b, _vix = market(1200, seed=35)
+    full = MarketData(dates=dates, closes=[a])
+    materialize(store, strategy, params, full)
+    before = store.range(strategy.key, "A")
+    assert before[0] == dates[MA_WINDOW:] and None not in before[1]["ma250"]
+
+    assert materialize(store, strategy, params, MarketData(dates=dates[300:], closes=[a[300:]])) == 900 - MA_WINDOW
+    after = store.range(strategy.key, "A")
+    assert after[0] == before[0]
+    for k in ("ma250", "base_ratio", "high"):
+        assert after[1][k] == pytest.approx(before[1][k], rel=1e-12), k
+
+    with pytest.raises(ValueError, match="cached bars of A"):
+        materialize(store, strategy, params, replace(full, closes=[[x * 2 for x in a]], stale=("A",)))
+    assert store.range(strategy.key, "A")[1]["price"] == after[1]["price"]
+
+
+def test_upsert_replaces_rows_and_non_finite_values_are_null(store):
+    d = date(2024, 1, 2)
+    store.put("s", "X", [(d, {"tier": 1.0, "vix": float("nan")})])
+    store.put("s", "X", [(d, {"tier": 2.0, "vix": None})])
+    assert store.range("s", "X") == ([d], {"tier": [2.0], "vix": [None]})
+
+
+def test_default_path_reads_the_environment_per_call(monkeypatch, tmp_path):
+    monkeypatch.setenv("SIGNAL_STORE", str(tmp_path / "a.sqlite"))
+    assert default_path() == tmp_path / "a.sqlite"
+    for value in ("off", "OFF", ""):
+        monkeypatch.setenv("SIGNAL_STORE", value)
+        assert default_path().parts[-2:] == (".cache", "signals.sqlite")
+    monkeypatch.setenv("SIGNAL_STORE", str(tmp_path / "b.sqlite"))
+    with SignalStore() as s:
+        assert s.path == tmp_path / "b.sqlite" and s.path.exists()
+
+
+def test_service_serves_stored_signals(store, data):
+    strategy = get_strategy("etf_dca_dip_buy")
+    materialize(store, strategy, PARAMS, data, adjusted=False)  # multi-symbol backtests use raw closes
+    service = SignalService(OfflineProvider("unused"), store=store)
+    hit = service.stored_signal(strategy.key, PARAMS, data.dates[WARMUP + 50])
+    assert hit["date"] == data.dates[WARMUP + 50] and hit["symbol"] == "A,B" and hit["adjusted"] is False
+    window = service.stored_signals(strategy.key, PARAMS, data.dates[WARMUP + 5], None)
+    assert window["dates"] == data.dates[WARMUP + 5 :]
+    with pytest.raises(KeyError):
+        service.stored_signal(strategy.key, PARAMS, data.dates[WARMUP - 1])
+
+
+def test_nightly_job_offline(tmp_path, data):
+    csv_dir = tmp_path / "market"
+    csv_dir.mkdir()
+    for name, values in (("A", data.closes[0]), ("B", data.closes[1]), ("_VIX", data.vix)):
+        rows = [f"{d.isoformat()},{v!r}" for d, v in zip(data.dates, values) if v is not None]
+        (csv_dir / f"{name}.csv").write_text("date,close\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    config = tmp_path / "tracked.json"
+    config.write_text(json.dumps([{"strategy": "etf_dca_dip_buy", "params": {"etfs": ["A", "B"]}}]), encoding="utf-8")
+    db = tmp_path / "signals.sqlite"
+    cmd = [sys.executable, "-m", "strategy.signal_store", "--offline", "--data-dir", str(csv_dir), "--config", str(config), "--store", str(db)]
+    proc = subprocess.run(cmd, cwd=REPO, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    with SignalStore(db) as s:
+        assert s.last_date("etf_dca_dip_buy", "A,B") == data.dates[-1]
+
+    config.write_text(json.dumps([{"strategy": "ma250_drawdown", "params": {"symbol": "QQQ"}}]), encoding="utf-8")
+    assert subprocess.run(cmd, cwd=REPO, capture_output=True, text=True).returncode == 1  # no QQQ.csv
+
+
+@pytest.fixture()
+def history(monkeypatch):
+    """Raw closes of A, B and ^VIX behind `run_backtest.load_closes`; adjusted closes drift away from them."""
+    np = pytest.importorskip("numpy")
+    dates, a, b, vix = market(700, seed=35)
+    ordinals = np.array([d.toordinal() for d in dates], dtype=np.int64)
+    raw = {"A": np.array(a), "B": np.array(b), "^VIX": np.array([20.0 if v is None else v for v in vix])}
+    factor = np.linspace(0.7, 1.0, len(dates))  # dividends: older adjusted closes are scaled down more
+
+    def load_closes(symbols, period="20y", *, auto_adjust=False, max_age=None, directory=None):
+        return {s: (ordinals, raw[s] * factor if auto_adjust and s != "^VIX" else raw[s]) for s in symbols}
+
+    monkeypatch.setattr(run_backtest, "load_closes", load_closes)
+    return dates
+
+
+def _nightly(monkeypatch, tmp_path, tracked):
+    config = tmp_path / "tracked.json"
+    config.write_text(json.dumps(tracked), encoding="utf-8")
+    db = tmp_path / "signals.sqlite"
+    monkeypatch.setattr(sys, "argv", ["signal_store", "--config", str(config), "--store", str(db)])
+    signal_store.main()
+    return db
+
+
+@pytest.mark.parametrize(
+    "key, params",
+    [("etf_dca_dip_buy", PARAMS), ("ma250_drawdown", Ma250Params(symbol="A", base_amount=1000))],
+)
+def test_stored_signal_backtest_equals_computed(history, monkeypatch, tmp_path, capsys, key, params):
+    raw = {"etf_dca_dip_buy": {"etfs": ["A", "B"]}, "ma250_drawdown": {"symbol": "A", "base_amount": 1000}}[key]
+    db = _nightly(monkeypatch, tmp_path, [{"strategy": key, "params": raw}])
+    basis = "raw" if key == "etf_dca_dip_buy" else "adjusted"
+    assert f"({basis} closes)" in capsys.readouterr().out
+
+    schedules = [Schedule.monthly(10), Schedule.parse("weekly:2")]
+    computed = _backtest_strategy(key, params, schedules, "20y")
+    with SignalStore(db) as s:
+        stored = _backtest_strategy(key, params, schedules, "20y", store=s)
+    assert "signals read from" in capsys.readouterr().out
+    for x, y in zip(stored, computed):
+        assert_same_result(x, y)
+
+
+def test_stored_signals_skip_rows_of_another_basis_or_start(history, store, capsys):
+    strategy = get_strategy("etf_dca_dip_buy")
+    req = strategy.requirements(PARAMS)
+    dates, closes, vix = run_backtest.load_history(req, "20y")
+    adjusted = run_backtest.load_history(req, "20y", series=run_backtest.load_closes(["A", "B", "^VIX"], auto_adjust=True))
+    materialize(store, strategy, PARAMS, MarketData(dates=adjusted[0], closes=adjusted[1], vix=adjusted[2]), adjusted=True)
+    _backtest_strategy(strategy.key, PARAMS, [Schedule.monthly(10)], "20y", store=store)
+    assert "not fully covered by" in capsys.readouterr().out
+
+    # a backtest window starting after the materialized one: its own warm-up is recomputed
+    materialize(store, strategy, PARAMS, MarketData(dates=dates, closes=closes, vix=vix), adjusted=False)
+    tail = [c[200:] for c in closes]
+    got = _stored_signals(store, strategy.key, PARAMS, dates[200:], tail, vix[200:])
+    expected = compute_signals(strategy, PARAMS, tail, vix[200:])
+    for k, column in got.items():
+        assert all(_same(x, y) for x, y in zip(column, expected[k])), k
+
+
+def test_signal_store_flag_of_the_backtest_cli(history, monkeypatch, tmp_path, capsys):
+    db = _nightly(monkeypatch, tmp_path, [{"strategy": "etf_dca_dip_buy", "params": {"etfs": ["A", "B"]}}])
+    capsys.readouterr()
+    printed = []
+    for extra in ([], ["--signal-store", str(db)]):
+        monkeypatch.setattr(sys, "argv", ["run_backtest", "--strategy", "etf_dca_dip_buy", "--symbols", "A,B", *extra])
+        run_backtest.main()
+        out = capsys.readouterr().out
+        printed.append(out[out.index("== Backtest =="):])
+    assert printed[0] == printed[1] and "signals read from" in out
+
+
+def test_stores_without_a_price_basis_are_migrated(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE signals (symbol TEXT NOT NULL, strategy TEXT NOT NULL, date TEXT NOT NULL, "
+        "row TEXT NOT NULL, PRIMARY KEY (symbol, strategy, date)) WITHOUT ROWID"
+    )
+    conn.execute("INSERT INTO signals VALUES ('A', 's', '2024-01-02', '{\"tier\": 1.0}')")
+    conn.commit()
+    conn.close()
+    with SignalStore(path) as s:
+        assert s.get("s", "A", date(2024, 1, 2)) == {"tier": 1.0}
+        assert s.get("s", "A", date(2024, 1, 2), adjusted=False) is None
+    with SignalStore(path) as s:  # reopening does not migrate again
+        assert s.range("s", "A") == ([date(2024, 1, 2)], {"tier": [1.0]})
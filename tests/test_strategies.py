@@ -0,0 +1,136 @@
+from dataclasses import asdict, replace
+from datetime import date
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from helpers import market, trading_days
+from strategy import get_strategy, list_strategies
+from strategy.base import PLAN_COLUMNS, MarketData, compute_signals, render_latest
+from strategy import etf_dca_dip_buy
+from strategy.etf_dca_dip_buy import DEFAULT_TIER_THRESHOLDS, TIERS, EtfDcaDipBuyParams
+from strategy.ma250_drawdown import Ma250Params
+
+REPO = Path(__file__).resolve().parent.parent
+CASES = [
+    ("ma250_drawdown", Ma250Params(symbol="A", base_amount=1000)),
+    ("etf_dca_dip_buy", EtfDcaDipBuyParams(etfs=("A", "B"))),
+]
+
+
+def _inputs(key, n=700):
+    dates, a, b, vix = market(n, seed=31)
+    return dates, ([a] if key == "ma250_drawdown" else [a, b]), (vix if key == "etf_dca_dip_buy" else None)
+
+
+def test_registry():
+    assert set(list_strategies()) == {"ma250_drawdown", "etf_dca_dip_buy"}
+    assert get_strategy(" etf_dca_dip_buy ").key == "etf_dca_dip_buy"
+    with pytest.raises(KeyError, match="Available"):
+        get_strategy("nope")
+
+
+@pytest.mark.parametrize("key, params", CASES, ids=[k for k, _ in CASES])
+def test_batch_signals_equal_per_bar_state_across_a_checkpoint(key, params):
+    strategy = get_strategy(key)
+    dates, closes, vix = _inputs(key)
+    batch = compute_signals(strategy, params, closes, vix)
+    assert all(len(batch[c]) == len(dates) for c in PLAN_COLUMNS)
+
+    state = strategy.signal_state(params)
+    for i in range(len(dates)):
+        if i == 400:
+            state = strategy.signal_state(params, json.loads(json.dumps(state.to_dict())))
+        row = state.update([c[i] for c in closes], None if vix is None else vix[i])
+        assert row == {k: v[i] for k, v in batch.items()}, i
+
+
+@pytest.mark.parametrize("key, params", CASES, ids=[k for k, _ in CASES])
+def test_params_round_trip_through_dicts(key, params):
+    strategy = get_strategy(key)
+    data = json.loads(json.dumps(asdict(params)))
+    assert strategy.params_from_dict({**data, "unknown": 1}) == params
+
+
+def _dip(worst_dd, vix):
+    """Two symbols flat at 100 for the 6-month window, then A drops by ``worst_dd`` on the last bar."""
+    n = 130
+    dates = trading_days(n)
+    a = [100.0] * (n - 1) + [100.0 * (1 + worst_dd)]
+    return MarketData(dates=dates, closes=[a, [100.0] * n], vix=[vix] * n)
+
+
+@pytest.mark.parametrize(
+    "worst_dd, vix, tier",
+    [(0.0, 15.0, 0), (-0.10, 22.0, 1), (-0.10, 15.0, 0), (-0.18, 15.0, 2), (-0.27, 30.0, 3), (-0.27, 20.0, 2), (-0.40, 15.0, 4)],
+)
+def test_tier_column_holds_the_tier_number(worst_dd, vix, tier):
+    strategy = get_strategy("etf_dca_dip_buy")
+    params = EtfDcaDipBuyParams(etfs=("A", "B"))
+    data = _dip(worst_dd, vix)
+    signals = compute_signals(strategy, params, data.closes, data.vix)
+    assert signals["tier"][-1] == float(tier)
+    name = f"档位{tier}"
+    assert f"<b>{name}</b>" in strategy.render(params, data, signals)["content"]
+    assert {t.name: t.number for t in TIERS}[name] == tier
+
+
+def test_thresholds_are_params():
+    strategy = get_strategy("etf_dca_dip_buy")
+    params = strategy.params_from_dict({"etfs": ["A", "B"], "thresholds": {"tier2_dd": -0.10, "tier1_dd_floor": -0.09}})
+    assert params.thresholds == replace(DEFAULT_TIER_THRESHOLDS, tier2_dd=-0.10, tier1_dd_floor=-0.09)
+    data = _dip(-0.12, 15.0)
+    signals = compute_signals(strategy, params, data.closes, data.vix)
+    assert signals["tier"][-1] == 2.0  # tier 0 with the default -15% bound
+    assert compute_signals(strategy, replace(params, thresholds=DEFAULT_TIER_THRESHOLDS), data.closes, data.vix)["tier"][-1] == 0.0
+    with pytest.raises(ValueError, match="tier4 < tier3"):
+        strategy.params_from_dict({"thresholds": {"tier2_dd": -0.12}})  # inside the tier 1 band
+
+
+def test_deepest_tier_draws_from_the_reserve_pool():
+    strategy = get_strategy("etf_dca_dip_buy")
+    params = EtfDcaDipBuyParams(etfs=("A", "B"))
+    data = _dip(-0.40, 15.0)
+    last = {k: v[-1] for k, v in compute_signals(strategy, params, data.closes, data.vix).items()}
+    assert (last["base_ratio"], last["extra_ratio"], last["pool_fraction"]) == (1.0, 0.0, 0.5)
+
+
+@pytest.mark.parametrize("today, note", [(date(2024, 5, 10), "执行基础定投"), (date(2024, 5, 11), "不执行基础定投（今日非交易日）")])
+def test_invest_day_is_only_acted_on_that_day(monkeypatch, today, note):
+    # the latest bar is Friday 2024-05-10, an invest day; a Saturday run must not repeat it
+    monkeypatch.setattr(etf_dca_dip_buy, "market_today", lambda: today)
+    strategy = get_strategy("etf_dca_dip_buy")
+    params = EtfDcaDipBuyParams(etfs=("A", "B"))
+    days = [d for d in trading_days(400, start=date(2023, 6, 1), skip=0.0) if d <= today]
+    data = replace(_dip(0.0, 15.0), dates=days[-130:])
+    content = strategy.render(params, data, compute_signals(strategy, params, data.closes, data.vix))["content"]
+    assert f"最新交易日 2024-05-10 {note}" in content
+
+
+def test_render_latest_marks_stale_data():
+    strategy = get_strategy("ma250_drawdown")
+    params = Ma250Params(symbol="A", base_amount=1000)
+    dates, closes, _ = _inputs("ma250_drawdown")
+    data = MarketData(dates=dates, closes=closes)
+    signals = compute_signals(strategy, params, closes)
+    fresh = render_latest(strategy, params, data, signals)
+    stale = render_latest(strategy, params, replace(data, stale=("A",)), signals)
+    assert stale["title"] == f"[缓存数据] {fresh['title']}"
+    assert stale["content"].endswith(fresh["content"])
+    assert dates[-1].isoformat() in stale["content"].split("<br>")[0]
+
+
+def test_env_params():
+    params = get_strategy("ma250_drawdown").params_from_env({"SYMBOL": " SPY ", "BASE_AMOUNT": "500"})
+    assert params == Ma250Params(symbol="SPY", base_amount=500.0)
+
+
+def test_run_backtest_runs_as_a_script(tmp_path):
+    # run by path from another directory, as the README shows, and as a module
+    for argv, cwd in (([str(REPO / "backtest" / "run_backtest.py")], tmp_path), (["-m", "backtest.run_backtest"], REPO)):
+        proc = subprocess.run([sys.executable, *argv, "--help"], cwd=cwd, capture_output=True, text=True)
+        assert proc.returncode == 0, proc.stderr
+        assert "--strategy" in proc.stdout
@@ -0,0 +1,75 @@
+import csv
+import json
+
+import pytest
+
+from backtest.incremental import IncrementalBacktest, backtest_chunks, iter_chunk_bars, iter_csv_chunks
+from backtest.run_backtest import backtest_market
+from backtest.trading_calendar import Schedule
+from helpers import assert_same_result, market
+from strategy.etf_dca_dip_buy import EtfDcaDipBuyParams
+
+PARAMS = EtfDcaDipBuyParams(etfs=("A", "B"))
+SCHEDULES = [Schedule.monthly(10), Schedule("weekly", 4), Schedule("biweekly", 1), Schedule("nth", 1)]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return market(900, seed=21)
+
+
+@pytest.fixture()
+def csv_path(tmp_path, data):
+    """The market as a CSV, with a few rows a download would also contain: gaps and bad prices."""
+    dates, a, b, vix = data
+    path = tmp_path / "prices.csv"
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["date", "A", "B", "VIX"])
+        for i, d in enumerate(dates):
+            w.writerow([d.isoformat(), repr(a[i]), repr(b[i]), "" if vix[i] is None else repr(vix[i])])
+            if i % 97 == 0:
+                w.writerow([d.isoformat() + "T12:00:00", "", repr(b[i]), "20"])  # missing price: dropped
+                w.writerow([d.isoformat() + "T13:00:00", "0", repr(b[i]), "20"])  # non-positive: dropped
+    return str(path)
+
+
+def _stream(path, size):
+    return iter_csv_chunks(path, price_columns=["A", "B"], vix_column="VIX", chunk_size=size)
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: f"{s.kind}:{s.day}")
+@pytest.mark.parametrize("size", [1, 64, 1_000_000])
+def test_streamed_csv_equals_batch_for_any_chunk_size(csv_path, data, schedule, size):
+    dates, a, b, vix = data
+    expected = backtest_market("etf_dca_dip_buy", PARAMS, dates, [a, b], vix, [schedule])[0]
+    inc = IncrementalBacktest(strategy_key="etf_dca_dip_buy", params=PARAMS, schedule=schedule)
+    assert_same_result(backtest_chunks(inc, _stream(csv_path, size)), expected)
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: f"{s.kind}:{s.day}")
+def test_checkpoint_between_chunks_equals_batch(csv_path, data, schedule):
+    dates, a, b, vix = data
+    expected = backtest_market("etf_dca_dip_buy", PARAMS, dates, [a, b], vix, [schedule])[0]
+    chunks = _stream(csv_path, 250)
+    inc = IncrementalBacktest(strategy_key="etf_dca_dip_buy", params=PARAMS, schedule=schedule)
+    for chunk in chunks:
+        inc.append(iter_chunk_bars([chunk]))
+        inc = IncrementalBacktest.from_dict(json.loads(json.dumps(inc.to_dict())))
+    assert_same_result(inc.result(), expected)
+
+
+def test_csv_chunks_are_bounded_and_lazy(csv_path, data):
+    sizes = []
+    stream = _stream(csv_path, 128)
+    first = next(stream)  # nothing past the first chunk has been read yet
+    sizes.append(len(first[0]))
+    sizes += [len(ts) for ts, _, _ in stream]
+    assert max(sizes) == 128
+    assert sum(sizes) == len(data[0])
+    assert first[2] == data[3][:128]  # empty VIX cells are None
+
+
+def test_csv_missing_columns(csv_path):
+    with pytest.raises(ValueError, match="QQQ"):
+        next(iter_csv_chunks(csv_path, price_columns=["A", "QQQ"]))
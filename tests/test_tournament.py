@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from backtest import run_backtest
+from backtest.run_backtest import LoadOptions, load_history, _tournament_datasets, backtest_market
+from backtest.tournament import Dataset, data_keys, load_variants, rank, render_html, run_tournament
+from backtest.trading_calendar import Schedule
+from helpers import assert_same_result, market, random_walk
+from strategy.base import DataRequirements
+
+np = pytest.importorskip("numpy")
+
+VARIANTS = [
+    {"name": "qqq", "strategy": "ma250_drawdown", "params": {"symbol": "QQQ", "base_amount": 1000}},
+    {"name": "qqq-weekly", "strategy": "ma250_drawdown", "params": {"symbol": "QQQ"}, "schedule": "weekly:2"},
+    {"name": "late-pair", "strategy": "etf_dca_dip_buy", "params": {"etfs": ["LATE", "QQQ"]}},
+    {"name": "pair", "strategy": "etf_dca_dip_buy", "params": {"etfs": ["A", "QQQ"], "invest_day": 20}},
+    {"name": "pair-deep", "strategy": "etf_dca_dip_buy", "params": {"etfs": ["A", "QQQ"], "thresholds": {"tier2_dd": -0.2, "tier1_dd_floor": -0.19}}},
+]
+
+
+@pytest.fixture(scope="module")
+def histories():
+    """Raw and adjusted closes per symbol; LATE lists 600 bars after the others."""
+    dates, a, qqq, vix = market(1500, seed=37)
+    late = random_walk(900, seed=5)
+    raw = {
+        "QQQ": (dates, qqq),
+        "A": (dates, a),
+        "LATE": (dates[600:], late),
+        "^VIX": ([d for d, v in zip(dates, vix) if v is not None], [v for v in vix if v is not None]),
+    }
+    adjusted = {sym: (ds, [x * 0.9 for x in xs]) for sym, (ds, xs) in raw.items()}
+    return raw, adjusted
+
+
+@pytest.fixture()
+def loader(monkeypatch, histories):
+    calls = []
+
+    def load_closes(symbols, period="20y", *, auto_adjust=False, max_age=None, directory=None):
+        calls.append((tuple(symbols), auto_adjust))
+        source = histories[1] if auto_adjust else histories[0]
+        return {
+            sym: (np.array([d.toordinal() for d in source[sym][0]], dtype=np.int64), np.array(source[sym][1]))
+            for sym in symbols
+        }
+
+    monkeypatch.setattr(run_backtest, "load_closes", load_closes)
+    return calls
+
+
+@pytest.fixture()
+def variants(tmp_path):
+    path = tmp_path / "variants.json"
+    path.write_text(json.dumps(VARIANTS), encoding="utf-8")
+    return load_variants(str(path))
+
+
+def test_load_variants(variants, tmp_path):
+    assert [v.name for v in variants] == ["qqq", "qqq-weekly", "late-pair", "pair", "pair-deep"]
+    assert variants[4].params.thresholds.tier2_dd == -0.2 and variants[4].params.thresholds.tier3_dd == -0.25
+    assert variants[0].schedule == Schedule.monthly(10) and variants[3].schedule == Schedule.monthly(20)
+    assert variants[2].params.etfs == ("LATE", "QQQ") and variants[2].needs_vix
+    assert data_keys(variants) == [(("QQQ",), False), (("LATE", "QQQ"), True), (("A", "QQQ"), True)]
+
+    bad_params = [{"strategy": "etf_dca_dip_buy", "params": {"tier2_dd": -0.18}}]
+    bad_nested = [{"strategy": "etf_dca_dip_buy", "params": {"thresholds": {"tier2": -0.18}}}]
+    for bad in ([VARIANTS[0], VARIANTS[0]], [], [{"strategy": "nope"}], bad_params, bad_nested):
+        path = tmp_path / "bad.json"
+        path.write_text(json.dumps(bad), encoding="utf-8")
+        with pytest.raises((ValueError, KeyError)):
+            load_variants(str(path))
+
+
+def test_each_dataset_is_loaded_like_a_standalone_run(variants, loader, capsys):
+    datasets = _tournament_datasets(variants, "20y", LoadOptions())
+    # one batch per adjustment
+    assert sorted((adjusted, sorted(set(symbols))) for symbols, adjusted in loader) == [
+        (False, ["A", "LATE", "QQQ", "^VIX"]),
+        (True, ["QQQ"]),
+    ]
+    for key, ds in datasets.items():
+        req = DataRequirements(symbols=key[0], period="20y", min_bars=0, needs_vix=key[1])
+        assert ds == Dataset(*load_history(req, "20y", LoadOptions()))
+
+    # the late listing only shortens the variant that holds it
+    assert len(datasets[(("QQQ",), False)].dates) == 1500
+    assert len(datasets[(("A", "QQQ"), True)].dates) == 1500
+    assert len(datasets[(("LATE", "QQQ"), True)].dates) == 900
+    # single-symbol runs use adjusted closes, like --strategy ma250_drawdown
+    assert datasets[(("QQQ",), False)].closes[0][0] == pytest.approx(0.9 * datasets[(("A", "QQQ"), True)].closes[1][0])
+    out = capsys.readouterr().out
+    assert "start set by LATE" in out and out.count("start set by") == 1
+
+
+def test_parallel_equals_serial_and_standalone(variants, loader):
+    datasets = _tournament_datasets(variants, "20y", LoadOptions())
+    serial = run_tournament(variants, datasets)
+    parallel = run_tournament(variants, datasets, workers=2)
+    for s, p in zip(serial, parallel):
+        assert s.variant == p.variant
+        assert_same_result(p.result, s.result)
+    for e in serial:
+        ds = datasets[e.variant.data_key]
+        expected = backtest_market(e.variant.strategy_key, e.variant.params, ds.dates, ds.closes, ds.vix, [e.variant.schedule])[0]
+        assert_same_result(e.result, expected)
+        assert e.result.start == ds.dates[0]
+
+
+def test_missing_dataset(variants):
+    with pytest.raises(ValueError, match="LATE,QQQ"):
+        run_tournament(variants, {})
+
+
+def test_rank_and_report(variants, loader):
+    entries = run_tournament(variants, _tournament_datasets(variants, "20y", LoadOptions()))
+    ranked = rank(entries)
+    xirrs = [e.result.full_period_xirr for e in ranked]
+    assert xirrs == sorted(xirrs, reverse=True)
+    by_vol = [e.result.risk.annualized_volatility for e in rank(entries, "annualized_volatility")]
+    assert by_vol == sorted(by_vol)
+    with pytest.raises(ValueError, match="Available"):
+        rank(entries, "nope")
+
+    page = render_html(ranked, by="full_period_xirr")
+    assert "Period" in page and all(v.name in page for v in variants)
+    assert ranked[0].result.start.isoformat() in page
@@ -0,0 +1,139 @@
+from datetime import date
+
+import pytest
+
+from backtest.trading_calendar import OnlineScheduler, Schedule, TradingCalendar, _week_no
+from helpers import trading_days
+
+SCHEDULES = [
+    Schedule.monthly(1),
+    Schedule.monthly(10),
+    Schedule.monthly(28),
+    Schedule("weekly", 0),
+    Schedule("weekly", 4),
+    Schedule("biweekly", 2),
+    Schedule("nth", 1),
+    Schedule("nth", 5),
+    Schedule("nth", 20),
+    Schedule("nth", -1),
+    Schedule("nth", -3),
+]
+
+
+def _naive_indices(dates, schedule):
+    """Scan every period day by day (the rule as documented on Schedule)."""
+    monthly = schedule.kind in ("monthly", "nth")
+    periods = {}
+    for i, d in enumerate(dates):
+        key = (d.year, d.month) if monthly else _week_no(d.toordinal())
+        periods.setdefault(key, []).append(i)
+    keys = list(periods)
+    out = []
+    for k, key in enumerate(keys):
+        idx = periods[key]
+        if schedule.kind == "biweekly" and key % 2:
+            continue
+        if schedule.kind == "nth" and schedule.day < 0:
+            hit = idx[max(0, len(idx) + schedule.day)] if k + 1 < len(keys) else None
+        elif schedule.kind == "nth":
+            hit = idx[0] + schedule.day - 1 if idx[0] + schedule.day - 1 < len(dates) else None
+        else:
+            if schedule.kind == "monthly":
+                target = date(key[0], key[1], schedule.day)
+            else:
+                target = date.fromordinal(key * 7 + 1 + schedule.day)
+            hit = next((i for i in range(idx[0], len(dates)) if dates[i] >= target), None)
+        if hit is not None and hit not in out:
+            out.append(hit)
+    return out
+
+
+@pytest.fixture(scope="module")
+def dates():
+    # ~8% of weekdays missing, so many periods lack the exact target day
+    return trading_days(1200, seed=7, skip=0.08)
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: f"{s.kind}:{s.day}")
+def test_schedule_indices_match_a_day_by_day_scan(dates, schedule):
+    assert TradingCalendar(dates).schedule_indices(schedule) == _naive_indices(dates, schedule)
+
+
+@pytest.mark.parametrize("schedule", SCHEDULES, ids=lambda s: f"{s.kind}:{s.day}")
+def test_is_scheduled_matches_schedule_indices(dates, schedule):
+    cal = TradingCalendar(dates)
+    picked = set(cal.schedule_indices(schedule))
+    assert [cal.is_scheduled(d, schedule) for d in dates] == [i in picked for i in range(len(dates))]
+
+
+@pytest.mark.parametrize(
+    "schedule", [s for s in SCHEDULES if not (s.kind == "nth" and s.day < 0)], ids=lambda s: f"{s.kind}:{s.day}"
+)
+def test_online_scheduler_agrees_with_is_scheduled(dates, schedule):
+    cal = TradingCalendar(dates)
+    online = OnlineScheduler(schedule)
+    for d in dates:
+        assert online.is_invest(d) == cal.is_scheduled(d, schedule), d
+
+
+def test_open_period_never_falls_back():
+    # the calendar ends on the 15th: monthly:20 has not come yet, so the last bar is not an invest day
+    dates = [d for d in trading_days(40, start=date(2024, 3, 1), skip=0.0) if d <= date(2024, 4, 15)]
+    cal = TradingCalendar(dates)
+    assert not cal.is_scheduled(dates[-1], Schedule.monthly(20))
+    assert cal.schedule_dates(Schedule.monthly(20)) == [date(2024, 3, 20)]
+    assert cal.schedule_dates(Schedule("nth", -1)) == [date(2024, 3, 29)]
+
+
+def _us_2024_2026():
+    """Weekdays without the NYSE holidays that matter below."""
+    holidays = {date(2024, 3, 29), date(2026, 2, 16)}
+    return [d for d in trading_days(800, start=date(2024, 1, 2), skip=0.0) if d not in holidays]
+
+
+@pytest.mark.parametrize(
+    "schedule, week, expected",
+    [
+        # Good Friday 2024: the Friday target rolls to Monday after Easter, not back to Thursday
+        (Schedule("weekly", 4), (date(2024, 3, 25), date(2024, 4, 5)), [date(2024, 4, 1), date(2024, 4, 5)]),
+        # February 2026 ends on Friday the 27th: the 28th rolls to Monday, March 2
+        (Schedule.monthly(28), (date(2026, 2, 1), date(2026, 3, 31)), [date(2026, 3, 2), date(2026, 3, 30)]),
+    ],
+)
+def test_missing_target_rolls_forward_in_batch_and_live(schedule, week, expected):
+    dates = _us_2024_2026()
+    cal = TradingCalendar(dates)
+    in_window = [d for d in cal.schedule_dates(schedule) if week[0] <= d <= week[1]]
+    assert in_window == expected
+    online = OnlineScheduler(schedule)
+    live = [d for d in dates if online.is_invest(d) and week[0] <= d <= week[1]]
+    assert live == expected
+    # the live job deciding on the latest bar agrees too
+    latest = [d for i, d in enumerate(dates) if TradingCalendar(dates[: i + 1]).is_scheduled(d, schedule)]
+    assert [d for d in latest if week[0] <= d <= week[1]] == expected
+
+
+def test_non_trading_days_are_not_scheduled(dates):
+    cal = TradingCalendar(dates)
+    assert not cal.is_scheduled(date(2010, 1, 9), Schedule("weekly", 0))  # a Saturday
+    with pytest.raises(KeyError):
+        cal.index_of(date(2010, 1, 9))
+
+
+def test_lookups():
+    cal = TradingCalendar([date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 5)])
+    assert date(2024, 1, 3) in cal and date(2024, 1, 4) not in cal
+    assert cal.next_on_or_after(date(2024, 1, 4)) == 2
+    assert cal.last_on_or_before(date(2024, 1, 4)) == 1
+    assert cal.next_on_or_after(date(2024, 1, 6)) is None
+    assert cal.last_on_or_before(date(2024, 1, 1)) is None
+
+
+def test_schedule_parse_and_validation():
+    assert Schedule.parse("weekly:2") == Schedule("weekly", 2)
+    assert Schedule.parse(" NTH:-1 ") == Schedule("nth", -1)
+    for bad in ("monthly", "daily:1", "monthly:29", "weekly:5", "nth:0"):
+        with pytest.raises(ValueError):
+            Schedule.parse(bad)
+    with pytest.raises(ValueError):
+        OnlineScheduler(Schedule("nth", -1))
@@ -0,0 +1,77 @@
+import pytest
+
+from backtest.trading_calendar import Schedule
+from backtest.walk_forward import threshold_grid, walk_forward, window_bounds
+from helpers import assert_same_result, market
+from strategy import get_strategy
+from strategy.base import compute_signals
+from strategy.etf_dca_dip_buy import DEFAULT_TIER_THRESHOLDS, EtfDcaDipBuyParams, _pick_tier
+
+PARAMS = EtfDcaDipBuyParams(etfs=("A", "B"))
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    dates, a, b, vix = market(1400, seed=36)
+    strategy = get_strategy("etf_dca_dip_buy")
+    signals = compute_signals(strategy, PARAMS, [a, b], vix)
+    return dict(dates=dates, closes=[a, b], worst_dd=signals["worst_dd"], vix=vix, terms=strategy.terms(PARAMS))
+
+
+def _run(inputs, **kwargs):
+    return walk_forward(**inputs, schedule=Schedule.monthly(10), train_years=2, test_years=1, **kwargs)
+
+
+def test_window_bounds():
+    assert window_bounds(10, 4, 3) == [(0, 4, 7), (3, 7, 10)]
+    assert window_bounds(12, 4, 3)[-1] == (6, 10, 12)  # the last test window is cut at the end
+    assert window_bounds(4, 4, 3) == []
+    with pytest.raises(ValueError):
+        window_bounds(10, 0, 3)
+
+
+def test_grid_starts_with_the_live_thresholds():
+    grid = threshold_grid()
+    assert grid[0] == DEFAULT_TIER_THRESHOLDS and len(set(grid)) == len(grid)
+    assert all(th.tier4_dd < th.tier3_dd < th.tier2_dd < th.tier1_dd_floor for th in grid)
+
+
+def test_grid_tiers_never_drop_as_vix_rises():
+    for th in threshold_grid():
+        for dd in [x / 200 for x in range(-100, 1)]:
+            tiers = [_pick_tier(dd, vix, th).number for vix in (None, 15.0, 22.0, 30.0)]
+            assert tiers == sorted(tiers), (th, dd)
+
+
+def test_parallel_equals_serial(inputs):
+    grid = threshold_grid()[:6]
+    serial = _run(inputs, grid=grid)
+    parallel = _run(inputs, grid=grid, workers=2)
+    assert len(serial.windows) == 4
+    assert parallel.windows == serial.windows
+    assert_same_result(parallel.oos, serial.oos)
+    assert_same_result(parallel.oos_baseline, serial.oos_baseline)
+
+
+def test_windows_pick_the_best_train_score(inputs):
+    grid = threshold_grid()[:6]
+    report = _run(inputs, grid=grid)
+    for w in report.windows:
+        assert w.thresholds in grid
+        assert w.train_start < w.train_end < w.test_start <= w.test_end
+    # the live thresholds are in the grid, so the chosen ones score at least as well on the train window
+    for chosen, live in zip(report.windows, _run(inputs, grid=[grid[0]]).windows):
+        assert chosen.train_start == live.train_start
+        assert chosen.train_xirr >= live.train_xirr
+
+
+def test_live_thresholds_only_reproduce_the_baseline(inputs):
+    report = _run(inputs, grid=[DEFAULT_TIER_THRESHOLDS])
+    assert all(w.thresholds == DEFAULT_TIER_THRESHOLDS for w in report.windows)
+    assert_same_result(report.oos, report.oos_baseline)
+    assert report.oos.start == report.windows[0].test_start and report.oos.end == report.windows[-1].test_end
+
+
+def test_too_short_history(inputs):
+    with pytest.raises(ValueError, match="not enough"):
+        walk_forward(**{**inputs, "dates": inputs["dates"][:300]}, schedule=Schedule.monthly(10), train_years=2)